@@ -0,0 +1,263 @@
+"""
+Assembly fit checks between lamp bases and shades.
+Places a shade on its base the way they go together (the pairs and seat
+heights come from each family's design_family.json), then measures the
+clearance between the base's locating features and the shade with a batched
+nearest-distance query on the BVH, and the interference volume by integrating
+the overlap of both solids along vertical rays. Everything is vectorised over
+query points, rays and triangles; only the BVH levels are looped over.
+"""
+
+import numpy as np
+
+from mesh_check import BVH
+from mesh_io import read_stl, triangle_normals
+
+# Gap (mm) between mating surfaces a printed slip fit tolerates: tighter
+# parts will not go together, looser ones wobble
+DEFAULT_CLEARANCE_BAND = (0.15, 0.6)
+
+# Overlap volume (mm³) still counted as touching rather than colliding
+INTERFERENCE_TOLERANCE = 1.0
+
+# Surfaces further apart than this (mm) are not mating
+SEARCH_RADIUS = 5.0
+
+# Faces within this distance (mm) of the seat plane are the bearing faces
+SEAT_TOLERANCE = 0.05
+# Faces whose normal is within this cosine of vertical count as flat
+FLAT_COS = 0.999
+
+# Spacing (mm) of the vertical rays integrating the interference volume,
+# and a small irrational offset so rays miss vertices and edges
+INTERFERENCE_GRID = 0.5
+RAY_OFFSET = (0.1234567, 0.3456789)
+
+# Query points per batch, to bound the size of the traversal frontier
+QUERY_BATCH = 1 << 15
+
+
+def _segment_distance_sq(p, a, b):
+    """Squared distance from points to segments, row by row"""
+    ab = b - a
+    denom = np.einsum("ij,ij->i", ab, ab)
+    t = np.clip(np.einsum("ij,ij->i", p - a, ab) / np.where(denom > 0, denom, 1), 0, 1)
+    d = p - (a + t[:, None] * ab)
+    return np.einsum("ij,ij->i", d, d)
+
+
+def point_triangle_distance_sq(p, a, b, c):
+    """Squared distance from points to triangles, row by row"""
+    n = np.cross(b - a, c - a)
+    nn = np.einsum("ij,ij->i", n, n)
+    # The projection lands inside when it is on the inner side of all edges
+    inside = nn > 0
+    for u, v in ((a, b), (b, c), (c, a)):
+        inside &= np.einsum("ij,ij->i", np.cross(v - u, p - u), n) >= 0
+    plane = np.einsum("ij,ij->i", p - a, n) ** 2 / np.where(nn > 0, nn, 1)
+    edges = np.minimum(np.minimum(_segment_distance_sq(p, a, b), _segment_distance_sq(p, b, c)),
+                       _segment_distance_sq(p, c, a))
+    return np.where(inside, plane, edges)
+
+
+def nearest_distances(points, triangles, radius=SEARCH_RADIUS):
+    """Distance from each point to the closest triangle; inf beyond radius"""
+    points = np.asarray(points, dtype=np.float64)
+    tris = np.asarray(triangles, dtype=np.float64)
+    nearest = np.full(len(points), np.inf)
+    if not len(points) or not len(tris):
+        return nearest
+
+    bvh = BVH(tris.min(axis=1), tris.max(axis=1))
+    size = bvh.leaf_size
+    padded_order = np.full(-(-bvh.count // size) * size, -1, dtype=np.int64)
+    padded_order[:bvh.count] = bvh.order
+    leaf_tris = padded_order.reshape(-1, size)
+    limit = radius * radius
+
+    for start in range(0, len(points), QUERY_BATCH):
+        query = np.arange(start, min(start + QUERY_BATCH, len(points)))
+        nodes = np.zeros(len(query), dtype=np.int64)
+        for d in range(bvh.depth + 1):
+            if d:
+                query = np.repeat(query, 2)
+                nodes = np.repeat(nodes * 2, 2)
+                nodes[1::2] += 1
+            # Padding nodes have inverted boxes and come out infinitely far
+            lo, hi = bvh.levels[d]
+            p = points[query]
+            gap = np.maximum(np.maximum(lo[nodes] - p, p - hi[nodes]), 0)
+            keep = np.einsum("ij,ij->i", gap, gap) <= limit
+            query, nodes = query[keep], nodes[keep]
+
+        point_idx = np.repeat(query, size)
+        tri_idx = leaf_tris[nodes].ravel()
+        real = tri_idx >= 0
+        point_idx, tri_idx = point_idx[real], tri_idx[real]
+        dist = point_triangle_distance_sq(points[point_idx], tris[tri_idx, 0],
+                                          tris[tri_idx, 1], tris[tri_idx, 2])
+        near = dist <= limit
+        np.minimum.at(nearest, point_idx[near], dist[near])
+    return np.sqrt(nearest)
+
+
+def surface_samples(triangles):
+    """Corners, edge midpoints and centroid of every triangle as (n, 3) points"""
+    tris = np.asarray(triangles, dtype=np.float64)
+    return np.concatenate([
+        tris,
+        (tris + np.roll(tris, -1, axis=1)) / 2.0,
+        tris.mean(axis=1, keepdims=True),
+    ], axis=1).reshape(-1, 3)
+
+
+def _ray_crossings(triangles, origin, shape, spacing):
+    """Where vertical rays on a grid cross the surface: (ray, z, winding step)
+
+    The step is +1 where a ray rising through the solid enters it (face
+    pointing down) and -1 where it leaves.
+    """
+    tris = np.asarray(triangles, dtype=np.float64)
+    nz = triangle_normals(tris)[:, 2]
+    tris = tris[nz != 0]
+    nz = nz[nz != 0]
+    xy = (tris[:, :, :2] - origin) / spacing
+    c0 = np.clip(np.ceil(xy.min(axis=1)).astype(np.int64), 0, shape)
+    c1 = np.clip(np.floor(xy.max(axis=1)).astype(np.int64) + 1, 0, shape)
+    span = np.maximum(c1 - c0, 0)
+    per_tri = span[:, 0] * span[:, 1]
+    tri = np.repeat(np.arange(len(tris)), per_tri)
+    local = np.arange(len(tri)) - np.repeat(np.cumsum(per_tri) - per_tri, per_tri)
+    cx = c0[tri, 0] + local % span[tri, 0]
+    cy = c0[tri, 1] + local // span[tri, 0]
+
+    # Barycentric test of each ray against the triangle's footprint
+    a, b, c = xy[tri, 0], xy[tri, 1], xy[tri, 2]
+    px, py = cx.astype(np.float64), cy.astype(np.float64)
+    w0 = (b[:, 0] - px) * (c[:, 1] - py) - (b[:, 1] - py) * (c[:, 0] - px)
+    w1 = (c[:, 0] - px) * (a[:, 1] - py) - (c[:, 1] - py) * (a[:, 0] - px)
+    w2 = (a[:, 0] - px) * (b[:, 1] - py) - (a[:, 1] - py) * (b[:, 0] - px)
+    area = w0 + w1 + w2
+    hit = (np.sign(w0) == np.sign(area)) & (np.sign(w1) == np.sign(area)) & \
+          (np.sign(w2) == np.sign(area))
+    tri, cx, cy = tri[hit], cx[hit], cy[hit]
+    w = np.stack([w0[hit], w1[hit], w2[hit]], axis=1) / area[hit, None]
+    z = np.einsum("ij,ij->i", w, tris[tri, :, 2])
+    ray = cx * shape[1] + cy
+    return ray, z, -np.sign(nz[tri]).astype(np.int64)
+
+
+def interference(triangles_a, triangles_b, spacing=INTERFERENCE_GRID):
+    """Volume (mm³) inside both closed solids, plus the XY of the deepest overlaps"""
+    a = np.asarray(triangles_a, dtype=np.float64)
+    b = np.asarray(triangles_b, dtype=np.float64)
+    low = np.maximum(a.reshape(-1, 3).min(axis=0), b.reshape(-1, 3).min(axis=0))
+    high = np.minimum(a.reshape(-1, 3).max(axis=0), b.reshape(-1, 3).max(axis=0))
+    if np.any(low >= high):
+        return 0.0, []
+
+    # Ray (i, j) rises through XY point origin + (i, j) * spacing
+    origin = low[:2] - np.array(RAY_OFFSET) * spacing
+    shape = np.floor((high[:2] - origin) / spacing).astype(np.int64) + 1
+    ray_a, z_a, step_a = _ray_crossings(a, origin, shape, spacing)
+    ray_b, z_b, step_b = _ray_crossings(b, origin, shape, spacing)
+    ray = np.concatenate([ray_a, ray_b])
+    z = np.concatenate([z_a, z_b])
+    step_a = np.concatenate([step_a, np.zeros(len(z_b), dtype=np.int64)])
+    step_b = np.concatenate([np.zeros(len(z_a), dtype=np.int64), step_b])
+    if not len(ray):
+        return 0.0, []
+
+    # Walk every ray upwards at once: winding numbers are running sums per ray
+    order = np.lexsort((z, ray))
+    ray, z, step_a, step_b = ray[order], z[order], step_a[order], step_b[order]
+    starts = np.ones(len(ray), dtype=bool)
+    starts[1:] = ray[1:] != ray[:-1]
+    group = np.cumsum(starts) - 1
+    winding_a = np.cumsum(step_a)
+    winding_b = np.cumsum(step_b)
+    first = np.nonzero(starts)[0]
+    winding_a -= (winding_a - step_a)[first][group]
+    winding_b -= (winding_b - step_b)[first][group]
+
+    # Length of each stretch between crossings that lies inside both solids
+    same_ray = ray[1:] == ray[:-1]
+    both = (winding_a[:-1] > 0) & (winding_b[:-1] > 0) & same_ray
+    length = np.where(both, z[1:] - z[:-1], 0.0)
+    per_ray = np.bincount(ray[:-1], weights=length, minlength=int(shape[0] * shape[1]))
+    volume = float(per_ray.sum() * spacing * spacing)
+
+    deepest = np.argsort(per_ray)[::-1][:5]
+    deepest = deepest[per_ray[deepest] > 1e-6]
+    examples = [[round(float(origin[0] + (r // shape[1]) * spacing), 3),
+                 round(float(origin[1] + (r % shape[1]) * spacing), 3)] for r in deepest]
+    return volume, examples
+
+
+def seat_shade(base, shade, seat_z):
+    """Move the shade so its lowest point rests at seat_z, centred over the base"""
+    base_points = base.reshape(-1, 3)
+    shade_points = shade.reshape(-1, 3)
+    offset = np.zeros(3)
+    offset[:2] = ((base_points[:, :2].min(axis=0) + base_points[:, :2].max(axis=0))
+                  - (shade_points[:, :2].min(axis=0) + shade_points[:, :2].max(axis=0))) / 2.0
+    offset[2] = seat_z - shade_points[:, 2].min()
+    return shade + offset, offset
+
+
+def check_fit(base_triangles, shade_triangles, seat_z, band=DEFAULT_CLEARANCE_BAND):
+    """Clearance and interference of a shade resting on its base"""
+    base = np.asarray(base_triangles, dtype=np.float64)
+    shade, offset = seat_shade(base, np.asarray(shade_triangles, dtype=np.float64), seat_z)
+
+    # The bearing faces touch by design; the fit is decided by the base's
+    # features rising above the seat and the shade surfaces around them
+    def unit_z(tris):
+        normals = triangle_normals(tris)
+        return normals[:, 2] / np.maximum(np.linalg.norm(normals, axis=1), 1e-30)
+
+    features = base[base[:, :, 2].max(axis=1) > seat_z + SEAT_TOLERANCE]
+    bearing = ((unit_z(shade) < -FLAT_COS)
+               & (np.abs(shade[:, :, 2].mean(axis=1) - seat_z) < SEAT_TOLERANCE))
+    mating = shade[~bearing]
+
+    clearance, closest_point = None, None
+    if len(features) and len(mating):
+        reach_low = features.reshape(-1, 3).min(axis=0) - SEARCH_RADIUS
+        reach_high = features.reshape(-1, 3).max(axis=0) + SEARCH_RADIUS
+        samples = []
+        for points_from, tris_to in ((surface_samples(mating), features),
+                                     (surface_samples(features), mating)):
+            near = np.all((points_from >= reach_low) & (points_from <= reach_high), axis=1)
+            points_from = points_from[near]
+            samples.append((nearest_distances(points_from, tris_to), points_from))
+        distance = np.concatenate([d for d, _ in samples])
+        points = np.concatenate([p for _, p in samples])
+        if len(distance) and np.isfinite(distance.min()):
+            i = int(np.argmin(distance))
+            clearance = float(distance[i])
+            closest_point = np.round(points[i], 3).tolist()
+
+    volume, examples = interference(base, shade)
+    low, high = band
+    if not len(features):
+        fit_ok = True  # the shade only rests on the rim
+    else:
+        fit_ok = clearance is not None and low <= clearance <= high
+    return {
+        "seat_z_mm": seat_z,
+        "shade_offset_mm": np.round(offset, 4).tolist(),
+        "clearance_band_mm": [low, high],
+        "search_radius_mm": SEARCH_RADIUS,
+        "locating_faces": int(len(features)),
+        "min_clearance_mm": clearance,
+        "closest_point": closest_point,
+        "interference_mm3": volume,
+        "interference_examples": examples,
+        "ok": fit_ok and volume <= INTERFERENCE_TOLERANCE,
+    }
+
+
+def check_assembly(base_path, shade_path, seat_z, band=DEFAULT_CLEARANCE_BAND):
+    """Fit check for one base and shade STL pair"""
+    return check_fit(read_stl(base_path), read_stl(shade_path), seat_z, band)
@@ -0,0 +1,67 @@
+"""
+Recording stand-in for Blender's bpy, bmesh and mathutils modules.
+Lets the lamp scripts run in plain CPython so CI can time them and check
+the geometry they build without a Blender install.
+
+Usage:
+    python -m blender_stub simple_lamp_cube.py [--output-dir DIR] [--report FILE]
+"""
+
+import os
+import runpy
+import sys
+import time
+
+STUB_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def install():
+    """Make `import bpy`, `import bmesh` and `import mathutils` resolve to the stub"""
+    if STUB_DIR not in sys.path:
+        sys.path.insert(0, STUB_DIR)
+
+
+def run_script(script_path, export_dir=None):
+    """Run a lamp script against the stub and return a summary of what it did"""
+    install()
+    import bpy
+
+    bpy.reset(export_dir=export_dir)
+    saved_stl_dir = os.environ.get("LAMP_STL_DIR")
+    if export_dir:
+        # Keep stl_export from creating the script's hard-coded directory
+        os.environ["LAMP_STL_DIR"] = export_dir
+    start = time.perf_counter()
+    try:
+        runpy.run_path(os.path.abspath(script_path), run_name="__main__")
+    finally:
+        elapsed = time.perf_counter() - start
+        if saved_stl_dir is None:
+            os.environ.pop("LAMP_STL_DIR", None)
+        else:
+            os.environ["LAMP_STL_DIR"] = saved_stl_dir
+
+    # Aggregate per-operator totals so hot operators stand out
+    operators = {}
+    for call in bpy.CALL_LOG:
+        entry = operators.setdefault(call["op"], {"count": 0, "seconds": 0.0})
+        entry["count"] += 1
+        entry["seconds"] += call["seconds"]
+
+    return {
+        "script": os.path.basename(script_path),
+        "seconds": elapsed,
+        "calls": list(bpy.CALL_LOG),
+        "operators": operators,
+        "objects": [
+            {
+                "name": obj.name,
+                "vertices": len(obj.data.vertices),
+                "faces": len(obj.data.polygons),
+                "modifiers": [m.type for m in obj.modifiers],
+            }
+            for obj in bpy.context.scene.collection.objects
+            if isinstance(obj.data, bpy.Mesh)
+        ],
+        "exports": list(bpy.EXPORTS),
+    }
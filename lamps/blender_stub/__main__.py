@@ -0,0 +1,45 @@
+"""Run lamp scripts against the bpy stub and print their operator timings"""
+
+import argparse
+import json
+import os
+import sys
+
+from . import run_script
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("scripts", nargs="+", help="Lamp scripts to run")
+    parser.add_argument("--output-dir", default=None,
+                        help="Directory for exported STLs (default: STLs/ next to each script)")
+    parser.add_argument("--report", default=None, help="Write the full call log as JSON here")
+    args = parser.parse_args()
+
+    results = []
+    for script in args.scripts:
+        export_dir = args.output_dir or os.path.join(os.path.dirname(os.path.abspath(script)), "STLs")
+        try:
+            result = run_script(script, export_dir=export_dir)
+        except Exception as e:
+            print(f"❌ {script}: {type(e).__name__}: {e}")
+            results.append({"script": os.path.basename(script), "error": str(e)})
+            continue
+        results.append(result)
+
+        print(f"✅ {result['script']}: {result['seconds'] * 1000:.1f} ms, {len(result['calls'])} calls")
+        for obj in result["objects"]:
+            print(f"  {obj['name']}: {obj['vertices']} verts, {obj['faces']} faces")
+        hottest = sorted(result["operators"].items(), key=lambda kv: kv[1]["seconds"], reverse=True)
+        for op, stats in hottest[:5]:
+            print(f"  {op}: {stats['count']}x, {stats['seconds'] * 1000:.2f} ms")
+
+    if args.report:
+        with open(args.report, "w") as f:
+            json.dump(results, f, indent=2, default=repr)
+
+    return 1 if any("error" in r for r in results) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,438 @@
+"""
+Stand-in for Blender's bmesh module.
+Stores real vertices and faces; bmesh.new(), BMesh.to_mesh() and the
+bmesh.ops functions are recorded in bpy.CALL_LOG alongside the operators.
+Edges are derived from the faces whenever they are asked for.
+"""
+
+import math
+from types import SimpleNamespace
+
+import bpy
+from mathutils import Vector
+
+
+class BMVert:
+    def __init__(self, co, index):
+        self.co = co
+        self.index = index
+        self.select = False
+        self.link_faces = []
+        self.is_valid = True
+
+    @property
+    def co(self):
+        return self._co
+
+    @co.setter
+    def co(self, value):
+        # Like Blender, any 3-sequence can be assigned
+        self._co = Vector(value)
+
+
+class BMEdge:
+    def __init__(self, verts, index):
+        self.verts = tuple(verts)
+        self.index = index
+        self.link_faces = []
+        self.is_valid = True
+
+
+class BMFace:
+    def __init__(self, verts, index):
+        self.verts = list(verts)
+        self.index = index
+        self.select = False
+        self.is_valid = True
+
+    @property
+    def normal(self):
+        nx = ny = nz = 0.0
+        count = len(self.verts)
+        for i in range(count):
+            a = self.verts[i].co
+            b = self.verts[(i + 1) % count].co
+            nx += (a.y - b.y) * (a.z + b.z)
+            ny += (a.z - b.z) * (a.x + b.x)
+            nz += (a.x - b.x) * (a.y + b.y)
+        return Vector((nx, ny, nz)).normalized()
+
+    def normal_flip(self):
+        self.verts.reverse()
+
+    def calc_center_median(self):
+        total = Vector((0.0, 0.0, 0.0))
+        for v in self.verts:
+            total += v.co
+        return total / len(self.verts)
+
+
+class BMElemSeq(list):
+    def ensure_lookup_table(self):
+        pass
+
+    def index_update(self):
+        for i, elem in enumerate(self):
+            elem.index = i
+
+
+class BMVertSeq(BMElemSeq):
+    def new(self, co=(0.0, 0.0, 0.0), example=None):
+        vert = BMVert(co, len(self))
+        self.append(vert)
+        return vert
+
+    def remove(self, vert):
+        for face in list(vert.link_faces):
+            self._bm.faces.remove(face)
+        vert.is_valid = False
+        list.remove(self, vert)
+
+
+class BMFaceSeq(BMElemSeq):
+    def new(self, verts, example=None):
+        verts = list(verts)
+        if len(verts) < 3:
+            raise ValueError("faces.new(verts): sequence too short (expected 3 or more)")
+        if len({id(v) for v in verts}) != len(verts):
+            raise ValueError("faces.new(verts): found the same (BMVert) used multiple times")
+        key = frozenset(id(v) for v in verts)
+        if key in self._keys:
+            raise ValueError("faces.new(verts): face already exists")
+        face = BMFace(verts, len(self))
+        self._keys.add(key)
+        for v in verts:
+            v.link_faces.append(face)
+        self.append(face)
+        return face
+
+    def remove(self, face):
+        self._keys.discard(frozenset(id(v) for v in face.verts))
+        for v in face.verts:
+            v.link_faces.remove(face)
+        face.is_valid = False
+        list.remove(self, face)
+
+
+class BMesh:
+    def __init__(self):
+        self.verts = BMVertSeq()
+        self.faces = BMFaceSeq()
+        self.faces._keys = set()
+        self.verts._bm = self
+        self.is_valid = True
+
+    @property
+    def edges(self):
+        edges = {}
+        for face in self.faces:
+            count = len(face.verts)
+            for i in range(count):
+                a, b = face.verts[i], face.verts[(i + 1) % count]
+                key = frozenset((id(a), id(b)))
+                if key not in edges:
+                    edges[key] = BMEdge((a, b), len(edges))
+                edges[key].link_faces.append(face)
+        return BMElemSeq(edges.values())
+
+    def normal_update(self):
+        pass
+
+    def _replace_face(self, face, verts):
+        """Give face a new vertex list, dropping it if it degenerates"""
+        self.faces.remove(face)
+        # Merged vertices leave repeats; keep the first of each run
+        kept = [v for i, v in enumerate(verts) if v is not verts[i - 1]]
+        if len(kept) >= 3 and len({id(v) for v in kept}) == len(kept):
+            try:
+                return self.faces.new(kept)
+            except ValueError:
+                pass
+        return None
+
+    def to_mesh(self, mesh):
+        bpy.record("bmesh.to_mesh", self._to_mesh, mesh)
+
+    def _to_mesh(self, mesh):
+        self.verts.index_update()
+        mesh.set_geometry([v.co for v in self.verts],
+                          [[v.index for v in f.verts] for f in self.faces])
+
+    def from_mesh(self, mesh):
+        # Like Blender, appends to any geometry already in the BMesh
+        verts = [self.verts.new(v.co) for v in mesh.vertices]
+        for poly in mesh.polygons:
+            self.faces.new([verts[i] for i in poly.vertices])
+
+    def free(self):
+        self.is_valid = False
+
+
+def new(use_operators=True):
+    return bpy.record("bmesh.new", BMesh)
+
+
+# ---------------------------------------------------------------------------
+# bmesh.ops
+# ---------------------------------------------------------------------------
+
+def _sorted_geom(geom):
+    """Split a mixed geom list into verts and faces"""
+    verts = [e for e in geom if isinstance(e, BMVert)]
+    faces = [e for e in geom if isinstance(e, BMFace)]
+    return verts, faces
+
+
+def _transform(matrix, co):
+    """Apply a 4x4 matrix, given as rows like mathutils.Matrix, to a point"""
+    rows = [list(row) for row in matrix]
+    return [sum(rows[i][j] * co[j] for j in range(3)) + rows[i][3] for i in range(3)]
+
+
+def _create_uvsphere(bm, u_segments=8, v_segments=8, radius=1.0, matrix=None, calc_uvs=False):
+    # Profile from the south pole up in the XZ plane, spun clockwise about Z
+    rings = []
+    for k in range(1, v_segments):
+        phi = math.pi * k / v_segments
+        z = -radius * math.cos(phi) if 2 * k != v_segments else 0.0
+        ring = []
+        for a in range(u_segments):
+            theta = -2.0 * math.pi * a / u_segments
+            ring.append(bm.verts.new((radius * math.sin(phi) * math.cos(theta),
+                                      radius * math.sin(phi) * math.sin(theta), z)))
+        rings.append(ring)
+    south = bm.verts.new((0.0, 0.0, -radius))
+    north = bm.verts.new((0.0, 0.0, radius))
+    for a in range(u_segments):
+        b = (a + 1) % u_segments
+        bm.faces.new([south, rings[0][a], rings[0][b]])
+        for lower, upper in zip(rings, rings[1:]):
+            bm.faces.new([lower[b], lower[a], upper[a], upper[b]])
+        bm.faces.new([north, rings[-1][b], rings[-1][a]])
+    if matrix is not None:
+        for v in [v for ring in rings for v in ring] + [south, north]:
+            v.co = _transform(matrix, v.co)
+    return {"verts": [v for ring in rings for v in ring] + [south, north]}
+
+
+def _scale(bm, vec=(1.0, 1.0, 1.0), verts=(), space=None, use_shapekey=False):
+    for v in verts:
+        v.co = Vector((v.co.x * vec[0], v.co.y * vec[1], v.co.z * vec[2]))
+    return {}
+
+
+def _translate(bm, vec=(0.0, 0.0, 0.0), verts=(), space=None, use_shapekey=False):
+    for v in verts:
+        v.co = v.co + Vector(vec)
+    return {}
+
+
+def _bisect_plane(bm, geom=(), dist=0.0, plane_co=(0.0, 0.0, 0.0), plane_no=(0.0, 0.0, 1.0),
+                  use_snap_center=False, clear_outer=False, clear_inner=False):
+    verts, faces = _sorted_geom(geom)
+    plane_co, plane_no = Vector(plane_co), Vector(plane_no).normalized()
+
+    def side(v):
+        d = (v.co - plane_co).dot(plane_no)
+        return 0 if abs(d) <= dist else (1 if d > 0 else -1)
+
+    sides = {id(v): side(v) for v in verts}
+    for face in faces:
+        for v in face.verts:
+            if id(v) not in sides:
+                sides[id(v)] = side(v)
+    cut = [v for v in verts if sides[id(v)] == 0]
+    splits = {}
+
+    def split(a, b):
+        key = frozenset((id(a), id(b)))
+        if key not in splits:
+            da = (a.co - plane_co).dot(plane_no)
+            db = (b.co - plane_co).dot(plane_no)
+            v = bm.verts.new(a.co + (b.co - a.co) * (da / (da - db)))
+            sides[id(v)] = 0
+            splits[key] = v
+            cut.append(v)
+        return splits[key]
+
+    for face in faces:
+        face_sides = [sides[id(v)] for v in face.verts]
+        pieces = {1: [], -1: []}
+        if min(face_sides) >= 0 and max(face_sides) > 0:
+            pieces[1] = list(face.verts)
+        elif max(face_sides) <= 0 and min(face_sides) < 0:
+            pieces[-1] = list(face.verts)
+        elif min(face_sides) == max(face_sides) == 0:
+            continue
+        else:
+            # Clip the polygon against both half spaces
+            count = len(face.verts)
+            for i in range(count):
+                a, b = face.verts[i], face.verts[(i + 1) % count]
+                sa, sb = sides[id(a)], sides[id(b)]
+                for s in (1, -1):
+                    if sa == s or sa == 0:
+                        pieces[s].append(a)
+                if sa * sb < 0:
+                    mid = split(a, b)
+                    pieces[1].append(mid)
+                    pieces[-1].append(mid)
+        bm.faces.remove(face)
+        for s, piece in pieces.items():
+            if len(piece) >= 3 and not ((s > 0 and clear_outer) or (s < 0 and clear_inner)):
+                bm.faces.new(piece)
+
+    # Vertices left without faces on a cleared side go too
+    for v in verts:
+        s = sides[id(v)]
+        if v.is_valid and not v.link_faces and ((s > 0 and clear_outer) or (s < 0 and clear_inner)):
+            bm.verts.remove(v)
+    return {"geom_cut": cut,
+            "geom": [v for v in verts if v.is_valid] + [f for f in bm.faces if f.is_valid]}
+
+
+def _remove_doubles(bm, verts=(), dist=0.0001):
+    # Bucket by grid cell so each vertex only meets its neighbours
+    cell = max(dist, 1e-12)
+    buckets = {}
+    targets = {}
+    for v in verts:
+        key = tuple(int(math.floor(c / cell)) for c in v.co)
+        match = None
+        for dx in (-1, 0, 1):
+            for dy in (-1, 0, 1):
+                for dz in (-1, 0, 1):
+                    for other in buckets.get((key[0] + dx, key[1] + dy, key[2] + dz), ()):
+                        if (other.co - v.co).length <= dist:
+                            match = other
+                            break
+                    if match:
+                        break
+                if match:
+                    break
+            if match:
+                break
+        if match is None:
+            buckets.setdefault(key, []).append(v)
+        else:
+            targets[id(v)] = (v, match)
+
+    for v, target in targets.values():
+        for face in list(v.link_faces):
+            bm._replace_face(face, [target if u is v else u for u in face.verts])
+        bm.verts.remove(v)
+    return {}
+
+
+def _delete(bm, geom=(), context="VERTS"):
+    verts, faces = _sorted_geom(geom)
+    if context == "VERTS":
+        for v in verts:
+            if v.is_valid:
+                bm.verts.remove(v)
+        return {}
+    if context not in ("FACES", "FACES_ONLY"):
+        raise ValueError(f"bmesh.ops.delete: context {context!r} is not supported by the stub")
+    for face in faces:
+        if face.is_valid:
+            bm.faces.remove(face)
+    if context == "FACES":
+        # Vertices no face uses any more go too; edges only exist through faces here
+        for v in {id(v): v for face in faces for v in face.verts}.values():
+            if v.is_valid and not v.link_faces:
+                bm.verts.remove(v)
+    return {}
+
+
+def _recalc_face_normals(bm, faces=()):
+    unvisited = {id(f): f for f in faces if f.is_valid}
+    while unvisited:
+        # Walk one connected region, matching each face's winding to its neighbour's
+        _, seed = unvisited.popitem()
+        region = [seed]
+        stack = [seed]
+        while stack:
+            face = stack.pop()
+            count = len(face.verts)
+            for i in range(count):
+                a, b = face.verts[i], face.verts[(i + 1) % count]
+                for other in a.link_faces:
+                    if id(other) not in unvisited or b not in other.verts:
+                        continue
+                    # Consistent neighbours run the shared edge the other way
+                    j = other.verts.index(a)
+                    if other.verts[(j + 1) % len(other.verts)] is b:
+                        other.normal_flip()
+                    del unvisited[id(other)]
+                    region.append(other)
+                    stack.append(other)
+
+        # The face furthest from the region's centre must face away from it
+        centre = Vector((0.0, 0.0, 0.0))
+        for face in region:
+            centre += face.calc_center_median()
+        centre = centre / len(region)
+        outer = max(region, key=lambda f: (f.calc_center_median() - centre).length_squared)
+        if outer.normal.dot(outer.calc_center_median() - centre) < 0:
+            for face in region:
+                face.normal_flip()
+    return {}
+
+
+def _solidify(bm, geom=(), thickness=0.0):
+    _, faces = _sorted_geom(geom)
+    # Vertex normals weighted so the shell keeps its thickness at corners
+    normals, weights = {}, {}
+    for face in faces:
+        n = face.normal
+        for v in face.verts:
+            normals[id(v)] = normals.get(id(v), Vector((0.0, 0.0, 0.0))) + n
+    for face in faces:
+        for v in face.verts:
+            no = normals[id(v)].normalized()
+            weights.setdefault(id(v), []).append(max(no.dot(face.normal), 0.1))
+
+    # The shell grows opposite the normals; the inner surface faces inward
+    inner = {}
+    for face in faces:
+        for v in face.verts:
+            if id(v) not in inner:
+                no = normals[id(v)].normalized()
+                shell = len(weights[id(v)]) / sum(weights[id(v)])
+                inner[id(v)] = bm.verts.new(v.co - no * (thickness * shell))
+    edge_faces = {}
+    for face in faces:
+        count = len(face.verts)
+        for i in range(count):
+            a, b = face.verts[i], face.verts[(i + 1) % count]
+            edge_faces.setdefault(frozenset((id(a), id(b))), []).append((a, b))
+    new_faces = [bm.faces.new([inner[id(v)] for v in reversed(face.verts)]) for face in faces]
+    # Close every boundary edge with a rim quad
+    for uses in edge_faces.values():
+        if len(uses) == 1:
+            a, b = uses[0]
+            new_faces.append(bm.faces.new([b, a, inner[id(a)], inner[id(b)]]))
+    return {"geom": list(inner.values()) + new_faces}
+
+
+def _recorded(name, func):
+    """Wrap a bmesh.ops stand-in so CALL_LOG gets its time and small arguments"""
+    def call(bm, **kwargs):
+        # Element lists would swamp the log; keep only settings
+        logged = {k: v for k, v in kwargs.items() if not isinstance(v, list)}
+        return bpy.record(f"bmesh.ops.{name}", lambda **_: func(bm, **kwargs), **logged)
+    return call
+
+
+ops = SimpleNamespace(
+    create_uvsphere=_recorded("create_uvsphere", _create_uvsphere),
+    scale=_recorded("scale", _scale),
+    translate=_recorded("translate", _translate),
+    bisect_plane=_recorded("bisect_plane", _bisect_plane),
+    remove_doubles=_recorded("remove_doubles", _remove_doubles),
+    delete=_recorded("delete", _delete),
+    recalc_face_normals=_recorded("recalc_face_normals", _recalc_face_normals),
+    solidify=_recorded("solidify", _solidify),
+)
+
+types = SimpleNamespace(BMesh=BMesh, BMVert=BMVert, BMEdge=BMEdge, BMFace=BMFace)
@@ -0,0 +1,840 @@
+"""
+Stand-in for Blender's bpy module.
+Implements the subset of bpy the lamp scripts use, with real vertex/face
+storage, and records every operator call along with its wall time in CALL_LOG.
+Modifiers are stored and applied in name only: their geometry is not evaluated.
+"""
+
+import math
+import os
+import struct
+import time
+from types import SimpleNamespace
+
+from mathutils import Vector
+
+# Every recorded call: {"op": ..., "kwargs": ..., "seconds": ..., "ok": ...}
+CALL_LOG = []
+
+# When set, exporters write into this directory instead of the requested path
+EXPORT_DIR = None
+
+# Files written by the exporters during the current run
+EXPORTS = []
+
+app = SimpleNamespace(
+    version=(4, 0, 0),
+    version_string="4.0.0 (stub)",
+    background=True,
+    binary_path="",
+)
+
+
+def record(op, func, /, *args, **kwargs):
+    """Run func, appending its name, arguments and wall time to CALL_LOG"""
+    start = time.perf_counter()
+    ok = False
+    try:
+        result = func(*args, **kwargs)
+        ok = True
+        return result
+    finally:
+        CALL_LOG.append({
+            "op": op,
+            "kwargs": kwargs,
+            "seconds": time.perf_counter() - start,
+            "ok": ok,
+        })
+
+
+# ---------------------------------------------------------------------------
+# Property collections
+# ---------------------------------------------------------------------------
+
+class PropCollection(list):
+    """List of RNA-like items supporting foreach_get/foreach_set"""
+
+    def foreach_get(self, attr, seq):
+        values = []
+        for item in self:
+            value = getattr(item, attr)
+            if isinstance(value, (Vector, tuple, list)):
+                values.extend(value)
+            else:
+                values.append(value)
+        if len(seq) != len(values):
+            raise RuntimeError(
+                f"foreach_get('{attr}', sequence): size mismatch, "
+                f"expected {len(values)}, got {len(seq)}")
+        seq[:] = values
+
+    def foreach_set(self, attr, seq):
+        seq = list(seq)
+        if not self:
+            return
+        sample = getattr(self[0], attr)
+        width = len(sample) if isinstance(sample, (Vector, tuple, list)) else 1
+        if len(seq) != width * len(self):
+            raise RuntimeError(
+                f"foreach_set('{attr}', sequence): size mismatch, "
+                f"expected {width * len(self)}, got {len(seq)}")
+        for i, item in enumerate(self):
+            if width == 1:
+                setattr(item, attr, type(sample)(seq[i]))
+            else:
+                setattr(item, attr, Vector(seq[i * width:(i + 1) * width]))
+
+
+class NamedCollection(PropCollection):
+    """PropCollection also addressable by item name, like bpy.data.*"""
+
+    def __getitem__(self, key):
+        if isinstance(key, str):
+            for item in self:
+                if item.name == key:
+                    return item
+            raise KeyError(f'bpy_prop_collection[key]: key "{key}" not found')
+        return list.__getitem__(self, key)
+
+    def __contains__(self, key):
+        if isinstance(key, str):
+            return any(item.name == key for item in self)
+        return list.__contains__(self, key)
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def unique_name(self, name):
+        """Return name, suffixed .001, .002... if already taken"""
+        if name not in self:
+            return name
+        i = 1
+        while f"{name}.{i:03d}" in self:
+            i += 1
+        return f"{name}.{i:03d}"
+
+
+# ---------------------------------------------------------------------------
+# Mesh data
+# ---------------------------------------------------------------------------
+
+class MeshVertex:
+    def __init__(self, co, index):
+        self.co = Vector(co)
+        self.index = index
+        self.select = False
+
+    @property
+    def co(self):
+        return self._co
+
+    @co.setter
+    def co(self, value):
+        self._co = value if isinstance(value, Vector) else Vector(value)
+
+
+class MeshEdge:
+    def __init__(self, vertices, index):
+        self.vertices = tuple(vertices)
+        self.index = index
+        self.select = False
+
+
+class MeshPolygon:
+    def __init__(self, mesh, vertices, index):
+        self._mesh = mesh
+        self.vertices = tuple(vertices)
+        self.index = index
+        self.select = False
+        self.use_smooth = False
+
+    @property
+    def loop_total(self):
+        return len(self.vertices)
+
+    @property
+    def normal(self):
+        # Newell's method, robust for planar n-gons
+        verts = self._mesh.vertices
+        nx = ny = nz = 0.0
+        count = len(self.vertices)
+        for i in range(count):
+            a = verts[self.vertices[i]].co
+            b = verts[self.vertices[(i + 1) % count]].co
+            nx += (a.y - b.y) * (a.z + b.z)
+            ny += (a.z - b.z) * (a.x + b.x)
+            nz += (a.x - b.x) * (a.y + b.y)
+        return Vector((nx, ny, nz)).normalized()
+
+    @property
+    def center(self):
+        verts = self._mesh.vertices
+        total = Vector((0.0, 0.0, 0.0))
+        for i in self.vertices:
+            total += verts[i].co
+        return total / len(self.vertices)
+
+
+class MeshLoop:
+    def __init__(self, vertex_index, index):
+        self.vertex_index = vertex_index
+        self.index = index
+
+
+class MeshLoopTriangle:
+    def __init__(self, vertices, polygon_index, index):
+        self.vertices = tuple(vertices)
+        self.polygon_index = polygon_index
+        self.index = index
+
+
+def _euler_matrix(rotation):
+    """Rows of the rotation matrix for an XYZ Euler (X applied first, then Y, then Z)"""
+    cx, cy, cz = (math.cos(a) for a in rotation)
+    sx, sy, sz = (math.sin(a) for a in rotation)
+    return ((cy * cz, sx * sy * cz - cx * sz, cx * sy * cz + sx * sz),
+            (cy * sz, sx * sy * sz + cx * cz, cx * sy * sz - sx * cz),
+            (-sy, sx * cy, cx * cy))
+
+
+def _transform(co, scale, rotation, offset):
+    """Scale, then rotate by an XYZ Euler, then translate a point, as Blender's world matrix does"""
+    p = (co[0] * scale[0], co[1] * scale[1], co[2] * scale[2])
+    if any(rotation):
+        p = tuple(r[0] * p[0] + r[1] * p[1] + r[2] * p[2] for r in _euler_matrix(rotation))
+    return (p[0] + offset[0], p[1] + offset[1], p[2] + offset[2])
+
+
+class Mesh:
+    def __init__(self, name):
+        self.name = name
+        self.vertices = PropCollection()
+        self.polygons = PropCollection()
+        self.loop_triangles = PropCollection()
+        self.materials = []
+        self._edges = None
+
+    # Topology --------------------------------------------------------------
+
+    def from_pydata(self, vertices, edges, faces):
+        self.set_geometry(vertices, faces)
+
+    def set_geometry(self, coords, faces):
+        """Replace all geometry with the given coordinates and faces"""
+        self.vertices = PropCollection(
+            MeshVertex(co, i) for i, co in enumerate(coords))
+        self.polygons = PropCollection(
+            MeshPolygon(self, face, i) for i, face in enumerate(faces))
+        self.loop_triangles = PropCollection()
+        self._edges = None
+
+    def update(self, calc_edges=False):
+        self._edges = None
+
+    def clear_geometry(self):
+        self.set_geometry([], [])
+
+    @property
+    def edges(self):
+        if self._edges is None:
+            seen = {}
+            for poly in self.polygons:
+                count = len(poly.vertices)
+                for i in range(count):
+                    a, b = poly.vertices[i], poly.vertices[(i + 1) % count]
+                    key = (a, b) if a < b else (b, a)
+                    if key not in seen:
+                        seen[key] = MeshEdge(key, len(seen))
+            self._edges = PropCollection(seen.values())
+        return self._edges
+
+    @property
+    def loops(self):
+        loops = PropCollection()
+        for poly in self.polygons:
+            for v in poly.vertices:
+                loops.append(MeshLoop(v, len(loops)))
+        return loops
+
+    def calc_loop_triangles(self):
+        """Fan-triangulate every polygon into loop_triangles"""
+        tris = PropCollection()
+        for poly in self.polygons:
+            v = poly.vertices
+            for i in range(1, len(v) - 1):
+                tris.append(MeshLoopTriangle((v[0], v[i], v[i + 1]), poly.index, len(tris)))
+        self.loop_triangles = tris
+
+    def remove_elements(self, vert_indices=(), poly_indices=()):
+        """Delete vertices (and faces using them) and faces, then reindex"""
+        vert_indices = set(vert_indices)
+        poly_indices = set(poly_indices)
+        faces = [p.vertices for p in self.polygons
+                 if p.index not in poly_indices and not vert_indices.intersection(p.vertices)]
+        if poly_indices and not vert_indices:
+            # Deleting faces also removes vertices only those faces used
+            used = {v for face in faces for v in face}
+            vert_indices = {v.index for v in self.vertices if v.index not in used}
+        remap = {}
+        coords = []
+        for v in self.vertices:
+            if v.index not in vert_indices:
+                remap[v.index] = len(coords)
+                coords.append(v.co)
+        self.set_geometry(coords, [[remap[i] for i in face] for face in faces])
+
+    def transform_coords(self, scale=(1.0, 1.0, 1.0), offset=(0.0, 0.0, 0.0),
+                         rotation=(0.0, 0.0, 0.0)):
+        for v in self.vertices:
+            v.co = Vector(_transform(v.co, scale, rotation, offset))
+
+    def triangles(self):
+        """Return world-independent triangles as lists of coordinate tuples"""
+        result = []
+        for poly in self.polygons:
+            v = [self.vertices[i].co.to_tuple() for i in poly.vertices]
+            for i in range(1, len(v) - 1):
+                result.append((v[0], v[i], v[i + 1]))
+        return result
+
+
+# ---------------------------------------------------------------------------
+# Objects and modifiers
+# ---------------------------------------------------------------------------
+
+MODIFIER_DEFAULTS = {
+    'BEVEL': {"width": 0.1, "segments": 1, "limit_method": 'ANGLE',
+              "angle_limit": math.radians(30), "profile": 0.5},
+    'SOLIDIFY': {"thickness": 0.01, "offset": -1.0},
+    'SUBSURF': {"levels": 1, "render_levels": 2},
+    'DISPLACE': {"texture": None, "strength": 1.0, "mid_level": 0.5},
+}
+
+
+class Modifier:
+    def __init__(self, name, type):
+        self.name = name
+        self.type = type
+        self.show_viewport = True
+        for key, value in MODIFIER_DEFAULTS.get(type, {}).items():
+            setattr(self, key, value)
+
+
+class ModifierStack(NamedCollection):
+    def new(self, name, type):
+        return record("modifiers.new", self._new, name=name, type=type)
+
+    def _new(self, name, type):
+        modifier = Modifier(self.unique_name(name), type)
+        self.append(modifier)
+        return modifier
+
+
+class Object:
+    def __init__(self, name, data):
+        self.name = name
+        self.data = data
+        self.type = 'MESH' if isinstance(data, Mesh) else 'EMPTY'
+        self.location = (0.0, 0.0, 0.0)
+        self.rotation_euler = (0.0, 0.0, 0.0)
+        self.scale = (1.0, 1.0, 1.0)
+        self.modifiers = ModifierStack()
+        self._select = False
+
+    def _vector_property(attr):
+        def getter(self):
+            return getattr(self, attr)
+
+        def setter(self, value):
+            setattr(self, attr, Vector(value))
+
+        return property(getter, setter)
+
+    location = _vector_property("_location")
+    rotation_euler = _vector_property("_rotation_euler")
+    scale = _vector_property("_scale")
+    del _vector_property
+
+    def select_set(self, state):
+        self._select = bool(state)
+
+    def select_get(self):
+        return self._select
+
+    def world_triangles(self):
+        """Triangles of the object's mesh with scale, rotation and location applied"""
+        s, rot, loc = tuple(self.scale), tuple(self.rotation_euler), tuple(self.location)
+        return [tuple(_transform(c, s, rot, loc) for c in tri)
+                for tri in self.data.triangles()]
+
+
+# ---------------------------------------------------------------------------
+# Materials and textures
+# ---------------------------------------------------------------------------
+
+class NodeSocket:
+    def __init__(self, name, default_value):
+        self.name = name
+        self.default_value = default_value
+
+
+class Node:
+    def __init__(self, name, inputs):
+        self.name = name
+        self.inputs = NamedCollection(NodeSocket(k, v) for k, v in inputs)
+
+
+PRINCIPLED_INPUTS = [
+    ("Base Color", (0.8, 0.8, 0.8, 1.0)),
+    ("Metallic", 0.0),
+    ("Roughness", 0.5),
+    ("IOR", 1.45),
+    ("Alpha", 1.0),
+    ("Transmission Weight", 0.0),
+]
+
+
+class Material:
+    def __init__(self, name):
+        self.name = name
+        self.use_nodes = False
+        self.node_tree = SimpleNamespace(nodes=NamedCollection([
+            Node("Principled BSDF", PRINCIPLED_INPUTS),
+            Node("Material Output", []),
+        ]))
+
+
+class Texture:
+    def __init__(self, name, type):
+        self.name = name
+        self.type = type
+
+
+# ---------------------------------------------------------------------------
+# bpy.data and bpy.context
+# ---------------------------------------------------------------------------
+
+class DataCollection(NamedCollection):
+    def __init__(self, factory):
+        super().__init__()
+        self._factory = factory
+
+    def new(self, name, *args, **kwargs):
+        item = self._factory(self.unique_name(name), *args, **kwargs)
+        self.append(item)
+        return item
+
+    def remove(self, item, do_unlink=True):
+        list.remove(self, item)
+        if isinstance(item, Object):
+            scene_objects = context.scene.collection.objects
+            if item in scene_objects:
+                list.remove(scene_objects, item)
+
+
+class SceneObjects(NamedCollection):
+    def link(self, obj):
+        if obj in self:
+            raise RuntimeError(f"Object '{obj.name}' already in collection")
+        self.append(obj)
+
+    def unlink(self, obj):
+        list.remove(self, obj)
+
+
+class _ViewLayerProxy(SceneObjects):
+    """View layer objects mirroring the scene collection, with an active slot"""
+
+    def __init__(self, scene_objects):
+        super().__init__()
+        self._scene_objects = scene_objects
+        self.active = None
+
+    def __iter__(self):
+        return iter(self._scene_objects)
+
+    def __len__(self):
+        return len(self._scene_objects)
+
+
+class Context:
+    def __init__(self):
+        self.scene = SimpleNamespace(
+            name="Scene",
+            unit_settings=SimpleNamespace(system='METRIC', scale_length=1.0,
+                                          length_unit='METERS'),
+            collection=SimpleNamespace(objects=SceneObjects()),
+        )
+        self.collection = self.scene.collection
+        self.view_layer = SimpleNamespace(
+            objects=_ViewLayerProxy(self.scene.collection.objects))
+        self.preferences = SimpleNamespace(addons={})
+        self.mode = 'OBJECT'
+        # Mesh select mode used by edit-mode operators
+        self.select_mode = 'VERT'
+
+    @property
+    def active_object(self):
+        return self.view_layer.objects.active
+
+    @property
+    def object(self):
+        return self.view_layer.objects.active
+
+    @property
+    def selected_objects(self):
+        return [obj for obj in self.scene.collection.objects if obj.select_get()]
+
+
+def reset(export_dir=None):
+    """Start a fresh, empty session as if Blender had just launched"""
+    global context, data, EXPORT_DIR
+    CALL_LOG.clear()
+    EXPORTS.clear()
+    EXPORT_DIR = export_dir
+    context = Context()
+    data = SimpleNamespace(
+        meshes=DataCollection(Mesh),
+        objects=DataCollection(Object),
+        materials=DataCollection(Material),
+        textures=DataCollection(Texture),
+    )
+
+
+# ---------------------------------------------------------------------------
+# Operators
+# ---------------------------------------------------------------------------
+
+OPERATORS = {}
+
+
+def operator(idname):
+    """Register a stub implementation for bpy.ops.<idname>"""
+    def decorator(func):
+        OPERATORS[idname] = func
+        return func
+    return decorator
+
+
+class _Operator:
+    def __init__(self, idname):
+        self.idname = idname
+
+    def __call__(self, *args, **kwargs):
+        func = OPERATORS.get(self.idname)
+        if func is None:
+            CALL_LOG.append({"op": self.idname, "kwargs": kwargs, "seconds": 0.0, "ok": False})
+            raise AttributeError(
+                f'Calling operator "bpy.ops.{self.idname}" error, could not be found')
+        record(self.idname, func, **kwargs)
+        return {'FINISHED'}
+
+    def poll(self):
+        return self.idname in OPERATORS
+
+    def __repr__(self):
+        return f"bpy.ops.{self.idname}()"
+
+
+class _OperatorModule:
+    def __init__(self, name):
+        self._name = name
+
+    def __getattr__(self, name):
+        if name.startswith("__"):
+            raise AttributeError(name)
+        return _Operator(f"{self._name}.{name}")
+
+
+class _Ops:
+    def __getattr__(self, name):
+        if name.startswith("__"):
+            raise AttributeError(name)
+        return _OperatorModule(name)
+
+
+ops = _Ops()
+
+
+def _active_mesh():
+    obj = context.view_layer.objects.active
+    if obj is None or not isinstance(obj.data, Mesh):
+        raise RuntimeError("Operator requires an active mesh object")
+    return obj.data
+
+
+def _apply_select(items, action, get, set_):
+    if action == 'TOGGLE':
+        action = 'DESELECT' if any(get(i) for i in items) else 'SELECT'
+    for item in items:
+        if action == 'SELECT':
+            set_(item, True)
+        elif action == 'DESELECT':
+            set_(item, False)
+        elif action == 'INVERT':
+            set_(item, not get(item))
+
+
+def _set_select(item, state):
+    item.select = state
+
+
+def _link_new_object(name, mesh, location):
+    obj = data.objects.new(name, mesh)
+    context.scene.collection.objects.link(obj)
+    obj.location = location
+    for other in context.scene.collection.objects:
+        other.select_set(False)
+    obj.select_set(True)
+    context.view_layer.objects.active = obj
+    return obj
+
+
+@operator("object.select_all")
+def _object_select_all(action='TOGGLE'):
+    _apply_select(list(context.scene.collection.objects), action,
+                  lambda o: o.select_get(), lambda o, s: o.select_set(s))
+
+
+@operator("object.delete")
+def _object_delete(use_global=False, confirm=True):
+    for obj in context.selected_objects:
+        data.objects.remove(obj)
+        if context.view_layer.objects.active is obj:
+            context.view_layer.objects.active = None
+
+
+@operator("object.mode_set")
+def _object_mode_set(mode='OBJECT', toggle=False):
+    if mode != 'OBJECT':
+        _active_mesh()
+    context.mode = 'EDIT_MESH' if mode == 'EDIT' else mode
+
+
+@operator("object.shade_smooth")
+def _object_shade_smooth(**kwargs):
+    for obj in context.selected_objects:
+        if isinstance(obj.data, Mesh):
+            for poly in obj.data.polygons:
+                poly.use_smooth = True
+
+
+@operator("object.transform_apply")
+def _object_transform_apply(location=True, rotation=True, scale=True, **kwargs):
+    for obj in context.selected_objects:
+        if not isinstance(obj.data, Mesh):
+            continue
+        s = tuple(obj.scale) if scale else (1.0, 1.0, 1.0)
+        rot = tuple(obj.rotation_euler) if rotation else (0.0, 0.0, 0.0)
+        loc = tuple(obj.location) if location else (0.0, 0.0, 0.0)
+        obj.data.transform_coords(scale=s, offset=loc, rotation=rot)
+        if scale:
+            obj.scale = (1.0, 1.0, 1.0)
+        if rotation:
+            obj.rotation_euler = (0.0, 0.0, 0.0)
+        if location:
+            obj.location = (0.0, 0.0, 0.0)
+
+
+@operator("object.join")
+def _object_join():
+    target = context.view_layer.objects.active
+    if target is None or not isinstance(target.data, Mesh):
+        raise RuntimeError("Active object is not a selected mesh")
+    coords = [v.co for v in target.data.vertices]
+    faces = [list(p.vertices) for p in target.data.polygons]
+    ts, tl = target.scale, target.location
+    for obj in context.selected_objects:
+        if obj is target or not isinstance(obj.data, Mesh):
+            continue
+        base = len(coords)
+        for v in obj.data.vertices:
+            world = Vector((v.co.x * obj.scale.x + obj.location.x,
+                            v.co.y * obj.scale.y + obj.location.y,
+                            v.co.z * obj.scale.z + obj.location.z))
+            coords.append(Vector(((world.x - tl.x) / ts.x,
+                                  (world.y - tl.y) / ts.y,
+                                  (world.z - tl.z) / ts.z)))
+        faces.extend([i + base for i in p.vertices] for p in obj.data.polygons)
+        data.objects.remove(obj)
+    target.data.set_geometry(coords, faces)
+
+
+@operator("object.modifier_add")
+def _object_modifier_add(type):
+    obj = context.view_layer.objects.active
+    obj.modifiers._new(type.title().replace("_", " "), type)
+
+
+@operator("object.modifier_apply")
+def _object_modifier_apply(modifier, **kwargs):
+    obj = context.view_layer.objects.active
+    list.remove(obj.modifiers, obj.modifiers[modifier])
+
+
+@operator("mesh.select_all")
+def _mesh_select_all(action='TOGGLE'):
+    mesh = _active_mesh()
+    items = list(mesh.vertices) + list(mesh.polygons)
+    _apply_select(items, action, lambda i: i.select, _set_select)
+
+
+@operator("mesh.select_mode")
+def _mesh_select_mode(type='VERT', **kwargs):
+    context.select_mode = type
+
+
+@operator("mesh.delete")
+def _mesh_delete(type='VERT'):
+    mesh = _active_mesh()
+    if type == 'VERT':
+        mesh.remove_elements(vert_indices=[v.index for v in mesh.vertices if v.select])
+    elif type == 'FACE':
+        mesh.remove_elements(poly_indices=[p.index for p in mesh.polygons if p.select])
+    else:
+        raise ValueError(f"mesh.delete: unsupported type {type!r}")
+
+
+@operator("mesh.subdivide")
+def _mesh_subdivide(number_cuts=1, **kwargs):
+    # Recorded only: edge subdivision is not reproduced by the stub
+    _active_mesh()
+
+
+@operator("transform.translate")
+def _transform_translate(value=(0.0, 0.0, 0.0), **kwargs):
+    if context.mode != 'EDIT_MESH':
+        for obj in context.selected_objects:
+            obj.location = obj.location + Vector(value)
+        return
+    for v in _active_mesh().vertices:
+        if v.select:
+            v.co = v.co + Vector(value)
+
+
+@operator("mesh.primitive_cube_add")
+def _primitive_cube_add(size=2.0, location=(0.0, 0.0, 0.0), **kwargs):
+    h = size / 2
+    coords = [(-h, -h, -h), (-h, -h, h), (-h, h, -h), (-h, h, h),
+              (h, -h, -h), (h, -h, h), (h, h, -h), (h, h, h)]
+    faces = [(0, 1, 3, 2), (2, 3, 7, 6), (6, 7, 5, 4),
+             (4, 5, 1, 0), (2, 6, 4, 0), (7, 3, 1, 5)]
+    mesh = data.meshes.new("Cube")
+    mesh.set_geometry(coords, faces)
+    _link_new_object("Cube", mesh, location)
+
+
+@operator("mesh.primitive_cylinder_add")
+def _primitive_cylinder_add(vertices=32, radius=1.0, depth=2.0, end_fill_type='NGON',
+                            location=(0.0, 0.0, 0.0), **kwargs):
+    h = depth / 2
+    coords = []
+    for i in range(vertices):
+        angle = 2 * math.pi * i / vertices
+        x, y = radius * math.cos(angle), radius * math.sin(angle)
+        coords.append((x, y, -h))
+        coords.append((x, y, h))
+    faces = [(2 * i, 2 * i + 1, 2 * ((i + 1) % vertices) + 1, 2 * ((i + 1) % vertices))
+             for i in range(vertices)]
+    if end_fill_type == 'NGON':
+        faces.append(tuple(2 * i + 1 for i in range(vertices)))
+        faces.append(tuple(2 * i for i in reversed(range(vertices))))
+    elif end_fill_type == 'TRIFAN':
+        bottom, top = len(coords), len(coords) + 1
+        coords += [(0.0, 0.0, -h), (0.0, 0.0, h)]
+        for i in range(vertices):
+            j = (i + 1) % vertices
+            faces.append((top, 2 * i + 1, 2 * j + 1))
+            faces.append((bottom, 2 * j, 2 * i))
+    mesh = data.meshes.new("Cylinder")
+    mesh.set_geometry(coords, faces)
+    _link_new_object("Cylinder", mesh, location)
+
+
+@operator("mesh.primitive_ico_sphere_add")
+def _primitive_ico_sphere_add(subdivisions=2, radius=1.0, location=(0.0, 0.0, 0.0), **kwargs):
+    t = (1.0 + math.sqrt(5.0)) / 2.0
+    coords = [(-1, t, 0), (1, t, 0), (-1, -t, 0), (1, -t, 0),
+              (0, -1, t), (0, 1, t), (0, -1, -t), (0, 1, -t),
+              (t, 0, -1), (t, 0, 1), (-t, 0, -1), (-t, 0, 1)]
+    faces = [(0, 11, 5), (0, 5, 1), (0, 1, 7), (0, 7, 10), (0, 10, 11),
+             (1, 5, 9), (5, 11, 4), (11, 10, 2), (10, 7, 6), (7, 1, 8),
+             (3, 9, 4), (3, 4, 2), (3, 2, 6), (3, 6, 8), (3, 8, 9),
+             (4, 9, 5), (2, 4, 11), (6, 2, 10), (8, 6, 7), (9, 8, 1)]
+    coords = [Vector(c).normalized() for c in coords]
+    # Blender's subdivisions count includes the base icosahedron
+    for _ in range(max(subdivisions - 1, 0)):
+        midpoints = {}
+
+        def midpoint(a, b):
+            key = (a, b) if a < b else (b, a)
+            if key not in midpoints:
+                coords.append(((coords[a] + coords[b]) / 2).normalized())
+                midpoints[key] = len(coords) - 1
+            return midpoints[key]
+
+        new_faces = []
+        for a, b, c in faces:
+            ab, bc, ca = midpoint(a, b), midpoint(b, c), midpoint(c, a)
+            new_faces += [(a, ab, ca), (b, bc, ab), (c, ca, bc), (ab, bc, ca)]
+        faces = new_faces
+    mesh = data.meshes.new("Icosphere")
+    mesh.set_geometry([c * radius for c in coords], faces)
+    _link_new_object("Icosphere", mesh, location)
+
+
+def _write_stl(filepath, objects, ascii=False, name="Stub"):
+    if EXPORT_DIR is not None:
+        os.makedirs(EXPORT_DIR, exist_ok=True)
+        filepath = os.path.join(EXPORT_DIR, os.path.basename(filepath))
+    elif not os.path.isdir(os.path.dirname(os.path.abspath(filepath))):
+        raise RuntimeError(f"Cannot open file '{filepath}' for writing")
+
+    triangles = [tri for obj in objects if isinstance(obj.data, Mesh)
+                 for tri in obj.world_triangles()]
+
+    def normal(tri):
+        a, b, c = (Vector(p) for p in tri)
+        return tuple((b - a).cross(c - a).normalized())
+
+    if ascii:
+        with open(filepath, "w") as f:
+            f.write(f"solid {name}\n")
+            for tri in triangles:
+                f.write("  facet normal {} {} {}\n    outer loop\n".format(*normal(tri)))
+                for p in tri:
+                    f.write("      vertex {} {} {}\n".format(*p))
+                f.write("    endloop\n  endfacet\n")
+            f.write(f"endsolid {name}\n")
+    else:
+        with open(filepath, "wb") as f:
+            f.write(b"Blender stub STL".ljust(80, b"\0"))
+            f.write(struct.pack("<I", len(triangles)))
+            for tri in triangles:
+                f.write(struct.pack("<12fH", *normal(tri), *tri[0], *tri[1], *tri[2], 0))
+    EXPORTS.append(filepath)
+
+
+@operator("wm.stl_export")
+def _wm_stl_export(filepath, export_selected_objects=False, ascii_format=False, **kwargs):
+    objects = (context.selected_objects if export_selected_objects
+               else list(context.scene.collection.objects))
+    _write_stl(filepath, objects, ascii=ascii_format)
+
+
+@operator("export_mesh.stl")
+def _export_mesh_stl(filepath, use_selection=False, ascii=False, **kwargs):
+    objects = (context.selected_objects if use_selection
+               else list(context.scene.collection.objects))
+    _write_stl(filepath, objects, ascii=ascii)
+
+
+@operator("preferences.addon_enable")
+def _preferences_addon_enable(module):
+    context.preferences.addons[module] = SimpleNamespace(module=module)
+
+
+reset()
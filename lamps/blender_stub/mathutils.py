@@ -0,0 +1,121 @@
+"""
+Stand-in for Blender's mathutils module.
+Only Vector is provided, with the operations the lamp scripts rely on.
+"""
+
+import math
+
+
+class Vector:
+    """Mutable 2D/3D/4D vector with the attribute access of mathutils.Vector"""
+
+    __slots__ = ("_data",)
+
+    def __init__(self, seq=(0.0, 0.0, 0.0)):
+        self._data = [float(v) for v in seq]
+
+    # Component access
+    def _get(index):
+        def getter(self):
+            return self._data[index]
+
+        def setter(self, value):
+            self._data[index] = float(value)
+
+        return property(getter, setter)
+
+    x = _get(0)
+    y = _get(1)
+    z = _get(2)
+    w = _get(3)
+    del _get
+
+    def __len__(self):
+        return len(self._data)
+
+    def __iter__(self):
+        return iter(self._data)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return Vector(self._data[index])
+        return self._data[index]
+
+    def __setitem__(self, index, value):
+        self._data[index] = float(value)
+
+    def __repr__(self):
+        return "Vector((" + ", ".join(f"{v:.4f}" for v in self._data) + "))"
+
+    def __eq__(self, other):
+        try:
+            return self._data == [float(v) for v in other]
+        except TypeError:
+            return NotImplemented
+
+    __hash__ = None
+
+    # Arithmetic
+    def __add__(self, other):
+        return Vector(a + b for a, b in zip(self._data, other))
+
+    __radd__ = __add__
+
+    def __sub__(self, other):
+        return Vector(a - b for a, b in zip(self._data, other))
+
+    def __rsub__(self, other):
+        return Vector(b - a for a, b in zip(self._data, other))
+
+    def __mul__(self, scalar):
+        return Vector(a * scalar for a in self._data)
+
+    __rmul__ = __mul__
+
+    def __truediv__(self, scalar):
+        return Vector(a / scalar for a in self._data)
+
+    def __neg__(self):
+        return Vector(-a for a in self._data)
+
+    def __iadd__(self, other):
+        self._data = [a + b for a, b in zip(self._data, other)]
+        return self
+
+    def __isub__(self, other):
+        self._data = [a - b for a, b in zip(self._data, other)]
+        return self
+
+    # Vector operations
+    def copy(self):
+        return Vector(self._data)
+
+    def to_tuple(self, precision=-1):
+        if precision < 0:
+            return tuple(self._data)
+        return tuple(round(v, precision) for v in self._data)
+
+    def dot(self, other):
+        return sum(a * b for a, b in zip(self._data, other))
+
+    def cross(self, other):
+        ax, ay, az = self._data[:3]
+        bx, by, bz = list(other)[:3]
+        return Vector((ay * bz - az * by, az * bx - ax * bz, ax * by - ay * bx))
+
+    @property
+    def length(self):
+        return math.sqrt(sum(a * a for a in self._data))
+
+    @property
+    def length_squared(self):
+        return sum(a * a for a in self._data)
+
+    def normalized(self):
+        length = self.length
+        if length == 0.0:
+            return Vector([0.0] * len(self._data))
+        return self / length
+
+    def normalize(self):
+        self._data = list(self.normalized())
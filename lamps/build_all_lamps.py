@@ -5,29 +5,61 @@ This script automatically detects and runs lamp generation scripts in Blender to
 Only regenerates STLs for files that have changed since last run.
 """
 
+import argparse
 import os
 import subprocess
-import platform
 import sys
 import hashlib
 import json
 import re
+import tempfile
+import time
 from datetime import datetime
 
+try:
+    import resource
+except ImportError:  # Windows has no rlimits
+    resource = None
+
+from build_report import load_report, save_report, update_artifact
+from design_tree import discover_families
+from post_build import register_analyzer, run_analyzers
+from shared_cache import (acquire_lock, entry_key, fetch_entry, publish_entry,
+                          release_lock, source_digest)
+from supervisor import (KILLED, OK, RETRYABLE, TIMEOUT, describe, install_signal_handlers,
+                        supervise)
+from toolchain import load_toolchain, toolchain_env
+
+try:
+    from plate_packing import parse_bed
+except ImportError:  # Without NumPy --pack-plates is skipped, so any text will do
+    parse_bed = str
+
 # Cache file to store file hashes
 HASH_CACHE_FILE = ".lamp_build_cache.json"
 
-# Patterns for identifying lamp scripts and extracting STL names
-LAMP_SCRIPT_PATTERN = r"^(lamp_.*|.*_lamp_.*|simple_.*lamp.*)\.py$"
-BASE_SCRIPT_NAME = "lamp_base.py"  # Special case for the base
+# Subdirectory of STLs/ holding packed build plates
+PLATES_DIR = "plates"
+
+# Subdirectory of STLs/ holding each script's operator profile
+PROFILES_DIR = "profiles"
+
+# Log in STLs/ with one JSON line per Blender run and its resource usage
+RESOURCE_LOG = "resource_history.jsonl"
 
-def find_lamp_scripts(directory):
-    """Find all lamp-related Python scripts in the given directory"""
-    scripts = []
-    for filename in os.listdir(directory):
-        if filename.endswith('.py') and (re.match(LAMP_SCRIPT_PATTERN, filename) or filename == BASE_SCRIPT_NAME):
-            scripts.append(filename)
-    return sorted(scripts)
+# Post-build analyzers, run in parallel on new or changed STLs. The wall
+# thickness check stays a stage of its own since it also writes a map file.
+register_analyzer("material", "mesh_stats:analyze_stl", version=1,
+                  settings=lambda args: {"density": args.filament_density,
+                                         "diameter": args.filament_diameter,
+                                         "cost_per_kg": args.filament_cost})
+register_analyzer("overhangs", "overhang_analysis:analyze_stl", version=1,
+                  settings=lambda args: {"angle": args.overhang_angle})
+register_analyzer("validity", "mesh_check:check_stl", version=1,
+                  enabled=lambda args: args.check_mesh)
+register_analyzer("layers", "layer_slicer:slice_stl", version=1,
+                  settings=lambda args: {"layer_height": args.layer_height, "nozzle": args.nozzle},
+                  enabled=lambda args: args.slice)
 
 def determine_stl_filename(script_path):
     """Parse the script to find the STL output filename or derive from script name"""
@@ -36,7 +68,7 @@ def determine_stl_filename(script_path):
         with open(script_path, 'r') as file:
             content = file.read()
             # Look for export filepath definition in the script
-            match = re.search(r'export_filepath\s*=.*?[\'"].*?\/([^\/]+\.stl)[\'"]', content, re.DOTALL)
+            match = re.search(r'export_filepath\s*=\s*[\'"][^\'"]*?\/([^\/\'"]+\.stl)[\'"]', content)
             if match:
                 return match.group(1)
     except (IOError, UnicodeDecodeError):
@@ -73,6 +105,14 @@ def calculate_file_hash(file_path):
     except IOError:
         return None
 
+def geometry_fingerprint(stl_path):
+    """Hash of an STL's geometry, ignoring headers and triangle order where NumPy is available"""
+    try:
+        from mesh_io import geometry_hash, read_stl
+    except ImportError:
+        return calculate_file_hash(stl_path)
+    return geometry_hash(read_stl(stl_path))
+
 def load_hash_cache(cache_path):
     """Load the hash cache from disk"""
     if os.path.exists(cache_path):
@@ -93,47 +133,48 @@ def save_hash_cache(cache_path, cache_data):
         print(f"Warning: Could not save hash cache to {cache_path}")
         return False
 
-def find_blender_path():
-    """Find the Blender executable path based on OS"""
-    system = platform.system()
-    
-    if system == "Darwin":  # macOS
-        # Common macOS Blender paths
-        possible_paths = [
-            "/Applications/Blender.app/Contents/MacOS/Blender",
-            os.path.expanduser("~/Applications/Blender.app/Contents/MacOS/Blender"),
-            # Blender 4.0
-            "/Applications/Blender.app/Contents/MacOS/blender",
-            os.path.expanduser("~/Applications/Blender.app/Contents/MacOS/blender"),
-        ]
-    elif system == "Windows":
-        # Common Windows Blender paths
-        possible_paths = [
-            r"C:\Program Files\Blender Foundation\Blender\blender.exe",
-            r"C:\Program Files\Blender Foundation\Blender 4.0\blender.exe",
-        ]
-    else:  # Linux
-        # Try using the system blender
-        possible_paths = [
-            "/usr/bin/blender",
-            "/usr/local/bin/blender",
-        ]
-    
-    for path in possible_paths:
-        if os.path.exists(path):
-            return path
-    
-    # If we can't find Blender, ask the user
-    print("Could not automatically find Blender executable.")
-    manual_path = input("Please enter the full path to your Blender executable: ")
-    
-    if os.path.exists(manual_path):
-        return manual_path
-    else:
-        raise FileNotFoundError(f"Could not find Blender executable at {manual_path}")
+def cache_key(script_path, root):
+    """Hash cache key of a script: its path from the tree root"""
+    return os.path.relpath(script_path, root).replace(os.sep, "/")
+
+def migrate_hash_cache(cache_data, builder_dir, root):
+    """Re-key entries from caches that only knew the builder's own directory"""
+    migrated = {}
+    for key, entry in cache_data.items():
+        if "/" not in key and os.path.exists(os.path.join(builder_dir, key)):
+            key = cache_key(os.path.join(builder_dir, key), root)
+        migrated[key] = entry
+    return migrated
 
-def run_blender_script(blender_path, script_path):
-    """Run a Python script in Blender headless mode"""
+def _limit_address_space(limit_bytes):
+    """preexec_fn capping the child's address space before Blender starts"""
+    def apply():
+        resource.setrlimit(resource.RLIMIT_AS, (limit_bytes, limit_bytes))
+    return apply
+
+def _resource_usage(rusage):
+    """CPU times, peak RSS and bytes written from a child's rusage"""
+    # ru_maxrss is in kilobytes on Linux but bytes on macOS
+    rss_bytes = rusage.ru_maxrss * (1 if sys.platform == "darwin" else 1024)
+    return {
+        "user_seconds": rusage.ru_utime,
+        "system_seconds": rusage.ru_stime,
+        "peak_rss_mb": rss_bytes / 2**20,
+        # Output blocks are counted in 512-byte units
+        "written_mb": rusage.ru_oublock * 512 / 2**20,
+    }
+
+def run_blender_script(blender_path, script_path, env=None, usage=None, memory_limit_mb=None,
+                       timeout=None, deadline=None, policy=None):
+    """Run a Python script in Blender headless mode, with extra environment variables
+
+    The run is supervised: timeout bounds each attempt in seconds, deadline
+    (a time.monotonic() value) bounds the whole build, and policy says which
+    failures to retry. When `usage` is a dict it receives the outcome, attempt
+    count, wall time and, where the OS reports them, CPU times, peak RSS and
+    bytes written. memory_limit_mb caps the child's address space so one
+    runaway design cannot starve the box.
+    """
     abs_script_path = os.path.abspath(script_path)
     
     # Make sure script exists
@@ -144,52 +185,534 @@ def run_blender_script(blender_path, script_path):
     print(f"Running Blender with script: {os.path.basename(script_path)}")
     
     # Run Blender in background mode with the script
+    command = [blender_path, "--background", "--python", abs_script_path]
+    preexec_fn = None
+    if memory_limit_mb and resource is not None:
+        preexec_fn = _limit_address_space(int(memory_limit_mb * 2**20))
     try:
-        process = subprocess.run([
-            blender_path,
-            "--background",  # Run Blender in headless mode
-            "--python", abs_script_path  # Script to execute
-        ], 
-        check=True,
-        capture_output=True,
-        text=True)
-        
-        # Print output
-        print("---- Output ----")
-        print(process.stdout)
-        
-        if process.stderr:
-            print("---- Errors ----")
-            print(process.stderr)
-        
-        return True
-    
-    except subprocess.CalledProcessError as e:
+        result = supervise(command, dict(os.environ, **(env or {})), timeout=timeout,
+                           deadline=deadline, policy=policy, preexec_fn=preexec_fn)
+    except OSError as e:
         print(f"Error running Blender: {e}")
-        if e.stdout:
-            print("---- Output ----")
-            print(e.stdout)
-        if e.stderr:
-            print("---- Errors ----")
-            print(e.stderr)
         return False
 
-def main():
-    # Get the current script's directory
-    script_dir = os.path.dirname(os.path.abspath(__file__))
+    if usage is not None:
+        usage.clear()
+        usage.update(outcome=result["outcome"], attempts=result["attempts"],
+                     wall_seconds=result["wall_seconds"], exit_code=result["exit_code"],
+                     memory_limit_mb=memory_limit_mb)
+        if result["rusage"] is not None:
+            usage.update(_resource_usage(result["rusage"]))
+
+    if result["outcome"] == TIMEOUT:
+        print(f"⏱ Blender {describe(result)}")
+    elif result["outcome"] == KILLED:
+        print(f"💀 Blender {describe(result)}")
+    elif result["outcome"] != OK:
+        print(f"Error running Blender: {describe(result)}")
+        if memory_limit_mb:
+            print(f"(memory limit: {memory_limit_mb:g} MB of address space)")
+    
+    # Print output
+    if result["stdout"]:
+        print("---- Output ----")
+        print(result["stdout"])
     
-    # Change working directory to the script directory
+    if result["stderr"]:
+        print("---- Errors ----")
+        print(result["stderr"])
+    
+    return result["outcome"] == OK
+
+def shared_cache_key(script_path, stl_file, script_env):
+    """Shared cache key of a script's STL: its sources and the toolchain settings"""
+    settings = {k: v for k, v in script_env.items() if k != "LAMP_STL_DIR"}
+    return entry_key(sources=source_digest(script_path), stl=stl_file, env=settings)
+
+def build_with_shared_cache(cache_dir, key, stl_path, build, lock_timeout):
+    """Pull stl_path from the shared cache, or run build() and publish the STL
+
+    Builders of the same key on other machines wait on its lock instead of
+    running Blender again. Returns True if the build succeeded or was pulled.
+    """
+    stl_file = os.path.basename(stl_path)
+    if fetch_entry(cache_dir, key, stl_path):
+        print(f"📥 Pulled {stl_file} from the shared cache")
+        return True
+    try:
+        lock = acquire_lock(cache_dir, key, lock_timeout)
+    except (OSError, TimeoutError) as e:
+        print(f"Warning: Building {stl_file} without the shared cache ({e})")
+        return build()
+    if lock is None:
+        if fetch_entry(cache_dir, key, stl_path):
+            print(f"📥 Pulled {stl_file} from the shared cache once another builder published it")
+            return True
+        return build()
+    try:
+        success = build()
+        if success and os.path.exists(stl_path) and publish_entry(
+                cache_dir, key, stl_path, {"stl": stl_file}):
+            print(f"📤 Published {stl_file} to the shared cache")
+        return success
+    finally:
+        release_lock(lock)
+
+def stale_artifacts(report, stl_files, section, stl_geometry):
+    """Existing STLs with no `section` results for their current geometry"""
+    artifacts = report.get("artifacts", {})
+    return [f for f in stl_files if f in stl_geometry
+            and artifacts.get(f, {}).get(section, {}).get("geometry_hash") != stl_geometry[f]]
+
+def analyzed(report, stl_dir, stl_files, section):
+    """(STL, result) pairs for the existing STLs that have `section` results"""
+    artifacts = report.get("artifacts", {})
+    return [(f, artifacts[f][section]) for f in stl_files
+            if section in artifacts.get(f, {}) and os.path.exists(os.path.join(stl_dir, f))]
+
+def report_materials(stl_dir, stl_files, report):
+    """Print volume, area and filament estimates for each STL"""
+    results = analyzed(report, stl_dir, stl_files, "material")
+    if not results:
+        return
+    print("\nMaterial estimates:")
+    for stl_file, stats in results:
+        filament = stats["filament"]
+        print(f"  {stl_file}: {stats['volume_mm3'] / 1000:.1f} cm³, "
+              f"{filament['grams']:.1f} g, {filament['metres']:.2f} m, "
+              f"cost {filament['cost']:.2f}"
+              + (" (inverted normals)" if stats["inverted"] else ""))
+
+def report_overhangs(stl_dir, stl_files, args, report):
+    """Print overhang area as built and in the best print orientation"""
+    results = analyzed(report, stl_dir, stl_files, "overhangs")
+    if not results:
+        return
+    print(f"\nOverhangs past {args.overhang_angle:g}°:")
+    for stl_file, result in results:
+        as_built, best = result["as_built"], result["best"]
+        line = f"  {stl_file}: {as_built['overhang_mm2']:.0f} mm² as built"
+        if best["overhang_mm2"] < as_built["overhang_mm2"]:
+            line += f", {best['overhang_mm2']:.0f} mm² printed with {best['up']} up"
+        print(line)
+
+def check_printability(stl_dir, stl_files, report):
+    """Print the mesh validity checks; return True if every STL passes"""
+    results = analyzed(report, stl_dir, stl_files, "validity")
+    if not results:
+        return True
+    all_ok = True
+    print("\nPrintability checks:")
+    for stl_file, result in results:
+        if result["ok"]:
+            print(f"✅ {stl_file}: watertight, no self-intersections")
+        else:
+            all_ok = False
+            print(f"❌ {stl_file}: {result['open_edges']} open edges, "
+                  f"{result['nonmanifold_edges']} non-manifold edges, "
+                  f"{result['inconsistent_edges']} flipped edges, "
+                  f"{result['self_intersections']} self-intersections")
+    return all_ok
+
+def check_walls(stl_dir, stl_files, args, stl_geometry):
+    """Map wall thickness per face and record it; return True if no wall is too thin"""
+    try:
+        from wall_thickness import analyze_stl as analyze_walls
+    except ImportError as e:
+        print(f"Warning: Skipping wall thickness checks ({e})")
+        return True
+
+    report = load_report(stl_dir)
+    artifacts = report.get("artifacts", {})
+    stale = set(stale_artifacts(report, stl_files, "walls", stl_geometry))
+    # A different minimum wall invalidates every verdict
+    stale.update(f for f in stl_files
+                 if "walls" in artifacts.get(f, {})
+                 and artifacts[f]["walls"]["min_wall_mm"] != args.min_wall)
+    for stl_file in sorted(stale):
+        result = analyze_walls(os.path.join(stl_dir, stl_file), min_wall=args.min_wall)
+        update_artifact(report, stl_file, "walls",
+                        dict(result, geometry_hash=stl_geometry[stl_file]))
+
+    all_ok = True
+    print(f"\nWall thickness (minimum {args.min_wall:g} mm):")
+    for stl_file in stl_files:
+        result = report["artifacts"].get(stl_file, {}).get("walls")
+        if not result or not os.path.exists(os.path.join(stl_dir, stl_file)):
+            continue
+        if result["ok"]:
+            thinnest = result["thinnest_mm"]
+            print(f"✅ {stl_file}: thinnest wall "
+                  + (f"{thinnest:.2f} mm" if thinnest is not None
+                     else f"over {result['max_distance_mm']:g} mm"))
+        else:
+            all_ok = False
+            print(f"❌ {stl_file}: {result['thin_faces']} faces thinner than {args.min_wall:g} mm "
+                  f"({result['thin_area_mm2']:.0f} mm², thinnest {result['thinnest_mm']:.2f} mm)")
+    save_report(stl_dir, report)
+    return all_ok
+
+def check_assemblies(stl_dir, assemblies, args, stl_geometry):
+    """Check that each shade fits its base and record it; return True if all fit"""
+    try:
+        from assembly_check import check_assembly
+    except ImportError as e:
+        print(f"Warning: Skipping assembly fit checks ({e})")
+        return True
+
+    report = load_report(stl_dir)
+    previous = report.get("assemblies", {})
+    band = [args.min_clearance, args.max_clearance]
+    all_ok = True
+    print(f"\nAssembly fit (clearance {band[0]:g}-{band[1]:g} mm):")
+    for assembly in assemblies:
+        base_file, shade_file, seat_z = assembly["base"], assembly["shade"], assembly["seat_z_mm"]
+        name = f"{shade_file} on {base_file}"
+        base_path = os.path.join(stl_dir, base_file)
+        shade_path = os.path.join(stl_dir, shade_file)
+        if not (os.path.exists(base_path) and os.path.exists(shade_path)):
+            print(f"❌ {name}: missing STL")
+            all_ok = False
+            continue
+        result = previous.get(name)
+        geometry = [stl_geometry.get(base_file), stl_geometry.get(shade_file)]
+        # Re-check when either part changed or the tolerance band moved
+        if (result is None or result.get("geometry_hashes") != geometry
+                or result["clearance_band_mm"] != band or result["seat_z_mm"] != seat_z):
+            result = dict(check_assembly(base_path, shade_path, seat_z, band),
+                          geometry_hashes=geometry)
+            previous[name] = result
+        if result["min_clearance_mm"] is not None:
+            gap = f"{result['min_clearance_mm']:.2f} mm clearance"
+        elif result["locating_faces"]:
+            gap = f"no mating surface within {result['search_radius_mm']:g} mm"
+        else:
+            gap = "seated on the rim only"
+        if result["ok"]:
+            print(f"✅ {name}: {gap}")
+        else:
+            all_ok = False
+            print(f"❌ {name}: {gap}, {result['interference_mm3']:.1f} mm³ interference")
+    report["assemblies"] = previous
+    save_report(stl_dir, report)
+    return all_ok
+
+def pack_plates(stl_dir, stl_files, args, stl_geometry):
+    """Pack the built STLs onto build plates and record the layout in the report"""
+    try:
+        from plate_packing import pack_stls
+    except ImportError as e:
+        print(f"Warning: Skipping plate packing ({e})")
+        return
+
+    stl_paths = [os.path.join(stl_dir, f) for f in stl_files
+                 if os.path.exists(os.path.join(stl_dir, f))]
+    bed_width, bed_depth = args.pack_plates
+
+    # Keep the existing plates when no part changed and the bed is the same
+    previous = load_report(stl_dir).get("plates")
+    plates_dir = os.path.join(stl_dir, PLATES_DIR)
+    geometry = {f: stl_geometry[f] for f in stl_files if f in stl_geometry}
+    if (previous and previous.get("geometry_hashes") == geometry
+            and previous["bed_mm"] == [bed_width, bed_depth]
+            and previous["spacing_mm"] == args.plate_spacing
+            and all(os.path.exists(os.path.join(plates_dir, name))
+                    for plate in previous["plates"] for name in plate["files"])):
+        print(f"\n⏩ Build plates unchanged ({len(previous['plates'])} plates)")
+        return
+    summary = pack_stls(stl_paths, bed_width, bed_depth,
+                        os.path.join(stl_dir, PLATES_DIR), spacing=args.plate_spacing)
+
+    print(f"\nBuild plates ({bed_width:g}x{bed_depth:g} mm):")
+    for plate in summary["plates"]:
+        names = ", ".join(p["name"] for p in plate["parts"])
+        print(f"  {plate['files'][0]}: {names}")
+    for name in summary["unplaced"]:
+        print(f"❌ {name} does not fit on the bed")
+
+    report = load_report(stl_dir)
+    report["plates"] = dict(summary, geometry_hashes=geometry)
+    save_report(stl_dir, report)
+
+def render_previews(stl_dir, stl_files, args):
+    """Write PNG thumbnails next to each STL; stl_preview re-renders only changed ones"""
+    try:
+        from stl_preview import render_previews as render_stl_previews
+    except ImportError as e:
+        print(f"Warning: Skipping previews ({e})")
+        return
+
+    report = load_report(stl_dir)
+    previews = render_stl_previews([os.path.join(stl_dir, f) for f in stl_files
+                                    if os.path.exists(os.path.join(stl_dir, f))],
+                                   size=args.preview_size)
+
+    print(f"\nPreviews ({args.preview_size} px):")
+    for stl_file, pngs in previews.items():
+        update_artifact(report, stl_file, "previews", pngs)
+        print(f"  {stl_file}: {', '.join(pngs)}")
+    save_report(stl_dir, report)
+
+def slice_layers(stl_dir, stl_files, args, report):
+    """Print the layer area, contour and feature-width stats of each STL"""
+    results = analyzed(report, stl_dir, stl_files, "layers")
+    if not results:
+        return
+    print(f"\nLayer slices ({args.layer_height:g} mm):")
+    for stl_file, layers in results:
+        width = layers["min_feature_width_mm"]
+        line = (f"{stl_file}: {layers['layers']} layers, up to {layers['max_contours']} contours"
+                + (f", narrowest {width:.2f} mm at z={layers['min_feature_z_mm']:.1f}"
+                   if width is not None else ""))
+        if layers["thin_layers"] or layers["open_contour_layers"]:
+            print(f"❌ {line} ({layers['thin_layers']} layers thinner than the "
+                  f"{args.nozzle:g} mm nozzle, {layers['open_contour_layers']} with open contours)")
+        else:
+            print(f"✅ {line}")
+
+def load_ops_profile(profile_path):
+    """Load the operator profile a script wrote, or None if it wrote none"""
+    try:
+        with open(profile_path, "r") as f:
+            return json.load(f)
+    except (IOError, json.JSONDecodeError):
+        return None
+
+def report_ops_profiles(stl_dir, stl_files, profiles, args):
+    """Store fresh operator profiles and print the hottest operators across all lamps"""
+    report = load_report(stl_dir)
+    for stl_file, profile in profiles.items():
+        # The per-call list stays in profiles/; the report keeps the totals
+        update_artifact(report, stl_file, "ops_profile",
+                        {k: v for k, v in profile.items() if k != "calls"})
+
+    # Unchanged lamps keep the profile of their last build
+    operators, modifiers = {}, {}
+    script_seconds = ops_seconds = 0.0
+    profiled = 0
+    for stl_file in stl_files:
+        profile = report.get("artifacts", {}).get(stl_file, {}).get("ops_profile")
+        if not profile:
+            continue
+        profiled += 1
+        script_seconds += profile["script_seconds"]
+        ops_seconds += profile["ops_seconds"]
+        for totals, entries in ((operators, profile["operators"]), (modifiers, profile["modifiers"])):
+            for name, entry in entries.items():
+                total = totals.setdefault(name, {"count": 0, "seconds": 0.0, "max_seconds": 0.0,
+                                                 "lamps": []})
+                total["count"] += entry["count"]
+                total["seconds"] += entry["seconds"]
+                total["max_seconds"] = max(total["max_seconds"], entry["max_seconds"])
+                total["lamps"].append(stl_file)
+    save_report(stl_dir, report)
+    if not profiled:
+        return
+
+    print(f"\nOperator profile ({profiled} lamps, {ops_seconds:.2f} s of "
+          f"{script_seconds:.2f} s in bpy.ops):")
+    hottest = sorted(operators.items(), key=lambda item: item[1]["seconds"], reverse=True)
+    for name, total in hottest[:args.hot_ops]:
+        print(f"  {name}: {total['seconds']:.3f} s over {total['count']} calls "
+              f"(slowest {total['max_seconds'] * 1000:.1f} ms) in {len(total['lamps'])} lamps")
+    for name, total in sorted(modifiers.items(), key=lambda item: item[1]["seconds"], reverse=True):
+        print(f"  apply {name}: {total['seconds']:.3f} s over {total['count']} applies")
+
+def report_resources(stl_dir, runs):
+    """Store each Blender run's resource usage and print what this build cost"""
+    if not runs:
+        return
+    report = load_report(stl_dir)
+    timestamp = datetime.now().isoformat()
+    log_path = os.path.join(stl_dir, RESOURCE_LOG)
+    try:
+        with open(log_path, "a") as log:
+            for script, stl_file, usage in runs:
+                log.write(json.dumps(dict(usage, script=script, stl=stl_file,
+                                          time=timestamp)) + "\n")
+    except IOError:
+        print(f"Warning: Could not append to {log_path}")
+
+    print("\nResource usage:")
+    for script, stl_file, usage in runs:
+        update_artifact(report, stl_file, "resources", dict(usage, time=timestamp))
+        line = f"  {script}: {usage['wall_seconds']:.1f} s wall"
+        if "peak_rss_mb" in usage:
+            line += (f", {usage['user_seconds']:.1f} s user, {usage['system_seconds']:.1f} s sys, "
+                     f"peak RSS {usage['peak_rss_mb']:.0f} MB, {usage['written_mb']:.1f} MB written")
+        if usage["exit_code"] != 0:
+            line += f" (exit {usage['exit_code']})"
+        print(line)
+    total_wall = sum(usage["wall_seconds"] for _, _, usage in runs)
+    total_cpu = sum(usage.get("user_seconds", 0.0) + usage.get("system_seconds", 0.0)
+                    for _, _, usage in runs)
+    peak = max(usage.get("peak_rss_mb", 0.0) for _, _, usage in runs)
+    print(f"  Total: {total_wall:.1f} s wall, {total_cpu:.1f} s CPU, largest peak RSS {peak:.0f} MB")
+    save_report(stl_dir, report)
+
+def report_outcomes(outcomes):
+    """List scripts that timed out or were killed apart from ordinary failures"""
+    groups = [(TIMEOUT, "⏱ Timed out"), (KILLED, "💀 Killed"),
+              ("transient", "❌ Failed (transient)"), ("failed", "❌ Failed")]
+    lines = []
+    for outcome, label in groups:
+        scripts = [script for script, result in outcomes.items() if result == outcome]
+        if scripts:
+            lines.append(f"{label}: {', '.join(scripts)}")
+    if lines:
+        print("\nBlender runs that did not finish:")
+        for line in lines:
+            print(f"  {line}")
+
+def parse_retry_on(text):
+    """Parse a comma-separated list of retryable failure kinds"""
+    kinds = tuple(kind.strip() for kind in text.split(",") if kind.strip())
+    unknown = [kind for kind in kinds if kind not in RETRYABLE]
+    if unknown:
+        raise argparse.ArgumentTypeError(
+            f"unknown failure kind {unknown[0]!r}; choose from {', '.join(RETRYABLE)}")
+    return kinds
+
+def retry_policy(args):
+    """Supervisor retry policy from the command line options"""
+    return {"retries": args.retries, "retry_on": args.retry_on,
+            "backoff_seconds": args.retry_backoff}
+
+def verify_reproducible(blender_path, script_dir, script_to_stl, script_env, args, deadline=None):
+    """Build every lamp twice in scratch directories; return True if the STL bytes match
+
+    The runs are supervised like the main build's: the same per-script
+    timeout, build deadline, retry policy and memory limit apply.
+    """
+    policy = retry_policy(args)
+    results = {}
+    with tempfile.TemporaryDirectory(prefix="lamp_repro_") as scratch:
+        for script, stl_file in sorted(script_to_stl.items()):
+            digests = []
+            for run in ("first", "second"):
+                run_dir = os.path.join(scratch, run)
+                os.makedirs(run_dir, exist_ok=True)
+                stl_path = os.path.join(run_dir, stl_file)
+                if (run_blender_script(blender_path, os.path.join(script_dir, script),
+                                       dict(script_env, LAMP_STL_DIR=run_dir), None,
+                                       args.memory_limit, args.script_timeout, deadline, policy)
+                        and os.path.exists(stl_path)):
+                    digests.append(calculate_file_hash(stl_path))
+            results[stl_file] = digests
+
+    all_ok = True
+    print("\nReproducibility checks:")
+    for stl_file, digests in results.items():
+        if len(digests) < 2:
+            all_ok = False
+            print(f"❌ {stl_file}: build failed")
+        elif digests[0] != digests[1]:
+            all_ok = False
+            print(f"❌ {stl_file}: two builds gave different bytes")
+        else:
+            print(f"✅ {stl_file}: byte-identical ({digests[0][:12]})")
+    return all_ok
+
+def parse_args(argv=None):
+    """Parse command line options"""
+    parser = argparse.ArgumentParser(description="Build lamp STLs with Blender")
+    parser.add_argument("--root", default=None,
+                        help="Directory searched for design families "
+                             "(default: the repository root)")
+    parser.add_argument("--filament-density", type=float, default=1.24,
+                        help="Filament density in g/cm³ (default: 1.24, PLA)")
+    parser.add_argument("--filament-diameter", type=float, default=1.75,
+                        help="Filament diameter in mm (default: 1.75)")
+    parser.add_argument("--filament-cost", type=float, default=20.0,
+                        help="Filament cost per kg (default: 20.0)")
+    parser.add_argument("--overhang-angle", type=float, default=45.0,
+                        help="Steepest overhang from vertical printable without support, "
+                             "in degrees (default: 45)")
+    parser.add_argument("--pack-plates", metavar="WxD", type=parse_bed, default=None,
+                        help="Pack the STLs onto build plates of this bed size in mm, e.g. 220x220")
+    parser.add_argument("--plate-spacing", type=float, default=5.0,
+                        help="Gap between parts on a plate in mm (default: 5.0)")
+    parser.add_argument("--previews", action="store_true",
+                        help="Render PNG thumbnails next to each STL")
+    parser.add_argument("--preview-size", type=int, default=256,
+                        help="Thumbnail size in pixels (default: 256)")
+    parser.add_argument("--check-mesh", action="store_true",
+                        help="Fail the build if any STL is not watertight or self-intersects")
+    parser.add_argument("--check-walls", action="store_true",
+                        help="Fail the build if any wall is thinner than --min-wall")
+    parser.add_argument("--min-wall", type=float, default=0.8,
+                        help="Thinnest printable wall in mm for --check-walls (default: 0.8)")
+    parser.add_argument("--check-fit", action="store_true",
+                        help="Fail the build if a shade does not fit its base")
+    parser.add_argument("--min-clearance", type=float, default=0.15,
+                        help="Tightest printable gap between mating parts in mm (default: 0.15)")
+    parser.add_argument("--max-clearance", type=float, default=0.6,
+                        help="Loosest gap before mating parts wobble in mm (default: 0.6)")
+    parser.add_argument("--slice", action="store_true",
+                        help="Slice each STL into layers and report thin features")
+    parser.add_argument("--layer-height", type=float, default=0.2,
+                        help="Layer height in mm for --slice (default: 0.2)")
+    parser.add_argument("--nozzle", type=float, default=0.4,
+                        help="Nozzle width in mm; narrower features are flagged (default: 0.4)")
+    parser.add_argument("--jobs", type=int, default=None,
+                        help="Worker processes for the post-build analyzers "
+                             "(default: one per CPU)")
+    parser.add_argument("--stl-precision", type=int, default=4,
+                        help="Decimal places kept in exported STL coordinates (default: 4)")
+    parser.add_argument("--raw-stl", action="store_true",
+                        help="Keep the exporter's STL bytes instead of writing canonical, "
+                             "byte-reproducible files")
+    parser.add_argument("--verify-reproducible", action="store_true",
+                        help="Build every lamp twice more and fail if the STL bytes differ")
+    parser.add_argument("--hot-ops", type=int, default=10,
+                        help="Number of slowest operators listed in the profile summary "
+                             "(default: 10)")
+    parser.add_argument("--memory-limit", metavar="MB", type=float, default=None,
+                        help="Address space limit per Blender run in MB; a script that "
+                             "needs more fails instead of swapping (default: no limit)")
+    parser.add_argument("--script-timeout", metavar="SECONDS", type=float, default=None,
+                        help="Kill a Blender run (and everything it started) after this long "
+                             "(default: no limit)")
+    parser.add_argument("--build-timeout", metavar="SECONDS", type=float, default=None,
+                        help="Stop starting and kill running Blender runs once the whole "
+                             "build has taken this long (default: no limit)")
+    parser.add_argument("--retries", type=int, default=1,
+                        help="Extra attempts for a Blender run that failed transiently "
+                             "(default: 1)")
+    parser.add_argument("--retry-on", type=parse_retry_on, default=("killed", "transient"),
+                        help="Comma-separated failure kinds worth retrying: timeout, killed, "
+                             "transient (default: killed,transient)")
+    parser.add_argument("--retry-backoff", metavar="SECONDS", type=float, default=5.0,
+                        help="Wait before the first retry, doubled for each later one "
+                             "(default: 5)")
+    parser.add_argument("--shared-cache", metavar="DIR",
+                        default=os.environ.get("LAMP_SHARED_CACHE"),
+                        help="Directory shared with other machines (e.g. an NFS mount) to pull "
+                             "and publish built STLs (default: $LAMP_SHARED_CACHE)")
+    parser.add_argument("--lock-timeout", type=float, default=1800.0,
+                        help="Seconds to wait for another machine building the same STL "
+                             "before building it here too (default: 1800)")
+    return parser.parse_args(argv)
+
+def build_family(family, args, root, hash_cache, cache_path, toolchain, deadline=None):
+    """Build one family's changed scripts and run its stages; return failed gates
+
+    deadline is the time.monotonic() value after which no Blender run may go on.
+    """
+    script_dir = family["dir"]
+    print(f"\n=== {family['name']} ({os.path.relpath(script_dir, root)}) ===")
+
+    # Change working directory to the family's directory
     os.chdir(script_dir)
     
     # Ensure STLs directory exists
-    stl_dir = os.path.join(script_dir, "STLs")
+    stl_dir = family["stl_dir"]
     if not os.path.exists(stl_dir):
         os.makedirs(stl_dir)
         print(f"Created STLs directory: {stl_dir}")
     
-    # Find all lamp scripts in the directory
-    all_scripts = find_lamp_scripts(script_dir)
-    print(f"Found {len(all_scripts)} lamp scripts: {', '.join(all_scripts)}")
+    all_scripts = family["scripts"]
+    print(f"Found {len(all_scripts)} build scripts: {', '.join(all_scripts)}")
     
     # Dynamically build the script-to-STL mapping
     script_to_stl = {}
@@ -202,21 +725,33 @@ def main():
     for script, stl in script_to_stl.items():
         print(f"  {script} -> {stl}")
     
-    # Load the hash cache
-    cache_path = os.path.join(script_dir, HASH_CACHE_FILE)
-    hash_cache = load_hash_cache(cache_path)
-    
-    # Find Blender executable
-    try:
-        blender_path = find_blender_path()
-        print(f"Found Blender at: {blender_path}")
-    except FileNotFoundError as e:
-        print(f"Error: {e}")
-        return
+    blender_path = toolchain["blender_path"]
+    script_env = toolchain_env(toolchain, stl_dir)
+    # Canonical STLs make identical geometry give identical bytes
+    stl_precision = None if args.raw_stl else args.stl_precision
+    if stl_precision is not None:
+        script_env["LAMP_STL_PRECISION"] = str(stl_precision)
     
-    # Track current file hashes and which files need processing
+    # Track current file hashes and which files need processing, keyed by
+    # the script's path from the tree root so families share one cache
     current_hashes = {}
     files_processed = []
+
+    # Operator profiles written by this run's scripts, by STL
+    profiles = {}
+
+    # (script, STL, resource usage) of every Blender run in this build
+    runs = []
+
+    # How each script this build tried to run ended, and the cache keys of
+    # those that did not produce an STL
+    outcomes = {}
+    failed_keys = set()
+    policy = retry_policy(args)
+    profile_dir = os.path.join(stl_dir, PROFILES_DIR)
+
+    # Geometry hashes of the STLs built this run, by cache key
+    geometry_hashes = {}
     
     # Process each script
     for script in all_scripts:
@@ -229,7 +764,8 @@ def main():
         
         # Calculate the current hash of the script
         current_hash = calculate_file_hash(script_path)
-        current_hashes[script] = current_hash
+        key = cache_key(script_path, root)
+        current_hashes[key] = current_hash
         
         # Get the corresponding STL file
         stl_file = script_to_stl.get(script)
@@ -239,34 +775,93 @@ def main():
         needs_processing = False
         
         # If the script isn't in the cache or its hash has changed
-        if script not in hash_cache or hash_cache[script]["hash"] != current_hash:
+        if key not in hash_cache or hash_cache[key]["hash"] != current_hash:
             needs_processing = True
-            reason = "modified" if script in hash_cache else "new"
+            reason = "modified" if key in hash_cache else "new"
         # Or if the STL file doesn't exist
         elif stl_file and not os.path.exists(stl_path):
             needs_processing = True
             reason = "missing STL"
+        # Or if the STL was written with different precision settings
+        elif hash_cache[key].get("stl_precision") != stl_precision:
+            needs_processing = True
+            reason = "STL precision changed"
         
         if needs_processing:
             print(f"Processing {script} (reason: {reason})")
-            success = run_blender_script(blender_path, script_path)
+            previous = hash_cache.get(key, {})
+            previous_mtime = (os.stat(stl_path).st_mtime_ns
+                              if stl_path and os.path.exists(stl_path) else None)
+            profile_path = os.path.join(profile_dir, os.path.splitext(script)[0] + ".json")
+            if os.path.exists(profile_path):
+                os.remove(profile_path)
+            if deadline is not None and time.monotonic() >= deadline:
+                print(f"⏱ Skipping {script}: the build deadline has passed")
+                failed_keys.add(key)
+                outcomes[script] = TIMEOUT
+                continue
+            run_env = dict(script_env, LAMP_OPS_PROFILE=profile_path)
+            usage = {}
+
+            def run():
+                return run_blender_script(blender_path, script_path, run_env, usage,
+                                          args.memory_limit, args.script_timeout,
+                                          deadline, policy)
+
+            if args.shared_cache and stl_path:
+                lock_timeout = args.lock_timeout
+                if deadline is not None:
+                    lock_timeout = min(lock_timeout, max(deadline - time.monotonic(), 0.0))
+                success = build_with_shared_cache(
+                    args.shared_cache, shared_cache_key(script_path, stl_file, script_env),
+                    stl_path, run, lock_timeout)
+            else:
+                success = run()
+            outcomes[script] = usage.get("outcome", OK if success else "failed")
+            # Pulled STLs never started Blender
+            if usage:
+                runs.append((script, stl_file, usage))
             
             if success:
                 print(f"✅ Successfully ran {script}")
-                files_processed.append(script)
+                files_processed.append(key)
+                profile = load_ops_profile(profile_path)
+                if stl_file and profile:
+                    profiles[stl_file] = profile
+
+                # Early cutoff: identical geometry keeps the old artifact's identity
+                if stl_path and os.path.exists(stl_path):
+                    geometry = geometry_fingerprint(stl_path)
+                    geometry_hashes[key] = geometry
+                    if previous_mtime and geometry == previous.get("geometry_hash"):
+                        os.utime(stl_path, ns=(previous_mtime, previous_mtime))
+                        print(f"⏸ Geometry of {stl_file} unchanged; keeping downstream results")
             else:
                 print(f"❌ Failed to run {script}")
+                failed_keys.add(key)
         else:
             print(f"⏩ Skipping {script} (unchanged since last run)")
     
-    # Update the hash cache with new timestamps
+    report_resources(stl_dir, runs)
+    report_outcomes(outcomes)
+
+    # Update the hash cache with new timestamps; scripts that failed keep
+    # their old entry so the next build tries them again
     timestamp = datetime.now().isoformat()
-    for script, file_hash in current_hashes.items():
-        hash_cache[script] = {
+    for key, file_hash in current_hashes.items():
+        if key in failed_keys:
+            continue
+        previous = hash_cache.get(key, {})
+        hash_cache[key] = {
             "hash": file_hash,
-            "last_processed": timestamp if script in files_processed else 
-                              hash_cache.get(script, {}).get("last_processed", timestamp)
+            "last_processed": timestamp if key in files_processed else 
+                              previous.get("last_processed", timestamp),
+            "stl_precision": stl_precision if key in files_processed else
+                             previous.get("stl_precision"),
         }
+        geometry = geometry_hashes.get(key, previous.get("geometry_hash"))
+        if geometry:
+            hash_cache[key]["geometry_hash"] = geometry
     
     # Save the updated hash cache
     save_hash_cache(cache_path, hash_cache)
@@ -280,6 +875,93 @@ def main():
         else:
             print(f"❌ Missing STL: {stl_file}")
 
+    stl_files = sorted(set(script_to_stl.values()))
+
+    # Geometry of every existing STL; stages keep results only for the
+    # geometry they checked, whichever build last changed it
+    stl_geometry = {}
+    for script, stl_file in script_to_stl.items():
+        stl_path = os.path.join(stl_dir, stl_file)
+        if os.path.exists(stl_path):
+            entry = hash_cache.get(cache_key(os.path.join(script_dir, script), root), {})
+            stl_geometry[stl_file] = entry.get("geometry_hash") or geometry_fingerprint(stl_path)
+
+    report = load_report(stl_dir)
+    run_analyzers(stl_dir, stl_files, args, report, jobs=args.jobs)
+    save_report(stl_dir, report)
+    report_materials(stl_dir, stl_files, report)
+    report_overhangs(stl_dir, stl_files, args, report)
+    report_ops_profiles(stl_dir, stl_files, profiles, args)
+
+    if args.previews:
+        render_previews(stl_dir, stl_files, args)
+
+    if args.slice:
+        slice_layers(stl_dir, stl_files, args, report)
+
+    if args.pack_plates:
+        pack_plates(stl_dir, stl_files, args, stl_geometry)
+
+    # Run every requested gate before failing so one build reports them all
+    failed = []
+    if args.check_mesh and not check_printability(stl_dir, stl_files, report):
+        failed.append("Printability")
+    if args.check_walls and not check_walls(stl_dir, stl_files, args, stl_geometry):
+        failed.append("Wall thickness")
+    if args.check_fit and not check_assemblies(stl_dir, family["assemblies"], args, stl_geometry):
+        failed.append("Assembly fit")
+    if args.verify_reproducible and not verify_reproducible(blender_path, script_dir,
+                                                            script_to_stl, script_env,
+                                                            args, deadline):
+        failed.append("Reproducibility")
+    return [f"{gate} ({family['name']})" for gate in failed]
+
+
+def main(args=None):
+    if args is None:
+        args = parse_args()
+
+    # Blender runs still going when the build is stopped die with it
+    install_signal_handlers()
+    deadline = time.monotonic() + args.build_timeout if args.build_timeout else None
+
+    # The builder lives in lamps/; by default it builds every family in the repository
+    builder_dir = os.path.dirname(os.path.abspath(__file__))
+    root = os.path.abspath(args.root or os.path.dirname(builder_dir))
+
+    start = time.perf_counter()
+    families = discover_families(root)
+    elapsed_ms = (time.perf_counter() - start) * 1000
+    print(f"Found {len(families)} design families under {root} in {elapsed_ms:.0f} ms: "
+          f"{', '.join(family['name'] for family in families)}")
+    
+    # Load the hash cache shared by all families
+    cache_path = os.path.join(builder_dir, HASH_CACHE_FILE)
+    hash_cache = migrate_hash_cache(load_hash_cache(cache_path), builder_dir, root)
+    
+    # Find Blender and the exporters it provides (cached until Blender changes)
+    try:
+        toolchain = load_toolchain(builder_dir)
+    except (FileNotFoundError, RuntimeError, subprocess.CalledProcessError) as e:
+        print(f"Error: {e}")
+        return 1
+    print(f"Found Blender {toolchain['version']} at: {toolchain['blender_path']}")
+    stl_exporter = toolchain["exporters"]["stl"]
+    print(f"STL exporter: {stl_exporter['operator'] if stl_exporter else 'none detected'}")
+
+    # Run every family and every requested gate before failing so one build reports them all
+    failed = []
+    for family in families:
+        failed += build_family(family, args, root, hash_cache, cache_path, toolchain, deadline)
+    for gate in failed:
+        print(f"\n❌ {gate} gate failed")
+    return 1 if failed else 0
+
 if __name__ == "__main__":
-    main()
-    print("\nDone! Check the STLs directory for your generated lamp models.")
\ No newline at end of file
+    try:
+        status = main()
+    except KeyboardInterrupt:
+        print("\nInterrupted; stopped all Blender runs")
+        sys.exit(130)
+    print("\nDone! Check the STLs directory for your generated lamp models.")
+    sys.exit(status)
\ No newline at end of file
@@ -0,0 +1,41 @@
+"""
+Per-build JSON report written alongside the STLs.
+Each post-export stage stores its results under the artifact's STL name, so
+the report accumulates material estimates, checks and previews in one place.
+"""
+
+import json
+import os
+from datetime import datetime
+
+REPORT_FILE = "build_report.json"
+
+
+def load_report(stl_dir):
+    """Load the existing report, or start an empty one"""
+    report_path = os.path.join(stl_dir, REPORT_FILE)
+    if os.path.exists(report_path):
+        try:
+            with open(report_path, "r") as f:
+                return json.load(f)
+        except (IOError, json.JSONDecodeError):
+            pass
+    return {"artifacts": {}}
+
+
+def update_artifact(report, stl_file, section, data):
+    """Store one stage's results for an artifact"""
+    report.setdefault("artifacts", {}).setdefault(stl_file, {})[section] = data
+
+
+def save_report(stl_dir, report):
+    """Write the report next to the STLs"""
+    report["generated"] = datetime.now().isoformat()
+    report_path = os.path.join(stl_dir, REPORT_FILE)
+    try:
+        with open(report_path, "w") as f:
+            json.dump(report, f, indent=2)
+        return True
+    except IOError:
+        print(f"Warning: Could not save build report to {report_path}")
+        return False
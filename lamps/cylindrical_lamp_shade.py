@@ -1,6 +1,33 @@
 import bpy
+import bmesh
 import os
-import math
+import sys
+
+import numpy as np
+
+# Shared helpers live next to this script
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+from stl_export import export_stl
+from ops_profiler import profile_ops
+from surface_patterns import cylinder_wall, displace_cylinder, refine_wall, wall_grid
+
+# Count and time every operator when the build asks for a profile
+profile_ops()
+
+# Wall pattern; the geometry depends only on these settings
+PATTERN = "hex"       # hex, voronoi, ribbed or noise
+PATTERN_CELL = 10.0   # mm across one cell
+PATTERN_SEED = 0      # changes the voronoi and noise layouts
+PATTERN_DEPTH = 2.0   # mm the cell tops rise above the groove bottoms
+PATTERN_RIM = 3.0     # mm at each end of the wall where the pattern fades out
+
+# Shade dimensions
+RADIUS = 45.0          # mm; 90mm diameter
+WALL_HEIGHT = 100.0    # mm of patterned wall below the dome
+DOME_HEIGHT = 30.0     # mm the dome rises above the wall
+DOME_RINGS = 24        # latitude rings of the sphere the dome is cut from; even
+WALL_THICKNESS = 1.5   # mm under the groove bottoms; the pattern is raised on top
+WELD_DISTANCE = 0.01   # mm; dome and wall vertices closer than this are merged
 
 # Set up the scene for mm
 bpy.context.scene.unit_settings.system = 'METRIC'
@@ -11,105 +38,81 @@ bpy.context.scene.unit_settings.length_unit = 'MILLIMETERS'
 bpy.ops.object.select_all(action='SELECT')
 bpy.ops.object.delete()
 
-# Create a cylindrical lamp shade with dome top and textured pattern
+# Create a cylindrical lamp shade with dome top and textured pattern, in a
+# single bmesh session: no operators, mode switches or per-vertex selection
 def create_cylindrical_lamp():
-    # Create the base cylinder
-    bpy.ops.mesh.primitive_cylinder_add(
-        vertices=48,  # Smooth cylinder
-        radius=45,    # 90mm diameter
-        depth=100,    # 100mm height (cylinder part)
-        end_fill_type='NGON',
-        location=(0, 0, 50)  # Center of cylinder at (0,0,50)
-    )
-    cylinder = bpy.context.active_object
-    
-    # Create the dome for the top
-    bpy.ops.mesh.primitive_ico_sphere_add(
-        subdivisions=3,  # Use ico sphere for better stability
-        radius=45,       # Match cylinder radius
-        location=(0, 0, 100)  # Top of cylinder
-    )
-    dome = bpy.context.active_object
-    
-    # Scale dome to desired height
-    dome.scale.z = 30/45  # 30mm dome height
-    bpy.ops.object.transform_apply(location=False, rotation=False, scale=True)
-    
-    # Cut bottom half of dome
-    bpy.ops.object.mode_set(mode='EDIT')
-    bpy.ops.mesh.select_all(action='DESELECT')
-    
-    # Go to vertex select mode
-    bpy.ops.mesh.select_mode(type='VERT')
-    
-    # Switch to object mode to do selection
-    bpy.ops.object.mode_set(mode='OBJECT')
-    
-    # Select vertices in bottom half
-    for v in dome.data.vertices:
-        if v.co.z < 0:  # Bottom half (origin at center)
-            v.select = True
-    
-    # Delete selected vertices
-    bpy.ops.object.mode_set(mode='EDIT')
-    bpy.ops.mesh.delete(type='VERT')
-    bpy.ops.object.mode_set(mode='OBJECT')
-    
-    # Join dome and cylinder
-    dome.select_set(True)
-    cylinder.select_set(True)
-    bpy.context.view_layer.objects.active = cylinder  
-    bpy.ops.object.join()
-    
-    # Get the resulting joined object
-    lamp = cylinder
-    
-    # Remove bottom face of cylinder
-    bpy.ops.object.mode_set(mode='EDIT')
-    bpy.ops.mesh.select_all(action='DESELECT')
-    bpy.ops.mesh.select_mode(type='FACE')
-    
-    # Switch to object mode to select bottom face
-    bpy.ops.object.mode_set(mode='OBJECT')
-    for poly in lamp.data.polygons:
-        if poly.normal.z < -0.9:  # Face normal pointing down
-            poly.select = True
-    
-    # Delete selected face
-    bpy.ops.object.mode_set(mode='EDIT')
-    bpy.ops.mesh.delete(type='FACE')
-    
-    # Create a simple pattern - add a displacement modifier 
-    # instead of directly manipulating vertices
-    bpy.ops.object.mode_set(mode='OBJECT')
-    
-    # Add more geometry for the pattern
-    subsurf = lamp.modifiers.new(name="Subsurf", type='SUBSURF')
-    subsurf.levels = 2
-    bpy.ops.object.modifier_apply(modifier=subsurf.name)
-    
-    # Create a texture for displacement
-    texture = bpy.data.textures.new("HexPattern", type='STUCCI')
-    texture.noise_scale = 0.25
-    texture.turbulence = 5.0
-    
-    # Add displacement modifier using the texture
-    displace = lamp.modifiers.new(name="Displace", type='DISPLACE')
-    displace.texture = texture
-    displace.strength = 2.0  # 2mm pattern depth
-    displace.mid_level = 0.5
-    bpy.ops.object.modifier_apply(modifier=displace.name)
-    
-    # Add thickness with solidify
-    solidify = lamp.modifiers.new(name="Solidify", type='SOLIDIFY') 
-    solidify.thickness = 1.5  # 1.5mm wall thickness
-    solidify.offset = 0
-    bpy.ops.object.modifier_apply(modifier=solidify.name)
-    
-    # Final cleanup
-    bpy.ops.object.shade_smooth()
-    lamp.name = "CylindricalLampShade"
-    
+    # Build the plain cylinder wall, open at both ends, from just its end
+    # rings; the patterned outer wall replaces it after solidifying
+    angles, rows = wall_grid(PATTERN, RADIUS, WALL_HEIGHT, PATTERN_CELL, rim=PATTERN_RIM)
+    verts, quads = cylinder_wall(angles, rows[[0, -1]], radius=RADIUS)
+    mesh = bpy.data.meshes.new("CylindricalLampShade")
+    mesh.from_pydata(verts.tolist(), [], quads.tolist())
+
+    # Squash a sphere with one segment per wall column into the dome; its
+    # equator lands exactly on the wall's top ring
+    bm = bmesh.new()
+    sphere = bmesh.ops.create_uvsphere(bm, u_segments=len(angles), v_segments=DOME_RINGS,
+                                       radius=RADIUS)
+    bmesh.ops.scale(bm, vec=(1.0, 1.0, DOME_HEIGHT / RADIUS), verts=sphere["verts"])
+    bmesh.ops.translate(bm, vec=(0.0, 0.0, WALL_HEIGHT), verts=sphere["verts"])
+
+    # Cut away the lower half of the sphere, deleting its faces outright
+    cut = bmesh.ops.bisect_plane(bm, geom=bm.verts[:] + bm.edges[:] + bm.faces[:],
+                                 dist=WELD_DISTANCE, plane_co=(0.0, 0.0, WALL_HEIGHT),
+                                 plane_no=(0.0, 0.0, 1.0), clear_inner=True)
+    rim = [elem for elem in cut["geom_cut"] if isinstance(elem, bmesh.types.BMVert)]
+
+    # Append the wall and weld its top ring to the dome's rim
+    first = len(bm.verts)
+    bm.from_mesh(mesh)
+    bm.verts.ensure_lookup_table()
+    top_ring = bm.verts[first + len(angles):first + 2 * len(angles)]
+    bmesh.ops.remove_doubles(bm, verts=rim + top_ring, dist=WELD_DISTANCE)
+
+    # Give the smooth shell its wall thickness; offsetting the patterned
+    # surface instead folds the inner shell through itself in the grooves
+    bmesh.ops.recalc_face_normals(bm, faces=bm.faces[:])
+    bmesh.ops.solidify(bm, geom=bm.faces[:], thickness=WALL_THICKNESS)
+
+    # Swap the plain outer wall for one refined where the pattern bends; the
+    # inner wall stays a coarse cylinder
+    def on_outer_wall(v):
+        return (v.co.z <= WALL_HEIGHT + WELD_DISTANCE
+                and v.co.x ** 2 + v.co.y ** 2 > (RADIUS - WALL_THICKNESS / 2) ** 2)
+    plain = [f for f in bm.faces if all(on_outer_wall(v) for v in f.verts)]
+    rings = list({id(v): v for f in plain for v in f.verts}.values())
+    bmesh.ops.delete(bm, geom=plain, context='FACES')
+
+    verts, quads, triangles = refine_wall(angles, rows, RADIUS, PATTERN, PATTERN_CELL,
+                                          seed=PATTERN_SEED, strength=PATTERN_DEPTH,
+                                          mid_level=0.0, rim=PATTERN_RIM)
+    wall = bpy.data.meshes.new("CylindricalLampShadeWall")
+    wall.from_pydata(verts.tolist(), [], quads.tolist() + triangles.tolist())
+    first = len(bm.verts)
+    bm.from_mesh(wall)
+    bpy.data.meshes.remove(wall)
+    bm.verts.ensure_lookup_table()
+    ends = bm.verts[first:first + len(angles)] + bm.verts[len(bm.verts) - len(angles):]
+    bmesh.ops.remove_doubles(bm, verts=rings + ends, dist=WELD_DISTANCE)
+    bm.to_mesh(mesh)
+    bm.free()
+
+    # Raise the pattern outward from the outer wall only, so the inner wall
+    # stays a cylinder and no point is thinner than WALL_THICKNESS
+    coords = np.empty(len(mesh.vertices) * 3)
+    mesh.vertices.foreach_get("co", coords)
+    coords = coords.reshape(-1, 3)
+    outer = ((coords[:, 2] <= WALL_HEIGHT + WELD_DISTANCE)
+             & (np.hypot(coords[:, 0], coords[:, 1]) > RADIUS - WALL_THICKNESS / 2))
+    coords[outer] = displace_cylinder(coords[outer], PATTERN, PATTERN_CELL, WALL_HEIGHT,
+                                      seed=PATTERN_SEED, strength=PATTERN_DEPTH, mid_level=0.0,
+                                      rim=PATTERN_RIM)
+    mesh.vertices.foreach_set("co", coords.ravel())
+
+    mesh.polygons.foreach_set("use_smooth", [True] * len(mesh.polygons))
+    mesh.update()
+    lamp = bpy.data.objects.new("CylindricalLampShade", mesh)
+    bpy.context.collection.objects.link(lamp)
     return lamp
 
 # Create lamp shade
@@ -117,24 +120,13 @@ lamp_shade = create_cylindrical_lamp()
 
 # Export to STL
 export_filepath = "/Users/stoklosa/Documents/StokApps/3D-print-designs/lamps/STLs/cylindrical_shade.stl"
-os.makedirs(os.path.dirname(export_filepath), exist_ok=True)
-
-# Deselect all objects and select only the lamp shade
-bpy.ops.object.select_all(action='DESELECT')
-lamp_shade.select_set(True)
-bpy.context.view_layer.objects.active = lamp_shade
-
-# Export using newer Blender 4.x method
-try:
-    bpy.ops.wm.stl_export(filepath=export_filepath)
-    print(f"STL exported to {export_filepath}")
-except Exception as e:
-    print(f"Export failed: {e}")
+export_filepath = export_stl(lamp_shade, export_filepath)
 
 print("Cylindrical lamp shade created with dimensions:")
-print(f"  - Height: 130mm (100mm cylinder + 30mm dome)")
-print(f"  - Diameter: 90mm")
+print(f"  - Height: {WALL_HEIGHT + DOME_HEIGHT:g}mm "
+      f"({WALL_HEIGHT:g}mm cylinder + {DOME_HEIGHT:g}mm dome)")
+print(f"  - Diameter: {2 * RADIUS:g}mm, {2 * (RADIUS + PATTERN_DEPTH):g}mm over the pattern")
 print(f"  - Open bottom, domed top")
-print(f"  - Wall thickness: 1.5mm")
-print(f"  - Textured pattern")
+print(f"  - Wall thickness: {WALL_THICKNESS}mm")
+print(f"  - {PATTERN} pattern, {PATTERN_CELL}mm cells, seed {PATTERN_SEED}")
 print(f"Exported to: {export_filepath}")
\ No newline at end of file
@@ -0,0 +1,215 @@
+"""
+Discovery of design families across the repository.
+Walks the tree once with os.scandir, honouring .gitignore files on the way
+down (ignored directories such as STLs/ are never entered), and returns every
+directory holding a family config together with the build scripts it names.
+"""
+
+import functools
+import json
+import os
+import re
+
+# A directory holding this file is a design family
+FAMILY_CONFIG = "design_family.json"
+
+# Settings a family config may leave out
+FAMILY_DEFAULTS = {
+    "script_pattern": r"^$",  # regex for build script names
+    "scripts": [],            # extra build scripts the pattern does not match
+    "stl_dir": "STLs",        # where the family's STLs go, relative to it
+    "assemblies": [],         # base/shade pairs for the fit check
+}
+
+# Never walked, whatever the ignore files say
+ALWAYS_SKIP = {".git"}
+
+
+def _glob_to_regex(glob):
+    """Translate one gitignore glob (without leading / or trailing /) to regex
+
+    Wildcards never cross a newline, so one regex can scan many names joined
+    by newlines.
+    """
+    out = []
+    i = 0
+    while i < len(glob):
+        if glob.startswith("**/", i):
+            out.append("(?:[^\\n]*/)?")
+            i += 3
+        elif glob.startswith("/**", i) and i + 3 == len(glob):
+            out.append("/[^\\n]*")
+            i += 3
+        elif glob[i] == "*":
+            out.append("[^/\\n]*")
+            i += 1
+        elif glob[i] == "?":
+            out.append("[^/\\n]")
+            i += 1
+        elif glob[i] == "[":
+            end = glob.find("]", i + 2)
+            if end < 0:
+                out.append(re.escape(glob[i]))
+                i += 1
+            else:
+                body = glob[i + 1:end]
+                if body.startswith("!"):
+                    body = "^\\n" + body[1:]
+                out.append(f"[{body}]")
+                i = end + 1
+        elif glob[i] == "\\" and i + 1 < len(glob):
+            out.append(re.escape(glob[i + 1]))
+            i += 2
+        else:
+            out.append(re.escape(glob[i]))
+            i += 1
+    return "".join(out)
+
+
+def parse_gitignore(text):
+    """Rules of one .gitignore as (regex, negate, dir_only, anchored) in file order
+
+    Anchored regexes match paths relative to the ignore file's directory; the
+    others have no inner slash and, as in git, match a name at any depth.
+    """
+    rules = []
+    for line in text.splitlines():
+        line = line.rstrip()
+        if not line or line.startswith("#"):
+            continue
+        negate = line.startswith("!")
+        if negate:
+            line = line[1:]
+        elif line.startswith("\\"):
+            line = line[1:]
+        dir_only = line.endswith("/")
+        line = line.rstrip("/")
+        if not line:
+            continue
+        anchored = "/" in line
+        rules.append((_glob_to_regex(line.lstrip("/")), negate, dir_only, anchored))
+    return rules
+
+
+def compile_rules(rules):
+    """Merge runs of rules with the same polarity into single regexes
+
+    Returns one (negate, {(is_dir, anchored): regex}) per run, last run first,
+    so the first run that matches decides, just as the last matching line
+    does in git. Name patterns are tested on the bare name, so the common
+    case needs no path at all.
+    """
+    runs = []
+    for regex, negate, dir_only, anchored in rules:
+        if not runs or runs[-1][0] != negate:
+            runs.append((negate, {}))
+        for is_dir in ((True,) if dir_only else (False, True)):
+            runs[-1][1].setdefault((is_dir, anchored), []).append(regex)
+    return [(negate, {key: re.compile("^(?:" + "|".join(regexes) + ")$", re.MULTILINE)
+                      for key, regexes in groups.items()})
+            for negate, groups in reversed(runs)]
+
+
+@functools.lru_cache(maxsize=None)
+def load_rules(text):
+    """Compiled runs of one .gitignore's text; trees often repeat the same file"""
+    return compile_rules(parse_gitignore(text))
+
+
+def ignored_names(levels, names, is_dir):
+    """The entries of one directory that the ignore rules exclude
+
+    levels holds (path prefix, compiled runs) per .gitignore from the root
+    down, the prefix being the current directory relative to that ignore
+    file's directory. Each run scans all names at once.
+    """
+    ignored = set()
+    undecided = set(names)
+    joined = "\n".join(names)
+    # Deeper ignore files take precedence over shallower ones
+    for prefix, runs in reversed(levels):
+        for negate, regexes in runs:
+            if not undecided:
+                return ignored
+            hits = set()
+            regex = regexes.get((is_dir, False))
+            if regex is not None:
+                hits.update(regex.findall(joined))
+            regex = regexes.get((is_dir, True))
+            if regex is not None:
+                paths = "\n".join(prefix + name for name in undecided)
+                hits.update(path[len(prefix):] for path in regex.findall(paths))
+            hits &= undecided
+            undecided -= hits
+            if not negate:
+                ignored |= hits
+    return ignored
+
+
+def walk_tree(root):
+    """Yield (directory, file names) for every directory not ignored under root"""
+    # Each ignore level is (depth it was found at, compiled runs)
+    stack = [(root, [], [])]
+    while stack:
+        path, parts, levels = stack.pop()
+        try:
+            with os.scandir(path) as it:
+                entries = list(it)
+        except OSError:
+            continue
+        for entry in entries:
+            if entry.name == ".gitignore" and entry.is_file():
+                try:
+                    with open(entry.path, "r") as f:
+                        runs = load_rules(f.read())
+                except (IOError, UnicodeDecodeError, re.error):
+                    runs = []
+                if runs:
+                    levels = levels + [(len(parts), runs)]
+                break
+
+        dirs, files = [], []
+        for entry in entries:
+            if entry.is_dir(follow_symlinks=False):
+                if entry.name not in ALWAYS_SKIP:
+                    dirs.append(entry)
+            else:
+                files.append(entry.name)
+        if levels:
+            prefixed = [("".join(p + "/" for p in parts[depth:]), runs) for depth, runs in levels]
+            skipped = ignored_names(prefixed, [d.name for d in dirs], True)
+            dirs = [d for d in dirs if d.name not in skipped]
+            skipped = ignored_names(prefixed, files, False)
+            files = [name for name in files if name not in skipped]
+        for entry in dirs:
+            stack.append((entry.path, parts + [entry.name], levels))
+        yield path, files
+
+
+def load_family(directory, files):
+    """Family description from the config in `directory`, with its build scripts"""
+    with open(os.path.join(directory, FAMILY_CONFIG), "r") as f:
+        config = dict(FAMILY_DEFAULTS, **json.load(f))
+    pattern = re.compile(config["script_pattern"])
+    scripts = sorted(name for name in files
+                     if name.endswith(".py")
+                     and (pattern.match(name) or name in config["scripts"]))
+    return {
+        "name": config.get("name") or os.path.basename(directory),
+        "dir": directory,
+        "stl_dir": os.path.join(directory, config["stl_dir"]),
+        "scripts": scripts,
+        "assemblies": config["assemblies"],
+    }
+
+
+def discover_families(root):
+    """Every design family under root, sorted by path"""
+    families = []
+    for directory, files in walk_tree(os.path.abspath(root)):
+        if FAMILY_CONFIG in files:
+            try:
+                families.append(load_family(directory, files))
+            except (IOError, ValueError, re.error) as e:
+                print(f"Warning: Skipping family in {directory} ({e})")
+    return sorted(families, key=lambda family: family["dir"])
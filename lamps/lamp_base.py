@@ -2,6 +2,15 @@ import bpy
 import bmesh
 import os
 import math
+import sys
+
+# Shared helpers live next to this script
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+from stl_export import export_stl
+from ops_profiler import profile_ops
+
+# Count and time every operator when the build asks for a profile
+profile_ops()
 
 # Set up the scene for mm
 bpy.context.scene.unit_settings.system = 'METRIC'
@@ -214,16 +223,10 @@ export_filepath = "/Users/stoklosa/Documents/StokApps/3D-print-designs/lamps/STL
 
 # Export function
 def export_to_stl(obj, filepath):
-    # Deselect all objects
-    bpy.ops.object.select_all(action='DESELECT')
-    
-    # Select only our object
-    obj.select_set(True)
-    bpy.context.view_layer.objects.active = obj
-    
-    # Export to STL
-    bpy.ops.export_mesh.stl(
-        filepath=filepath,
+    # Export to STL with the exporter this Blender provides
+    filepath = export_stl(
+        obj,
+        filepath,
         check_existing=True,
         filter_glob='*.stl',
         use_selection=True,
@@ -234,9 +237,10 @@ def export_to_stl(obj, filepath):
     )
     
     print(f"Model exported to: {filepath}")
+    return filepath
 
 # Export the model
-export_to_stl(lamp_base, export_filepath)
+export_filepath = export_to_stl(lamp_base, export_filepath)
 
 print("Lamp base with notch connector system created in millimeters and exported to STL!")
 print(f"Exported to: {export_filepath}")
\ No newline at end of file
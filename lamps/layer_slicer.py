@@ -0,0 +1,383 @@
+"""
+Planar layer slicer for printability checks.
+Intersects the triangle mesh with horizontal planes at a given layer height,
+chains the resulting segments into contours and reports per-layer area,
+contour count and minimum feature width. Every step is vectorised over many
+layers at once: no per-layer or per-segment Python loops.
+"""
+
+import numpy as np
+
+from mesh_check import pack_rows, weld
+from mesh_io import read_stl
+
+DEFAULT_LAYER_HEIGHT = 0.2  # mm
+DEFAULT_NOZZLE = 0.4  # mm; narrower features cannot be printed
+
+# Feature widths are searched up to this distance (mm); wider ones report None
+WIDTH_SEARCH_RADIUS = 2.0
+
+# Segments searched per batch of whole layers, to bound the width search's
+# temporaries; a segment meets about six candidates
+WIDTH_BATCH = 1 << 17
+
+# Vertices this close (mm) to a slicing plane are treated as on it
+PLANE_TOLERANCE = 1e-6
+
+# Where the mesh's edges do not link segments, endpoints closer than this
+# (mm) are joined instead
+CHAIN_TOLERANCE = 1e-5
+
+
+def _edge_twins(faces):
+    """Half-edge across each triangle edge, -1 unless exactly two faces share it
+
+    Edges are numbered 3 * face + k for the edges (0, 2), (0, 1) and (1, 2).
+    """
+    a = faces[:, [0, 0, 1]].ravel()
+    b = faces[:, [2, 1, 2]].ravel()
+    key = np.minimum(a, b) * (int(faces.max(initial=0)) + 1) + np.maximum(a, b)
+    order = np.argsort(key)
+    key = key[order]
+    runs = np.flatnonzero(np.concatenate([[True], key[1:] != key[:-1], [True]]))
+    pair = runs[:-1][np.diff(runs) == 2]
+    twin = np.full(len(key), -1, dtype=np.int64)
+    twin[order[pair]] = order[pair + 1]
+    twin[order[pair + 1]] = order[pair]
+    return twin
+
+
+def slice_segments(triangles, layer_height=DEFAULT_LAYER_HEIGHT):
+    """Cut triangles with planes at mid-layer heights
+
+    Returns (layer_z, layer, start, end, successor): start/end are (m, 2) XY
+    points of every segment, grouped by their layer index. Segments run so the
+    solid lies on their left, outer contours counter-clockwise and holes
+    clockwise, and successor is the segment that continues from each one's
+    end, across the mesh edge it ends on; -1 where the mesh is open there.
+    """
+    tris = np.asarray(triangles, dtype=np.float32)
+    _, faces = weld(tris)
+
+    # Vertices a hair below a plane count as on it, so float noise never
+    # cuts slivers off triangles that merely touch the plane
+    z = tris[:, :, 2].astype(np.float64) + PLANE_TOLERANCE
+    # Sort each triangle's vertices by height: every cut crosses the edge
+    # from the lowest to the highest vertex and one of the other two
+    by_z = np.argsort(z, axis=1, kind="stable")
+    z = np.take_along_axis(z, by_z, axis=1)
+    xy = np.take_along_axis(tris[:, :, :2], by_z[:, :, None], axis=1)
+    faces = np.take_along_axis(faces, by_z, axis=1)
+    twin = _edge_twins(faces)
+    # The winding climbs both short edges and comes down the long one, unless
+    # sorting reversed it; segments run from the edge the winding comes down
+    # to the one it climbs, which keeps the solid on their left
+    reverse = (by_z[:, 1] - by_z[:, 0]) % 3 == 2
+
+    base = float(z[:, 0].min()) - PLANE_TOLERANCE if len(tris) else 0.0
+    top = float(z[:, 2].max()) - PLANE_TOLERANCE if len(tris) else 0.0
+    layer_count = max(int(np.floor((top - base) / layer_height)), 0)
+    layer_z = base + layer_height * (np.arange(layer_count) + 0.5)
+
+    # Layers each triangle crosses; vertices on a plane count as above it, so
+    # a plane through the lowest vertex misses the triangle and one through
+    # the highest still cuts it
+    first = np.floor((z[:, 0] - base) / layer_height - 0.5).astype(np.int64) + 1
+    last = np.floor((z[:, 2] - base) / layer_height - 0.5).astype(np.int64)
+    first = np.maximum(first, 0)
+    last = np.minimum(last, layer_count - 1)
+    counts = np.maximum(last - first + 1, 0)
+    tri_start = np.cumsum(counts) - counts
+
+    # Expand triangle by triangle, then regroup by layer with a stable sort
+    # of small ints; rank maps the expansion's order onto the layers'
+    tri = np.repeat(np.arange(len(tris)), counts)
+    layer = np.arange(len(tri)) - np.repeat(tri_start - first, counts)
+    order = np.argsort(layer.astype(np.int16 if layer_count < 2 ** 15 else np.int32),
+                       kind="stable")
+    rank = np.empty_like(order)
+    rank[order] = np.arange(len(order))
+    tri, layer = tri[order], layer[order]
+    plane = layer_z[layer]
+
+    # Per edge (long, low, high): its upper end and its XY slope per unit Z
+    upper = [2, 1, 2]
+    dz = z[:, upper] - z[:, [0, 0, 1]]
+    slope = (xy[:, upper] - xy[:, [0, 0, 1]]) / np.where(dz > 0, dz, np.inf)[:, :, None]
+    edge_xy = np.concatenate([xy[:, upper], slope.astype(np.float32)], axis=2).reshape(-1, 4)
+    edge_z = z[:, upper].ravel()
+
+    def cut(edge):
+        # Measured down from the upper end, which both faces of an edge share;
+        # a plane through that vertex cuts exactly there
+        drop = np.take(edge_z, edge) - plane
+        drop[drop <= 2 * PLANE_TOLERANCE] = 0.0
+        row = np.take(edge_xy, edge, axis=0)
+        return row[:, :2] - drop.astype(np.float32)[:, None] * row[:, 2:]
+
+    short = np.where(np.take(z[:, 1], tri) >= plane, 1, 2)
+    long_cut = cut(3 * tri)
+    short_cut = cut(3 * tri + short)
+    flip = np.take(reverse, tri)
+    start = np.where(flip[:, None], short_cut, long_cut)
+    end = np.where(flip[:, None], long_cut, short_cut)
+    start_edge = np.where(flip, short, 0)
+    end_edge = np.where(flip, 0, short)
+
+    # The contour goes on in the face across the end edge, at the same layer;
+    # a face wound the other way starts its segment elsewhere and breaks it
+    across = np.take(twin, 3 * tri + end_edge)
+    face = np.maximum(across, 0) // 3
+    face_first = np.take(first, face)
+    linked = (across >= 0) & (face_first <= layer) & (layer <= np.take(last, face))
+    successor = np.take(rank, np.where(linked, np.take(tri_start, face) + layer - face_first, 0))
+    linked &= np.take(start_edge, successor) == across % 3
+    successor = np.where(linked, successor, -1)
+
+    # Cuts through a lone vertex collapse to points; contours pass straight
+    # through them, so they are skipped over and dropped
+    point = (start[:, 0] == end[:, 0]) & (start[:, 1] == end[:, 1])
+    keep = ~point
+    ahead = successor.copy()
+    while True:
+        skip = np.flatnonzero(keep & (ahead >= 0) & point[np.maximum(ahead, 0)])
+        if not len(skip):
+            break
+        ahead[skip] = successor[ahead[skip]]
+    index = np.cumsum(keep) - 1
+    successor = np.where(ahead >= 0, index[ahead], -1)[keep]
+    layer, start, end = layer[keep], start[keep], end[keep]
+    return layer_z, layer, start, end, _join_loose_ends(layer, start, end, successor)
+
+
+def _join_loose_ends(layer, start, end, successor):
+    """Link dead ends to unclaimed segments starting at the same point
+
+    Catches contours through non-manifold or inconsistently wound parts of
+    the mesh, where the edges do not lead on; the rest never gets here.
+    """
+    dead = np.flatnonzero(successor < 0)
+    claimed = np.zeros(len(successor), dtype=bool)
+    claimed[successor[successor >= 0]] = True
+    free = np.flatnonzero(~claimed)
+    if not len(dead) or not len(free):
+        return successor
+
+    points = np.concatenate([end[dead], start[free]]).astype(np.float64)
+    q = np.round(points / CHAIN_TOLERANCE).astype(np.int64)
+    q -= np.array([q[:, 0].min(), q[:, 1].min()])
+    rows = np.column_stack([np.concatenate([layer[dead], layer[free]]), q])
+    key = pack_rows(rows)
+    if key is None:
+        _, key = np.unique(rows, axis=0, return_inverse=True)
+    dead_key, free_key = key[:len(dead)], key[len(dead):]
+
+    # The k-th dead end at a point takes the k-th free segment starting there,
+    # so duplicated faces pair up rather than compete for one successor
+    dead_order = np.argsort(dead_key, kind="stable")
+    free_order = np.argsort(free_key, kind="stable")
+    dead_key, free_key = dead_key[dead_order], free_key[free_order]
+    rank = np.arange(len(dead_key)) - np.searchsorted(dead_key, dead_key)
+    at = np.searchsorted(free_key, dead_key) + rank
+    match = at < len(free_key)
+    match[match] = free_key[at[match]] == dead_key[match]
+    successor = successor.copy()
+    successor[dead[dead_order[match]]] = free[free_order[at[match]]]
+    return successor
+
+
+def chain_contours(successor):
+    """Label segments with contour ids; return (labels, closed flag per segment)
+
+    A contour's label is its lowest segment index, or for an open one the
+    index of its dead end.
+    """
+    count = len(successor)
+    index = np.arange(count)
+
+    # Dead ends point at themselves and start below every closed label, so
+    # the minimum along an open chain is its dead end
+    dead_end = successor < 0
+    pointer = np.where(dead_end, index, successor)
+    label = np.where(dead_end, index - count, index)
+    # Pointer jumping: each pass doubles the stretch of contour a label covers,
+    # and a pass that changes nothing means every label is its orbit's minimum
+    while True:
+        step = np.minimum(label, np.take(label, pointer))
+        if np.array_equal(step, label):
+            break
+        label = step
+        pointer = np.take(pointer, pointer)
+    closed = label >= 0
+    return np.where(closed, label, label + count), closed
+
+
+def _cell_entries(low, high, cell, row_length):
+    """(cell, item) for every grid cell each item's box [low, high] touches
+
+    Boxes must lie at non-negative coordinates.
+    """
+    x0, y0 = (low[:, 0] / cell).astype(np.int64), (low[:, 1] / cell).astype(np.int64)
+    wide = (high[:, 0] / cell).astype(np.int64) - x0
+    tall = (high[:, 1] / cell).astype(np.int64) - y0
+    key = y0 * row_length + x0
+
+    # Boxes no bigger than a cell touch at most 2 x 2 cells
+    small = (wide <= 1) & (tall <= 1)
+    right = np.flatnonzero(small & (wide == 1))
+    up = np.flatnonzero(small & (tall == 1))
+    corner = right[tall[right] == 1]
+    keys = [key, key[right] + 1, key[up] + row_length, key[corner] + row_length + 1]
+    items = [np.arange(len(key)), right, up, corner]
+
+    # Anything longer walks the rest of its box
+    big = np.flatnonzero(~small)
+    if len(big):
+        span_x = wide[big] + 1
+        per_item = span_x * (tall[big] + 1) - 1
+        item = np.repeat(big, per_item)
+        local = 1 + np.arange(len(item)) - np.repeat(np.cumsum(per_item) - per_item, per_item)
+        span_x = np.repeat(span_x, per_item)
+        keys.append(key[item] + (local // span_x) * row_length + local % span_x)
+        items.append(item)
+    return np.concatenate(keys), np.concatenate(items)
+
+
+def min_feature_widths(layer, start, end, layer_count, radius=WIDTH_SEARCH_RADIUS):
+    """Per-layer minimum width of the solid (inf beyond radius)
+
+    From the midpoint of every segment a ray runs along its inward normal,
+    across the solid, to the first boundary it meets: the width of the
+    material there. Walls between an outer contour and its hole are measured
+    like any other, and gaps between separate islands, which lie outside
+    the solid, are never crossed. Segments must be grouped by layer.
+    """
+    widths = np.full(layer_count, np.inf, dtype=np.float32)
+
+    # Segments of zero length have no direction to cast a ray along
+    start, end = start.astype(np.float32), end.astype(np.float32)
+    edge = end - start
+    length = np.hypot(edge[:, 0], edge[:, 1])
+    keep = np.flatnonzero(length > 0)
+    if not len(keep):
+        return widths.astype(np.float64)
+    layer, start, edge = np.take(layer, keep), np.take(start, keep, axis=0), np.take(edge, keep, axis=0)
+    inward = np.stack([-edge[:, 1], edge[:, 0]], axis=1) / np.take(length, keep)[:, None]
+
+    # Shifted so every box starts at a non-negative grid coordinate
+    start = start - np.array([start[:, 0].min(), start[:, 1].min()]) + radius
+    end = start + edge
+    mid = start + edge / 2
+    tip = mid + radius * inward
+    seg_low, seg_high = np.minimum(start, end), np.maximum(start, end)
+    ray_low, ray_high = np.minimum(mid, tip), np.maximum(mid, tip)
+    # Rows gathered once per candidate pair instead of one column at a time
+    segments = np.concatenate([start, edge], axis=1)
+    rays = np.concatenate([mid, inward], axis=1)
+
+    # A ray only leaves the solid through a segment whose inward normal is
+    # over 90° from its own direction, so never through one whose normal
+    # lies in its quadrant, as its smooth neighbours' mostly do
+    quadrant = (inward[:, 1] < 0) * 2 + ((inward[:, 0] < 0) != (inward[:, 1] < 0))
+
+    # Grid cells as big as the search radius, keyed by (layer, cell,
+    # quadrant) over batches of whole layers; segments arrive grouped by
+    # layer, so a batch is a slice
+    row_length = int(seg_high[:, 0].max() // radius) + 2
+    batch_layers = np.unique(np.concatenate([layer[::WIDTH_BATCH], layer[-1:] + 1]))
+    bounds = np.searchsorted(layer, batch_layers)
+    for first, begin, stop in zip(batch_layers, bounds, bounds[1:]):
+        span = slice(begin, stop)
+        cell, seg = _cell_entries(seg_low[span], seg_high[span], radius, row_length)
+        ray_cell, ray = _cell_entries(ray_low[span], ray_high[span], radius, row_length)
+
+        # Number only the cells some segment touches
+        used = np.zeros(max(cell.max(), ray_cell.max()) + 1, dtype=np.int64)
+        used[cell] = 1
+        compact = np.cumsum(used) - 1
+        cells = int(compact[-1]) + 1
+        batch_layer, batch_quadrant = layer[span] - first, quadrant[span]
+        seg_key = (batch_layer[seg] * cells + compact[cell]) * 4 + batch_quadrant[seg]
+        starts = np.zeros(int(batch_layer[-1] + 1) * cells * 4 + 1, dtype=np.int64)
+        starts[1:] = np.cumsum(np.bincount(seg_key, minlength=len(starts) - 1))
+        hits = np.take(segments[span], seg[np.argsort(seg_key, kind="stable")], axis=0)
+
+        # Each ray meets the segments of the three facing quadrants of every
+        # cell its box touches, which are two runs of the sorted segments
+        met = np.flatnonzero(used[ray_cell])
+        ray = ray[met]
+        key = (batch_layer[ray] * cells + compact[ray_cell[met]]) * 4
+        facing = batch_quadrant[ray]
+        lo = np.stack([starts[key], starts[key + facing + 1]], axis=1).ravel()
+        n = np.stack([starts[key + facing], starts[key + 4]], axis=1).ravel() - lo
+        if not n.any():
+            continue
+        per_ray = n[0::2] + n[1::2]
+        hit = np.repeat(lo - (np.cumsum(n) - n), n) + np.arange(int(n.sum()))
+        h = np.take(hits, hit, axis=0)
+        r = np.repeat(np.take(rays[span], ray, axis=0), per_ray, axis=0)
+
+        # Ray mid + s * inward against segment start + t * edge. Exits have
+        # denom > 0, which also rules out the ray's own segment; scaling the
+        # range tests by denom spares a division per pair.
+        ax, ay = h[:, 0] - r[:, 0], h[:, 1] - r[:, 1]
+        denom = r[:, 2] * h[:, 3] - r[:, 3] * h[:, 2]
+        s = ax * h[:, 3] - ay * h[:, 2]
+        t = ax * r[:, 3] - ay * r[:, 2]
+        valid = (denom > 0) & (t >= 0) & (t <= denom) & (s > 0) & (s <= radius * denom)
+        pair_layer = np.repeat(layer[span][ray], per_ray)
+        np.minimum.at(widths, pair_layer[valid], s[valid] / denom[valid])
+    return widths.astype(np.float64)
+
+
+def slice_mesh(triangles, layer_height=DEFAULT_LAYER_HEIGHT):
+    """Per-layer area, contour counts and minimum feature width"""
+    layer_z, layer, start, end, successor = slice_segments(triangles, layer_height)
+    layer_count = len(layer_z)
+
+    # Shoelace over oriented segments gives net solid area without chaining
+    a, b = start.astype(np.float64), end.astype(np.float64)
+    cross = a[:, 0] * b[:, 1] - b[:, 0] * a[:, 1]
+    area = 0.5 * np.bincount(layer, weights=cross, minlength=layer_count)
+
+    # Each contour counts once, at the segment its label names
+    contour, closed = chain_contours(successor)
+    named = contour == np.arange(len(contour))
+    closed_counts = np.bincount(layer[named & closed], minlength=layer_count)
+    open_counts = np.bincount(layer[named & ~closed], minlength=layer_count)
+
+    widths = min_feature_widths(layer, start, end, layer_count)
+
+    return {
+        "z": layer_z,
+        "area": area,
+        "contours": closed_counts,
+        "open_contours": open_counts,
+        "min_width": widths,
+    }
+
+
+def summarize_slices(slices, layer_height=DEFAULT_LAYER_HEIGHT, nozzle=DEFAULT_NOZZLE):
+    """JSON-friendly summary of a slice result for the build report"""
+    widths = slices["min_width"]
+    thin = np.nonzero(widths < nozzle)[0]
+    finite = np.isfinite(widths)
+    narrowest = int(np.argmin(widths)) if finite.any() else None
+    return {
+        "layer_height_mm": layer_height,
+        "nozzle_mm": nozzle,
+        "layers": int(len(slices["z"])),
+        "max_area_mm2": float(slices["area"].max()) if len(slices["z"]) else 0.0,
+        "empty_layers": int(np.count_nonzero(slices["contours"] + slices["open_contours"] == 0)),
+        "open_contour_layers": int(np.count_nonzero(slices["open_contours"])),
+        "max_contours": int(slices["contours"].max()) if len(slices["z"]) else 0,
+        "min_feature_width_mm": float(widths[narrowest]) if narrowest is not None else None,
+        "min_feature_z_mm": float(slices["z"][narrowest]) if narrowest is not None else None,
+        "thin_layers": int(len(thin)),
+        "thin_layer_z_mm": np.round(slices["z"][thin[:20]], 3).tolist(),
+    }
+
+
+def slice_stl(path, layer_height=DEFAULT_LAYER_HEIGHT, nozzle=DEFAULT_NOZZLE):
+    """Slice one STL and summarise it"""
+    return summarize_slices(slice_mesh(read_stl(path), layer_height), layer_height, nozzle)
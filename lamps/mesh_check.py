@@ -0,0 +1,337 @@
+"""
+Printability checks for exported STLs.
+Welds the triangle soup into an indexed mesh, flags open, non-manifold and
+inconsistently wound edges, and finds self-intersections with a bounding volume
+hierarchy so only triangles whose boxes overlap are tested exactly.
+"""
+
+import numpy as np
+
+from mesh_io import read_stl, triangle_normals
+
+# Vertices closer than this (mm) are treated as the same vertex
+WELD_TOLERANCE = 1e-4
+
+# Triangles per BVH leaf
+LEAF_SIZE = 8
+
+# Candidate triangle pairs tested per batch, to bound memory
+PAIR_BATCH = 200000
+
+# Relative tolerance that keeps touching (not crossing) triangles from counting
+INTERSECT_EPS = 1e-9
+
+
+def pack_rows(rows):
+    """One int64 per row of small non-negative ints, ordered like the rows, or None
+
+    np.unique over packed keys is many times faster than with axis=0.
+    """
+    if not len(rows):
+        return None
+    # Column by column: reductions along a short axis 0 are slow
+    span = np.array([column.max() for column in rows.T], dtype=np.int64) + 1
+    if np.prod(span.astype(float)) >= 2.0 ** 63:
+        return None
+    key = np.zeros(len(rows), dtype=np.int64)
+    for column, size in zip(rows.T, span):
+        key = key * size + column
+    return key
+
+
+def unique_rows(rows, **kwargs):
+    """np.unique(rows, axis=0) for non-negative ints, through packed keys when they fit"""
+    key = pack_rows(rows)
+    if key is None:
+        return np.unique(rows, axis=0, **kwargs)
+    return np.unique(key, **kwargs)
+
+
+def weld(triangles, tolerance=WELD_TOLERANCE):
+    """Merge coincident corners; return (vertices, faces) index arrays"""
+    points = np.asarray(triangles, dtype=np.float64).reshape(-1, 3)
+    keys = np.round(points / tolerance).astype(np.int64)
+    if len(keys):
+        keys -= np.array([column.min() for column in keys.T])
+    _, first, inverse = unique_rows(keys, return_index=True, return_inverse=True)
+    return points[first], inverse.reshape(-1, 3)
+
+
+def edge_report(faces):
+    """Count open, non-manifold and inconsistently oriented edges"""
+    directed = np.concatenate([faces[:, [0, 1]], faces[:, [1, 2]], faces[:, [2, 0]]])
+    undirected = np.sort(directed, axis=1)
+    _, counts = unique_rows(undirected, return_counts=True)
+
+    # A consistently wound manifold uses each directed edge exactly once
+    _, directed_counts = unique_rows(directed, return_counts=True)
+
+    return {
+        "edges": int(len(counts)),
+        "open_edges": int(np.count_nonzero(counts == 1)),
+        "nonmanifold_edges": int(np.count_nonzero(counts > 2)),
+        "inconsistent_edges": int(np.count_nonzero(directed_counts > 1)),
+    }
+
+
+def morton_order(centroids):
+    """Sort order of points along a 30-bit Z-order curve"""
+    lo = centroids.min(axis=0)
+    span = np.maximum(centroids.max(axis=0) - lo, 1e-12)
+    grid = ((centroids - lo) / span * 1023).astype(np.uint32)
+
+    def spread(x):
+        x = (x | (x << 16)) & 0x030000FF
+        x = (x | (x << 8)) & 0x0300F00F
+        x = (x | (x << 4)) & 0x030C30C3
+        x = (x | (x << 2)) & 0x09249249
+        return x
+
+    codes = spread(grid[:, 0]) | (spread(grid[:, 1]) << 1) | (spread(grid[:, 2]) << 2)
+    return np.argsort(codes, kind="stable")
+
+
+class BVH:
+    """Complete binary AABB tree over triangles ordered along a Morton curve"""
+
+    def __init__(self, boxes_min, boxes_max, leaf_size=LEAF_SIZE):
+        count = len(boxes_min)
+        self.order = morton_order((boxes_min + boxes_max) / 2)
+        self.leaf_size = leaf_size
+        self.count = count
+
+        leaves = max(1, -(-count // leaf_size))
+        self.depth = int(np.ceil(np.log2(leaves))) if leaves > 1 else 0
+        self.levels = self.node_bounds(boxes_min, boxes_max)
+
+    def node_bounds(self, values_min, values_max):
+        """Per-level (min, max) of per-triangle values over each node's triangles
+
+        levels[d] holds the bounds of the 2**d nodes at depth d; padding nodes
+        get inverted (empty) bounds.
+        """
+        leaves = max(1, -(-self.count // self.leaf_size))
+        padded = 1 << self.depth
+        starts = np.arange(leaves) * self.leaf_size
+        leaf_min = np.full((padded,) + values_min.shape[1:], np.inf)
+        leaf_max = np.full((padded,) + values_max.shape[1:], -np.inf)
+        leaf_min[:leaves] = np.minimum.reduceat(values_min[self.order], starts, axis=0)
+        leaf_max[:leaves] = np.maximum.reduceat(values_max[self.order], starts, axis=0)
+
+        levels = [None] * (self.depth + 1)
+        levels[self.depth] = (leaf_min, leaf_max)
+        for d in range(self.depth - 1, -1, -1):
+            child_min, child_max = levels[d + 1]
+            levels[d] = (np.minimum(child_min[0::2], child_min[1::2]),
+                         np.maximum(child_max[0::2], child_max[1::2]))
+        return levels
+
+    def leaf_triangles(self, leaf):
+        """Triangle indices stored in one leaf"""
+        start = leaf * self.leaf_size
+        return self.order[start:min(start + self.leaf_size, self.count)]
+
+    def self_overlapping_leaves(self):
+        """All leaf pairs (a <= b) whose boxes overlap, by simultaneous descent"""
+        pairs = np.zeros((1, 2), dtype=np.int64)
+        for d in range(1, self.depth + 1):
+            a, b = pairs[:, 0], pairs[:, 1]
+            same = a == b
+            # A node paired with itself spawns (L, L), (L, R) and (R, R)
+            self_a = np.repeat(a[same] * 2, 3) + np.tile([0, 0, 1], same.sum())
+            self_b = np.repeat(a[same] * 2, 3) + np.tile([0, 1, 1], same.sum())
+            # Distinct nodes spawn every child combination
+            cross_a = np.repeat(a[~same] * 2, 4) + np.tile([0, 0, 1, 1], (~same).sum())
+            cross_b = np.repeat(b[~same] * 2, 4) + np.tile([0, 1, 0, 1], (~same).sum())
+            a = np.concatenate([self_a, cross_a])
+            b = np.concatenate([self_b, cross_b])
+
+            node_min, node_max = self.levels[d]
+            overlap = np.all((node_min[a] <= node_max[b]) & (node_min[b] <= node_max[a]), axis=1)
+            pairs = np.stack([a[overlap], b[overlap]], axis=1)
+        return pairs
+
+    def candidate_pairs(self, boxes_min, boxes_max, faces=None):
+        """Yield batches (i, j, corner_i, corner_j) of distinct pairs with overlapping boxes
+
+        Before a leaf pair is expanded, each side keeps only the triangles
+        whose boxes reach into the other leaf's box; most of the 64 slot pairs
+        of two merely touching leaves never get built. Given the faces, pairs
+        of triangles sharing an edge are dropped as well, and corner_i and
+        corner_j name the corner a pair shares (-1 for none, or without faces).
+        """
+        leaf_pairs = self.self_overlapping_leaves()
+        size = self.leaf_size
+        padded_order = np.full(-(-self.count // size) * size, -1, dtype=np.int64)
+        padded_order[:self.count] = self.order
+        # Per-axis bounds in slot order, one contiguous row per axis; padding
+        # slots get empty boxes so they never overlap anything
+        slot_min = np.full((3, len(padded_order)), np.inf)
+        slot_max = np.full((3, len(padded_order)), -np.inf)
+        slot_min[:, :self.count] = boxes_min[self.order].T
+        slot_max[:, :self.count] = boxes_max[self.order].T
+        # Corner indices in slot order, gathered once for the whole mesh;
+        # padding slots get -1, which no real corner matches
+        if faces is not None:
+            slot_corners = np.full((3, len(padded_order)), -1, dtype=np.int64)
+            slot_corners[:, :self.count] = faces[self.order].T
+        leaf_min, leaf_max = self.levels[self.depth]
+        # Within one leaf, take each unordered pair once
+        upper = np.triu(np.ones((size, size), dtype=bool), 1)
+
+        per_batch = max(1, PAIR_BATCH // (size * size))
+        for start in range(0, len(leaf_pairs), per_batch):
+            a, b = leaf_pairs[start:start + per_batch].T
+            slots_a = a[:, None] * size + np.arange(size)
+            slots_b = b[:, None] * size + np.arange(size)
+            reach_a = np.ones(slots_a.shape, dtype=bool)
+            reach_b = np.ones(slots_b.shape, dtype=bool)
+            for axis in range(3):
+                low, high = slot_min[axis], slot_max[axis]
+                reach_a &= ((low[slots_a] <= leaf_max[b, axis, None])
+                            & (high[slots_a] >= leaf_min[b, axis, None]))
+                reach_b &= ((low[slots_b] <= leaf_max[a, axis, None])
+                            & (high[slots_b] >= leaf_min[a, axis, None]))
+            slots = reach_a[:, :, None] & reach_b[:, None, :]
+            slots[a == b] &= upper
+            pair, slot_i, slot_j = np.nonzero(slots)
+            i = a[pair] * size + slot_i
+            j = b[pair] * size + slot_j
+
+            keep = np.ones(len(i), dtype=bool)
+            for axis in range(3):
+                low, high = slot_min[axis], slot_max[axis]
+                keep &= (low[i] <= high[j]) & (low[j] <= high[i])
+            i, j = i[keep], j[keep]
+            corner_i = np.full(len(i), -1, dtype=np.int8)
+            corner_j = np.full(len(i), -1, dtype=np.int8)
+            if faces is not None:
+                shared = np.zeros(len(i), dtype=np.int8)
+                corners_j = [slot_corners[y][j] for y in range(3)]
+                for x in range(3):
+                    corner = slot_corners[x][i]
+                    for y in range(3):
+                        same = corner == corners_j[y]
+                        shared += same
+                        corner_i[same] = x
+                        corner_j[same] = y
+                apart = shared < 2
+                i, j, corner_i, corner_j = i[apart], j[apart], corner_i[apart], corner_j[apart]
+            yield padded_order[i], padded_order[j], corner_i, corner_j
+
+
+def segments_cross_triangles(p0, p1, tris):
+    """Vectorised Möller–Trumbore: does segment p0->p1 pierce the triangle interior?"""
+    direction = p1 - p0
+    e1 = tris[:, 1] - tris[:, 0]
+    e2 = tris[:, 2] - tris[:, 0]
+    h = np.cross(direction, e2)
+    det = np.einsum("ij,ij->i", e1, h)
+    scale = np.linalg.norm(e1, axis=1) * np.linalg.norm(e2, axis=1) * np.linalg.norm(direction, axis=1)
+    valid = np.abs(det) > INTERSECT_EPS * np.maximum(scale, 1e-30)
+    inv = np.divide(1.0, det, out=np.zeros_like(det), where=valid)
+
+    s = p0 - tris[:, 0]
+    u = np.einsum("ij,ij->i", s, h) * inv
+    q = np.cross(s, e1)
+    v = np.einsum("ij,ij->i", direction, q) * inv
+    t = np.einsum("ij,ij->i", e2, q) * inv
+
+    eps = 1e-7
+    return (valid & (u > eps) & (v > eps) & (u + v < 1 - eps)
+            & (t > eps) & (t < 1 - eps))
+
+
+def triangles_intersect(ta, tb):
+    """Pairwise intersection test between two aligned stacks of triangles"""
+    hit = np.zeros(len(ta), dtype=bool)
+    for first, second in ((ta, tb), (tb, ta)):
+        # An edge can only pierce the other triangle if its ends lie strictly
+        # on opposite sides of that triangle's plane
+        normal = np.cross(second[:, 1] - second[:, 0], second[:, 2] - second[:, 0])
+        side = np.einsum("ijk,ik->ij", first - second[:, :1], normal)
+        for k in range(3):
+            edge = np.nonzero((side[:, k] * side[:, (k + 1) % 3] < 0) & ~hit)[0]
+            hit[edge] = segments_cross_triangles(first[edge, k], first[edge, (k + 1) % 3],
+                                                 second[edge])
+    return hit
+
+
+def far_edges_intersect(vertices, faces, normals, i, j, corner_i, corner_j):
+    """Do faces i and j, meeting only at corner_i of i and corner_j of j, cross?
+
+    Past the shared vertex they can only cross where the edge opposite it in
+    one triangle pierces the other.
+    """
+    hit = np.zeros(len(i), dtype=bool)
+    # np.take gathers rows several times faster than fancy indexing
+    corners = faces.ravel()
+    shared = np.take(vertices, corners[3 * i + corner_i], axis=0)
+    for first, second, corner in ((i, j, corner_i), (j, i, corner_j)):
+        p0 = np.take(vertices, corners[3 * first + (corner + 1) % 3], axis=0)
+        p1 = np.take(vertices, corners[3 * first + (corner + 2) % 3], axis=0)
+        # The shared vertex lies on the other triangle's plane
+        normal = np.take(normals, second, axis=0)
+        side0 = np.einsum("ij,ij->i", p0 - shared, normal)
+        side1 = np.einsum("ij,ij->i", p1 - shared, normal)
+        edge = np.nonzero((side0 * side1 < 0) & ~hit)[0]
+        hit[edge] = segments_cross_triangles(p0[edge], p1[edge], vertices[faces[second[edge]]])
+    return hit
+
+
+def find_self_intersections(vertices, faces):
+    """Pairs of non-adjacent triangles that cross each other"""
+    tris = vertices[faces]
+    boxes_min = tris.min(axis=1)
+    boxes_max = tris.max(axis=1)
+    bvh = BVH(boxes_min, boxes_max)
+    normals = triangle_normals(tris)
+
+    found = []
+    # Triangles sharing an edge meet by construction; the BVH skips them
+    for i, j, corner_i, corner_j in bvh.candidate_pairs(boxes_min, boxes_max, faces):
+        hit = np.zeros(len(i), dtype=bool)
+        apart = np.nonzero(corner_i < 0)[0]
+        hit[apart] = triangles_intersect(np.take(tris, i[apart], axis=0),
+                                         np.take(tris, j[apart], axis=0))
+        touching = np.nonzero(corner_i >= 0)[0]
+        hit[touching] = far_edges_intersect(vertices, faces, normals, i[touching], j[touching],
+                                            corner_i[touching], corner_j[touching])
+        found.append(np.stack([i[hit], j[hit]], axis=1))
+    if not found:
+        return np.zeros((0, 2), dtype=np.int64)
+    return np.concatenate(found)
+
+
+def check_mesh(triangles, find_intersections=True):
+    """Run every validity check on a triangle array and summarise the result"""
+    triangles = np.asarray(triangles, dtype=np.float64)
+    vertices, faces = weld(triangles)
+
+    areas = 0.5 * np.linalg.norm(triangle_normals(triangles), axis=1)
+    degenerate = (areas <= 1e-12) | (faces[:, 0] == faces[:, 1]) \
+        | (faces[:, 1] == faces[:, 2]) | (faces[:, 2] == faces[:, 0])
+    good_faces = faces[~degenerate]
+
+    result = {"vertices": int(len(vertices)), "triangles": int(len(faces)),
+              "degenerate_triangles": int(np.count_nonzero(degenerate))}
+    result.update(edge_report(good_faces))
+
+    if find_intersections and len(good_faces):
+        pairs = find_self_intersections(vertices, good_faces)
+        result["self_intersections"] = int(len(pairs))
+        # A few locations to look at in a viewer
+        centres = vertices[good_faces[pairs[:5, 0]]].mean(axis=1)
+        result["intersection_examples"] = np.round(centres, 3).tolist()
+    else:
+        result["self_intersections"] = None
+
+    result["watertight"] = result["open_edges"] == 0 and result["nonmanifold_edges"] == 0
+    result["ok"] = (result["watertight"] and result["inconsistent_edges"] == 0
+                    and not result["self_intersections"])
+    return result
+
+
+def check_stl(path, find_intersections=True):
+    """Validity report for one STL file"""
+    return check_mesh(read_stl(path), find_intersections)
@@ -0,0 +1,125 @@
+"""
+STL reading, writing and geometry hashing for the post-export stages.
+Binary STLs are memory-mapped straight into a (n, 3, 3) NumPy triangle array;
+ASCII STLs are parsed with a single regex pass.
+"""
+
+import hashlib
+import os
+import re
+
+import numpy as np
+
+# Binary STL record: normal, three vertices, attribute byte count
+STL_RECORD = np.dtype([
+    ("normal", "<f4", (3,)),
+    ("vertices", "<f4", (3, 3)),
+    ("attr", "<u2"),
+])
+STL_HEADER_SIZE = 84
+
+# Decimal places kept when comparing or canonicalising geometry (0.1 µm)
+DEFAULT_DECIMALS = 4
+
+_ASCII_VERTEX = re.compile(
+    rb"vertex\s+([-+0-9.eE]+)\s+([-+0-9.eE]+)\s+([-+0-9.eE]+)")
+
+
+def is_binary_stl(path):
+    """True if the file size matches the binary layout its header announces"""
+    size = os.path.getsize(path)
+    if size < STL_HEADER_SIZE:
+        return False
+    with open(path, "rb") as f:
+        f.seek(80)
+        count = int(np.frombuffer(f.read(4), dtype="<u4")[0])
+    return size == STL_HEADER_SIZE + count * STL_RECORD.itemsize
+
+
+def read_stl(path):
+    """Return the triangles of an STL file as a float32 array of shape (n, 3, 3)"""
+    if is_binary_stl(path):
+        if os.path.getsize(path) == STL_HEADER_SIZE:
+            return np.zeros((0, 3, 3), dtype=np.float32)
+        records = np.memmap(path, dtype=STL_RECORD, mode="r", offset=STL_HEADER_SIZE)
+        return records["vertices"]
+
+    with open(path, "rb") as f:
+        content = f.read()
+    coords = np.array(_ASCII_VERTEX.findall(content), dtype=np.float32)
+    if len(coords) % 3:
+        raise ValueError(f"{path}: ASCII STL vertex count is not a multiple of 3")
+    return coords.reshape(-1, 3, 3)
+
+
+def triangle_normals(triangles):
+    """Unnormalised face normals (length = twice the triangle area)"""
+    tris = np.asarray(triangles, dtype=np.float64)
+    return np.cross(tris[:, 1] - tris[:, 0], tris[:, 2] - tris[:, 0])
+
+
+def write_stl(path, triangles, header=b"Binary STL"):
+    """Write triangles (n, 3, 3) as a binary STL with computed unit normals"""
+    tris = np.asarray(triangles, dtype=np.float32)
+    normals = triangle_normals(tris)
+    lengths = np.linalg.norm(normals, axis=1, keepdims=True)
+    normals = np.divide(normals, lengths, out=np.zeros_like(normals), where=lengths > 0) + 0.0
+
+    records = np.zeros(len(tris), dtype=STL_RECORD)
+    records["normal"] = normals
+    records["vertices"] = tris
+    with open(path, "wb") as f:
+        f.write(header[:80].ljust(80, b"\0"))
+        f.write(np.uint32(len(tris)).tobytes())
+        f.write(records.tobytes())
+
+
+def canonical_triangles(triangles, decimals=DEFAULT_DECIMALS):
+    """Order-independent form of a triangle soup
+
+    Coordinates are rounded and -0.0 folded into 0.0, each triangle is rotated
+    (keeping its winding) to start at its lexicographically smallest vertex,
+    and triangles are sorted.
+    """
+    tris = np.round(np.asarray(triangles, dtype=np.float64), decimals) + 0.0
+    if len(tris) == 0:
+        return tris.reshape(0, 3, 3)
+
+    def less(a, b):
+        return ((a[:, 0] < b[:, 0])
+                | ((a[:, 0] == b[:, 0]) & ((a[:, 1] < b[:, 1])
+                                           | ((a[:, 1] == b[:, 1]) & (a[:, 2] < b[:, 2])))))
+
+    rows = np.arange(len(tris))
+    first = np.zeros(len(tris), dtype=np.int64)
+    for k in (1, 2):
+        first = np.where(less(tris[:, k], tris[rows, first]), k, first)
+    rotation = (first[:, None] + np.arange(3)[None, :]) % 3
+    tris = tris[rows[:, None], rotation]
+
+    flat = tris.reshape(-1, 9)
+    order = np.lexsort(flat.T[::-1])
+    return tris[order]
+
+
+def canonical_header(decimals):
+    """Fixed 80-byte header for canonical STLs; depends only on the precision"""
+    return f"Canonical binary STL, {decimals} decimals".encode("ascii")
+
+
+def canonicalize_stl(path, decimals=DEFAULT_DECIMALS):
+    """Rewrite an STL in place so identical geometry gives identical bytes
+
+    The triangles are put in canonical form (see canonical_triangles) and
+    written as binary STL with a fixed header, whatever the exporter wrote.
+    Returns the triangle count.
+    """
+    tris = canonical_triangles(read_stl(path), decimals)
+    write_stl(path, tris, header=canonical_header(decimals))
+    return len(tris)
+
+
+def geometry_hash(triangles, decimals=DEFAULT_DECIMALS):
+    """SHA-256 of the canonical geometry, unaffected by file headers or triangle order"""
+    canonical = canonical_triangles(triangles, decimals)
+    return hashlib.sha256(np.ascontiguousarray(canonical, dtype="<f8").tobytes()).hexdigest()
@@ -0,0 +1,68 @@
+"""
+Material estimates for exported STLs.
+Computes volume, surface area and bounding box with vectorised NumPy over the
+triangle array, then converts the volume into filament weight, length and cost.
+"""
+
+import math
+
+import numpy as np
+
+from mesh_io import read_stl, triangle_normals
+
+# Defaults for PLA on a 1.75 mm printer
+DEFAULT_DENSITY = 1.24  # g/cm³
+DEFAULT_DIAMETER = 1.75  # mm
+DEFAULT_COST_PER_KG = 20.0  # currency units per kg of filament
+
+
+def mesh_stats(triangles):
+    """Signed volume (mm³), surface area (mm²) and bounding box of a triangle array"""
+    tris = np.asarray(triangles, dtype=np.float64)
+    if len(tris) == 0:
+        return {"triangles": 0, "volume_mm3": 0.0, "area_mm2": 0.0,
+                "bbox_min": [0.0, 0.0, 0.0], "bbox_max": [0.0, 0.0, 0.0],
+                "size_mm": [0.0, 0.0, 0.0]}
+
+    # Divergence theorem: sum of signed tetrahedra against the origin
+    volume = np.einsum("ij,ij->", tris[:, 0], np.cross(tris[:, 1], tris[:, 2])) / 6.0
+    area = 0.5 * np.linalg.norm(triangle_normals(tris), axis=1).sum()
+
+    points = tris.reshape(-1, 3)
+    bbox_min = points.min(axis=0)
+    bbox_max = points.max(axis=0)
+
+    return {
+        "triangles": int(len(tris)),
+        "volume_mm3": float(volume),
+        "area_mm2": float(area),
+        "bbox_min": bbox_min.tolist(),
+        "bbox_max": bbox_max.tolist(),
+        "size_mm": (bbox_max - bbox_min).tolist(),
+    }
+
+
+def filament_estimate(volume_mm3, density=DEFAULT_DENSITY, diameter=DEFAULT_DIAMETER,
+                      cost_per_kg=DEFAULT_COST_PER_KG):
+    """Filament grams, metres and cost needed to print a solid of the given volume"""
+    volume_mm3 = abs(volume_mm3)
+    grams = volume_mm3 / 1000.0 * density
+    cross_section = math.pi * (diameter / 2.0) ** 2
+    return {
+        "density_g_cm3": density,
+        "diameter_mm": diameter,
+        "grams": grams,
+        "metres": volume_mm3 / cross_section / 1000.0,
+        "cost_per_kg": cost_per_kg,
+        "cost": grams / 1000.0 * cost_per_kg,
+    }
+
+
+def analyze_stl(path, density=DEFAULT_DENSITY, diameter=DEFAULT_DIAMETER,
+                cost_per_kg=DEFAULT_COST_PER_KG):
+    """Geometry statistics plus filament estimate for one STL file"""
+    stats = mesh_stats(read_stl(path))
+    # A negative volume means the shell's normals point inwards
+    stats["inverted"] = stats["volume_mm3"] < 0
+    stats["filament"] = filament_estimate(stats["volume_mm3"], density, diameter, cost_per_kg)
+    return stats
@@ -0,0 +1,158 @@
+"""
+Operator profiler for the lamp scripts (runs inside Blender).
+A script opts in by calling profile_ops() before its first operator. From then
+on every bpy.ops call is counted and timed, with the active mesh's vertex and
+face counts before and after it, and modifier applies are also tallied by
+modifier type. When Blender exits the profile is written as JSON to the path
+in $LAMP_OPS_PROFILE, which build_all_lamps.py sets for each script.
+"""
+
+import atexit
+import json
+import os
+import time
+
+import bpy
+
+# The profile being recorded and the real bpy.ops it wraps
+_active = None
+
+
+def _mesh_counts():
+    """(vertices, faces) of the active mesh object, or None
+
+    Counts come from object-mode mesh data, so in edit mode they show the
+    mesh as it was when edit mode was entered.
+    """
+    obj = bpy.context.view_layer.objects.active
+    if obj is None or getattr(obj, "type", None) != 'MESH':
+        return None
+    return len(obj.data.vertices), len(obj.data.polygons)
+
+
+def _modifier_type(kwargs):
+    """Type of the modifier an object.modifier_apply call targets"""
+    obj = bpy.context.view_layer.objects.active
+    name = kwargs.get("modifier")
+    modifier = obj.modifiers.get(name) if obj is not None and name else None
+    return modifier.type if modifier is not None else None
+
+
+class _ProfiledOperator:
+    def __init__(self, operator, idname, profile):
+        self._operator = operator
+        self._idname = idname
+        self._profile = profile
+
+    def __call__(self, *args, **kwargs):
+        modifier = _modifier_type(kwargs) if self._idname == "object.modifier_apply" else None
+        before = _mesh_counts()
+        start = time.perf_counter()
+        ok = False
+        try:
+            result = self._operator(*args, **kwargs)
+            ok = True
+            return result
+        finally:
+            seconds = time.perf_counter() - start
+            self._profile.record(self._idname, seconds, ok, before, _mesh_counts(), modifier)
+
+    def __getattr__(self, name):
+        # poll(), get_rna_type() and friends go straight to the operator
+        return getattr(self._operator, name)
+
+
+class _ProfiledModule:
+    def __init__(self, module, name, profile):
+        self._module = module
+        self._name = name
+        self._profile = profile
+
+    def __getattr__(self, name):
+        operator = getattr(self._module, name)
+        return _ProfiledOperator(operator, f"{self._name}.{name}", self._profile)
+
+
+class _ProfiledOps:
+    def __init__(self, ops, profile):
+        self._ops = ops
+        self._profile = profile
+
+    def __getattr__(self, name):
+        return _ProfiledModule(getattr(self._ops, name), name, self._profile)
+
+
+class OpsProfile:
+    """Operator calls recorded for one script run"""
+
+    def __init__(self, path, ops):
+        self.path = path
+        self.ops = ops
+        self.start = time.perf_counter()
+        self.calls = []
+
+    def record(self, idname, seconds, ok, before, after, modifier):
+        call = {"op": idname, "seconds": seconds, "ok": ok}
+        if before is not None:
+            call["vertices_before"], call["faces_before"] = before
+        if after is not None:
+            call["vertices_after"], call["faces_after"] = after
+        if modifier is not None:
+            call["modifier"] = modifier
+        self.calls.append(call)
+
+    def summary(self):
+        """Per-operator and per-modifier totals plus the raw call list"""
+        operators, modifiers = {}, {}
+        for call in self.calls:
+            for table, key in ((operators, call["op"]), (modifiers, call.get("modifier"))):
+                if key is None:
+                    continue
+                entry = table.setdefault(key, {"count": 0, "seconds": 0.0, "max_seconds": 0.0})
+                entry["count"] += 1
+                entry["seconds"] += call["seconds"]
+                entry["max_seconds"] = max(entry["max_seconds"], call["seconds"])
+        return {
+            "script_seconds": time.perf_counter() - self.start,
+            "ops_seconds": sum(call["seconds"] for call in self.calls),
+            "calls": self.calls,
+            "operators": operators,
+            "modifiers": modifiers,
+        }
+
+    def write(self):
+        """Save the profile as JSON"""
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        with open(self.path, "w") as f:
+            json.dump(self.summary(), f, indent=2)
+
+
+def _finish():
+    global _active
+    if _active is None:
+        return
+    bpy.ops = _active.ops
+    try:
+        _active.write()
+    except IOError as e:
+        print(f"Warning: Could not write operator profile to {_active.path} ({e})")
+    _active = None
+
+
+def profile_ops(path=None):
+    """Start profiling bpy.ops; returns False when no profile path is set
+
+    The path defaults to $LAMP_OPS_PROFILE. Calling it again finishes the
+    current profile and starts a new one.
+    """
+    global _active
+    path = path or os.environ.get("LAMP_OPS_PROFILE")
+    _finish()
+    if not path:
+        return False
+    _active = OpsProfile(path, bpy.ops)
+    bpy.ops = _ProfiledOps(_active.ops, _active)
+    return True
+
+
+atexit.register(_finish)
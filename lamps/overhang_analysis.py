@@ -0,0 +1,106 @@
+"""
+Overhang and support analysis for exported STLs.
+For a set of candidate print orientations, sums the area of faces that hang
+past a given angle from vertical (ignoring faces resting on the bed) and picks
+the orientation that needs the least support. All per-face work is vectorised
+NumPy; only the handful of candidate orientations is looped over.
+"""
+
+import itertools
+
+import numpy as np
+
+from mesh_io import read_stl, triangle_normals
+
+DEFAULT_OVERHANG_ANGLE = 45.0  # degrees from vertical a printer can bridge unsupported
+
+# Faces within this distance (mm) of the lowest point sit on the bed
+BED_TOLERANCE = 0.05
+# Faces whose normal is within this cosine of straight down count as flat
+FLAT_COS = 0.999
+
+# Vertices projected onto all candidates per batch; bounds peak memory
+CHUNK_POINTS = 1 << 18
+
+
+def candidate_orientations():
+    """26 up directions: the axes, the edge diagonals and the corner diagonals
+
+    Returns (labels, unit vectors). A label such as '+X-Z' names the model
+    direction that should point up on the printer; '+Z' is the orientation the
+    model was built in.
+    """
+    labels, vectors = [], []
+    for v in itertools.product((0, 1, -1), repeat=3):
+        if not any(v):
+            continue
+        labels.append("".join(f"{'+' if c > 0 else '-'}{axis}"
+                              for axis, c in zip("XYZ", v) if c))
+        vectors.append(v)
+    vectors = np.array(vectors, dtype=np.float64)
+    return labels, vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def overhang_areas(triangles, ups, angle=DEFAULT_OVERHANG_ANGLE):
+    """Overhang area (mm²) and build height (mm) for each up vector in `ups`
+
+    Also returns the total surface area so callers can express overhang as a
+    fraction of it.
+    """
+    tris = np.asarray(triangles, dtype=np.float32)
+    ups = np.asarray(ups, dtype=np.float32)
+    normals = triangle_normals(tris)
+    double_area = np.linalg.norm(normals, axis=1)
+    unit = np.divide(normals, double_area[:, None], out=np.zeros_like(normals),
+                     where=double_area[:, None] > 0).astype(np.float32)
+    area = 0.5 * double_area
+
+    # A face needs support when its normal is within (90° - angle) of straight
+    # down; faces right at the limit print fine, so allow for float32 rounding
+    limit = np.sin(np.radians(angle)) + 1e-6
+    facing_down = -ups @ unit.T
+
+    # Extent along every candidate at once, in chunks to bound memory
+    points = tris.reshape(-1, 3)
+    low = np.full(len(ups), np.inf, dtype=np.float32)
+    high = np.full(len(ups), -np.inf, dtype=np.float32)
+    for i in range(0, len(points), CHUNK_POINTS):
+        heights = ups @ points[i:i + CHUNK_POINTS].T
+        low = np.minimum(low, heights.min(axis=1))
+        high = np.maximum(high, heights.max(axis=1))
+    height = np.maximum(high - low, 0).astype(np.float64)
+
+    overhang = np.zeros(len(ups))
+    for k, up in enumerate(ups):
+        overhang[k] = area @ (facing_down[k] > limit)
+        # Only faces lying flat can rest on the bed, so just those need the
+        # per-vertex height test
+        flat = np.nonzero(facing_down[k] > FLAT_COS)[0]
+        on_bed = flat[(tris[flat] @ up).max(axis=1) <= low[k] + BED_TOLERANCE]
+        overhang[k] -= area[on_bed].sum()
+    return overhang, height, float(area.sum())
+
+
+def analyze_overhangs(triangles, angle=DEFAULT_OVERHANG_ANGLE):
+    """Overhang area for every candidate orientation plus the best one"""
+    labels, ups = candidate_orientations()
+    overhang, height, total = overhang_areas(triangles, ups, angle)
+    candidates = [{"up": label,
+                   "vector": np.round(up, 4).tolist(),
+                   "overhang_mm2": float(o),
+                   "overhang_fraction": float(o / total) if total else 0.0,
+                   "height_mm": float(h)}
+                  for label, up, o, h in zip(labels, ups, overhang, height)]
+    # Least support first; lower prints win ties
+    ranked = sorted(candidates, key=lambda c: (round(c["overhang_mm2"], 1), c["height_mm"]))
+    return {
+        "overhang_angle_deg": angle,
+        "as_built": candidates[labels.index("+Z")],
+        "best": ranked[0],
+        "candidates": ranked,
+    }
+
+
+def analyze_stl(path, angle=DEFAULT_OVERHANG_ANGLE):
+    """Overhang analysis for one STL file"""
+    return analyze_overhangs(read_stl(path), angle)
@@ -0,0 +1,67 @@
+import bpy
+import os
+import sys
+
+# Shared helpers live next to this script
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+from stl_export import export_stl
+from ops_profiler import profile_ops
+from perforation import perforated_shade
+
+# Count and time every operator when the build asks for a profile
+profile_ops()
+
+# Shade outline; sizes match the solid shades they replace
+SHAPES = {
+    "cylinder": ("cylinder", 90, 90, 100),    # cylindrical_lamp_shade wall
+    "rectangular": ("box", 100, 100, 180),   # rectangular_lamp_shade
+    "cube": ("box", 200, 200, 200),          # simple_lamp_cube
+}
+SHAPE = "cube"
+
+# Perforation grid
+HOLE_PITCH = 4.0      # mm between hole centres
+HOLE_SIZE = 2.4       # mm across each hole
+HOLE_SIDES = 8        # corners per hole; a multiple of 8
+MARGIN_ROWS = 1       # solid rows of cells at the top and bottom edges
+WALL_THICKNESS = 1.5  # mm
+
+# Set up the scene for mm
+bpy.context.scene.unit_settings.system = 'METRIC'
+bpy.context.scene.unit_settings.scale_length = 0.001
+bpy.context.scene.unit_settings.length_unit = 'MILLIMETERS'
+
+# Clear existing objects
+bpy.ops.object.select_all(action='SELECT')
+bpy.ops.object.delete()
+
+# Create a perforated shade wall straight from vertex and face arrays; the
+# generator closes every hole and both rims, so no booleans or solidify needed
+def create_perforated_lamp():
+    shape, width, depth, height = SHAPES[SHAPE]
+    verts, quads, holes = perforated_shade(
+        shape, width, depth, height,
+        pitch=HOLE_PITCH, hole_size=HOLE_SIZE, thickness=WALL_THICKNESS,
+        margin_rows=MARGIN_ROWS, subdivisions=HOLE_SIDES // 4,
+    )
+    mesh = bpy.data.meshes.new("PerforatedWall")
+    mesh.from_pydata(verts.tolist(), [], quads.tolist())
+    mesh.update()
+    lamp = bpy.data.objects.new("PerforatedLampShade", mesh)
+    bpy.context.collection.objects.link(lamp)
+    return lamp, holes
+
+# Create lamp shade
+lamp_shade, hole_count = create_perforated_lamp()
+
+# Export to STL
+export_filepath = "/Users/stoklosa/Documents/StokApps/3D-print-designs/lamps/STLs/perforated_shade.stl"
+export_filepath = export_stl(lamp_shade, export_filepath)
+
+_, width, depth, height = SHAPES[SHAPE]
+print("Perforated lamp shade created with dimensions:")
+print(f"  - {SHAPE} outline, {width}mm x {depth}mm x {height}mm")
+print(f"  - Open top and bottom")
+print(f"  - Wall thickness: {WALL_THICKNESS}mm")
+print(f"  - {hole_count} holes, {HOLE_SIZE}mm across on a {HOLE_PITCH}mm grid")
+print(f"Exported to: {export_filepath}")
@@ -0,0 +1,172 @@
+"""
+Perforated wall generator for lamp shades.
+Builds a tube wall with a grid of polygonal holes directly as vertex and quad
+arrays, with no boolean modifiers. The wall is laid out in cell coordinates
+first: every cell shares the vertices on its border with its neighbours, so
+the solid is watertight by construction. It is then wrapped around a cylinder
+or a box. Everything is batched NumPy, so cost and memory grow linearly with
+the number of holes.
+Runs inside Blender (which bundles NumPy) as well as standalone.
+"""
+
+import math
+
+import numpy as np
+
+# Lattice steps per cell side; the cell border and each hole have 4 * this
+# many vertices. Must be even so a border vertex sits level with the centre.
+DEFAULT_SUBDIVISIONS = 2
+
+
+def _border_offsets(k):
+    """(da, db) lattice offsets of a cell border, counter-clockwise from the right middle"""
+    half = k // 2
+    offsets = ([(k, half + i) for i in range(k - half)]
+               + [(k - i, k) for i in range(k)]
+               + [(0, k - i) for i in range(k)]
+               + [(i, 0) for i in range(k)]
+               + [(k, i) for i in range(half)])
+    return np.array(offsets, dtype=np.int64)
+
+
+def perforated_panel(columns, rows, hole_fraction=0.6, margin_rows=1,
+                     subdivisions=DEFAULT_SUBDIVISIONS):
+    """Closed perforated band in cell coordinates
+
+    The band wraps around in u (`columns` cells) and is `rows` cells tall; the
+    bottom and top `margin_rows` rows stay solid. Returns (uvw, quads, holes):
+    uvw holds (u, v, side) per vertex with u and v in cells and side +1 on the
+    outer face and -1 on the inner one, and quads wind counter-clockwise
+    seen from outside the solid.
+    """
+    k = subdivisions
+    if k < 2 or k % 2:
+        raise ValueError("subdivisions must be an even number of at least 2")
+    if not 0 < hole_fraction < 1:
+        raise ValueError("hole_fraction must be between 0 and 1")
+    ring = 4 * k
+    lattice_u, lattice_v = columns * k, rows * k + 1
+
+    # Lattice vertices exist only on cell borders; number them densely
+    a, b = np.meshgrid(np.arange(lattice_u), np.arange(lattice_v), indexing="ij")
+    used = (a % k == 0) | (b % k == 0)
+    lattice_id = np.full(used.shape, -1, dtype=np.int64)
+    lattice_id[used] = np.arange(np.count_nonzero(used))
+    lattice_count = int(np.count_nonzero(used))
+    lattice_uv = np.stack([a[used], b[used]], axis=1) / k
+
+    # Every cell's border ring as lattice ids, wrapping around in u
+    ci, cj = np.meshgrid(np.arange(columns), np.arange(rows), indexing="ij")
+    ci, cj = ci.ravel(), cj.ravel()
+    offsets = _border_offsets(k)
+    border = lattice_id[(ci[:, None] * k + offsets[:, 0]) % lattice_u,
+                        cj[:, None] * k + offsets[:, 1]]
+
+    holed = (cj >= margin_rows) & (cj < rows - margin_rows)
+    hole_cells = np.nonzero(holed)[0]
+    solid_cells = np.nonzero(~holed)[0]
+    holes = len(hole_cells)
+
+    # Extra vertices per layer: a hole ring per holed cell, a centre per solid one
+    angle = 2.0 * math.pi * np.arange(ring) / ring
+    centre_u = ci + 0.5
+    centre_v = cj + 0.5
+    hole_uv = np.stack([
+        centre_u[hole_cells, None] + 0.5 * hole_fraction * np.cos(angle),
+        centre_v[hole_cells, None] + 0.5 * hole_fraction * np.sin(angle),
+    ], axis=-1).reshape(-1, 2)
+    centre_uv = np.stack([centre_u[solid_cells], centre_v[solid_cells]], axis=1)
+    layer_uv = np.concatenate([lattice_uv, hole_uv, centre_uv])
+    layer = len(layer_uv)
+    hole_ring = lattice_count + np.arange(holes * ring).reshape(holes, ring)
+    centre = lattice_count + holes * ring + np.arange(len(solid_cells))
+
+    m = np.arange(ring)
+    m_next = (m + 1) % ring
+    quads = []
+    # Outer face around holes: border edge out, hole edge back
+    outer = border[hole_cells]
+    face = np.stack([outer[:, m], outer[:, m_next], hole_ring[:, m_next], hole_ring[:, m]], axis=-1)
+    quads += [face.reshape(-1, 4), face.reshape(-1, 4)[:, ::-1] + layer]
+    # Hole walls facing the hole's axis
+    wall = np.stack([hole_ring[:, m], hole_ring[:, m_next],
+                     hole_ring[:, m_next] + layer, hole_ring[:, m] + layer], axis=-1)
+    quads.append(wall.reshape(-1, 4))
+    # Solid cells: quads fanning from the centre, two border edges each
+    solid = border[solid_cells]
+    even = np.arange(0, ring, 2)
+    face = np.stack([solid[:, even], solid[:, (even + 1) % ring],
+                     solid[:, (even + 2) % ring],
+                     np.repeat(centre[:, None], len(even), axis=1)], axis=-1)
+    quads += [face.reshape(-1, 4), face.reshape(-1, 4)[:, ::-1] + layer]
+    # Bottom and top rims join the outer and inner layers
+    for row, flip in ((0, False), (lattice_v - 1, True)):
+        edge = lattice_id[:, row]
+        rim = np.stack([edge, edge + layer, np.roll(edge, -1) + layer, np.roll(edge, -1)], axis=1)
+        quads.append(rim[:, ::-1] if flip else rim)
+
+    uvw = np.concatenate([np.column_stack([layer_uv, np.ones(layer)]),
+                          np.column_stack([layer_uv, -np.ones(layer)])])
+    return uvw, np.concatenate(quads), holes
+
+
+def wrap_cylinder(uvw, columns, rows, radius, height, thickness):
+    """Map panel coordinates onto a cylinder wall centred on the Z axis"""
+    theta = 2.0 * math.pi * uvw[:, 0] / columns
+    r = radius + 0.5 * thickness * uvw[:, 2]
+    return np.column_stack([r * np.cos(theta), r * np.sin(theta), uvw[:, 1] * height / rows])
+
+
+def wrap_box(uvw, side_columns, rows, width, depth, height, thickness):
+    """Map panel coordinates onto a rectangular tube centred on the Z axis
+
+    `side_columns` gives the cells along each of the four sides, counter-clockwise
+    from the front. Cells never straddle a corner, and corner vertices are
+    mitred so the inner and outer faces stay flat.
+    """
+    hw, hd = width / 2.0, depth / 2.0
+    corners = np.array([[-hw, -hd], [hw, -hd], [hw, hd], [-hw, hd], [-hw, -hd]])
+    breaks = np.concatenate([[0], np.cumsum(side_columns)])
+    u = uvw[:, 0] % breaks[-1]
+    x = np.interp(u, breaks, corners[:, 0])
+    y = np.interp(u, breaks, corners[:, 1])
+
+    # Outward normal of the side each vertex lies on; corners take both sides
+    side = np.clip(np.searchsorted(breaks, u, side="right") - 1, 0, 3)
+    edge = np.diff(corners, axis=0)
+    normals = np.column_stack([edge[:, 1], -edge[:, 0]])
+    normals /= np.linalg.norm(normals, axis=1, keepdims=True)
+    normal = normals[side]
+    at_corner = np.isclose(u, breaks[side])
+    normal[at_corner] += normals[(side[at_corner] - 1) % 4]
+
+    offset = 0.5 * thickness * uvw[:, 2]
+    return np.column_stack([x + offset * normal[:, 0], y + offset * normal[:, 1],
+                            uvw[:, 1] * height / rows])
+
+
+def perforated_shade(shape, width, depth, height, pitch=5.0, hole_size=3.0,
+                     thickness=1.5, margin_rows=1, subdivisions=DEFAULT_SUBDIVISIONS):
+    """Perforated tube wall for one of the shade shapes
+
+    shape is 'cylinder' (width is the diameter) or 'box'; sizes are measured
+    to the middle of the wall. Holes are about `hole_size` mm across on a
+    `pitch` mm grid, rounded so whole cells fit. Returns (vertices, quads,
+    hole count).
+    """
+    if hole_size >= pitch:
+        raise ValueError("hole_size must be smaller than pitch")
+    rows = max(1, int(round(height / pitch)))
+    if shape == "cylinder":
+        columns = max(3, int(round(math.pi * width / pitch)))
+        uvw, quads, holes = perforated_panel(columns, rows, hole_size / pitch, margin_rows,
+                                             subdivisions)
+        verts = wrap_cylinder(uvw, columns, rows, width / 2.0, height, thickness)
+    elif shape == "box":
+        side_columns = [max(1, int(round(s / pitch))) for s in (width, depth, width, depth)]
+        uvw, quads, holes = perforated_panel(sum(side_columns), rows, hole_size / pitch,
+                                             margin_rows, subdivisions)
+        verts = wrap_box(uvw, side_columns, rows, width, depth, height, thickness)
+    else:
+        raise ValueError(f"Unknown shape {shape!r}; choose 'cylinder' or 'box'")
+    return verts, quads, holes
@@ -0,0 +1,262 @@
+"""
+Build-plate packing for exported parts.
+Takes STLs and a printer bed size, packs each part's XY footprint onto as few
+plates as possible with a MaxRects best-short-side-fit heuristic (90° rotation
+allowed), and writes one combined STL and 3MF per plate.
+
+Usage:
+    python plate_packing.py --bed 220x220 STLs/*.stl [--copies 4] [--output-dir STLs/plates]
+"""
+
+import argparse
+import os
+import zipfile
+from xml.sax.saxutils import quoteattr
+
+import numpy as np
+
+from mesh_io import DEFAULT_DECIMALS, read_stl, write_stl
+
+DEFAULT_SPACING = 5.0  # mm between parts
+
+
+class Part:
+    """One copy of an STL to be placed, with its triangles resting on z=0"""
+
+    def __init__(self, name, triangles):
+        tris = np.asarray(triangles, dtype=np.float64)
+        points = tris.reshape(-1, 3)
+        low = points.min(axis=0)
+        high = points.max(axis=0)
+        # Move the footprint's corner to the origin and the part onto the bed
+        self.name = name
+        self.triangles = tris - low
+        self.width = float(high[0] - low[0])
+        self.depth = float(high[1] - low[1])
+        self.height = float(high[2] - low[2])
+
+    def placed_triangles(self, x, y, rotated):
+        """Triangles moved to (x, y) on the bed, turned 90° about Z if rotated"""
+        tris = self.triangles
+        if rotated:
+            # (x, y) -> (depth - y, x) keeps the footprint in the positive quadrant
+            tris = np.stack([self.depth - tris[..., 1], tris[..., 0], tris[..., 2]], axis=-1)
+        return tris + np.array([x, y, 0.0])
+
+
+class MaxRectsBin:
+    """Free-space tracker for one plate (MaxRects with best short side fit)"""
+
+    def __init__(self, width, depth):
+        self.width = width
+        self.depth = depth
+        self.free = [(0.0, 0.0, width, depth)]
+
+    def find(self, w, d, allow_rotate=True):
+        """Best (x, y, rotated, score) for a w x d rectangle, or None"""
+        best = None
+        for fx, fy, fw, fd in self.free:
+            for rotated, (rw, rd) in ((False, (w, d)), (True, (d, w))):
+                if rotated and not allow_rotate:
+                    continue
+                if rw <= fw and rd <= fd:
+                    score = (min(fw - rw, fd - rd), max(fw - rw, fd - rd))
+                    if best is None or score < best[3]:
+                        best = (fx, fy, rotated, score)
+        return best
+
+    def place(self, x, y, w, d):
+        """Mark a rectangle as used and split the free rectangles around it"""
+        new_free = []
+        for fx, fy, fw, fd in self.free:
+            if x >= fx + fw or x + w <= fx or y >= fy + fd or y + d <= fy:
+                new_free.append((fx, fy, fw, fd))
+                continue
+            if x > fx:
+                new_free.append((fx, fy, x - fx, fd))
+            if x + w < fx + fw:
+                new_free.append((x + w, fy, fx + fw - (x + w), fd))
+            if y > fy:
+                new_free.append((fx, fy, fw, y - fy))
+            if y + d < fy + fd:
+                new_free.append((fx, y + d, fw, fy + fd - (y + d)))
+
+        # Drop free rectangles contained in another one
+        new_free.sort(key=lambda r: r[2] * r[3], reverse=True)
+        pruned = []
+        for r in new_free:
+            if not any(r[0] >= p[0] and r[1] >= p[1]
+                       and r[0] + r[2] <= p[0] + p[2] and r[1] + r[3] <= p[1] + p[3]
+                       for p in pruned):
+                pruned.append(r)
+        self.free = pruned
+
+
+def pack_parts(parts, bed_width, bed_depth, spacing=DEFAULT_SPACING):
+    """Assign parts to plates; return (plates, unplaced)
+
+    Each plate is a list of (part, x, y, rotated). Parts are inflated by the
+    spacing so neighbours never touch, leaving half the spacing at the bed edge.
+    """
+    order = sorted(parts, key=lambda p: max(p.width, p.depth) * min(p.width, p.depth),
+                   reverse=True)
+    bins = []
+    plates = []
+    unplaced = []
+    for part in order:
+        w, d = part.width + spacing, part.depth + spacing
+        placement = None
+        for index, plate_bin in enumerate(bins):
+            found = plate_bin.find(w, d)
+            if found:
+                placement = (index, found)
+                break
+        if placement is None:
+            plate_bin = MaxRectsBin(bed_width, bed_depth)
+            found = plate_bin.find(w, d)
+            if found is None:
+                unplaced.append(part)
+                continue
+            bins.append(plate_bin)
+            plates.append([])
+            placement = (len(bins) - 1, found)
+
+        index, (x, y, rotated, _) = placement
+        rw, rd = (d, w) if rotated else (w, d)
+        bins[index].place(x, y, rw, rd)
+        plates[index].append((part, x + spacing / 2, y + spacing / 2, rotated))
+    return plates, unplaced
+
+
+def write_3mf(path, objects, decimals=DEFAULT_DECIMALS):
+    """Write named triangle arrays as separate objects of one 3MF build plate
+
+    Coordinates keep `decimals` places, the precision of canonical STLs.
+    """
+    resources = []
+    items = []
+    for object_id, (name, tris) in enumerate(objects, start=1):
+        points = np.asarray(tris, dtype=np.float64).reshape(-1, 3)
+        # Adding 0.0 turns -0.0 into 0.0 so it is not written as "-0.0000"
+        vertices, faces = np.unique(np.round(points, decimals) + 0.0, axis=0, return_inverse=True)
+        faces = faces.reshape(-1, 3)
+        # Slivers whose corners round onto one vertex would be invalid 3MF triangles
+        faces = faces[(faces[:, 0] != faces[:, 1]) & (faces[:, 1] != faces[:, 2])
+                      & (faces[:, 2] != faces[:, 0])]
+        vertex_xml = "".join(
+            f'<vertex x="{x:.{decimals}f}" y="{y:.{decimals}f}" z="{z:.{decimals}f}"/>'
+            for x, y, z in vertices.tolist())
+        triangle_xml = "".join(f'<triangle v1="{a}" v2="{b}" v3="{c}"/>'
+                               for a, b, c in faces.tolist())
+        resources.append(
+            f'<object id="{object_id}" name={quoteattr(name)} type="model"><mesh>'
+            f'<vertices>{vertex_xml}</vertices><triangles>{triangle_xml}</triangles>'
+            f'</mesh></object>')
+        items.append(f'<item objectid="{object_id}"/>')
+
+    model = (
+        '<?xml version="1.0" encoding="UTF-8"?>\n'
+        '<model unit="millimeter" xml:lang="en-US" '
+        'xmlns="http://schemas.microsoft.com/3dmanufacturing/core/2015/02">'
+        f'<resources>{"".join(resources)}</resources>'
+        f'<build>{"".join(items)}</build></model>'
+    )
+    content_types = (
+        '<?xml version="1.0" encoding="UTF-8"?>\n'
+        '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+        '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+        '<Default Extension="model" ContentType="application/vnd.ms-package.3dmanufacturing-3dmodel+xml"/>'
+        '</Types>'
+    )
+    rels = (
+        '<?xml version="1.0" encoding="UTF-8"?>\n'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Target="/3D/3dmodel.model" Id="rel0" '
+        'Type="http://schemas.microsoft.com/3dmanufacturing/2013/01/3dmodel"/>'
+        '</Relationships>'
+    )
+    with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as archive:
+        archive.writestr("[Content_Types].xml", content_types)
+        archive.writestr("_rels/.rels", rels)
+        archive.writestr("3D/3dmodel.model", model)
+
+
+def pack_stls(stl_paths, bed_width, bed_depth, output_dir, spacing=DEFAULT_SPACING,
+              copies=1, write_3mf_files=True):
+    """Pack STL files onto plates, write them, and return a JSON-friendly summary"""
+    parts = []
+    for path in stl_paths:
+        triangles = read_stl(path)
+        if len(triangles) == 0:
+            print(f"Warning: Skipping {path}: it has no triangles")
+            continue
+        name = os.path.splitext(os.path.basename(path))[0]
+        for copy in range(copies):
+            parts.append(Part(name if copies == 1 else f"{name}_{copy + 1}", triangles))
+
+    plates, unplaced = pack_parts(parts, bed_width, bed_depth, spacing)
+
+    os.makedirs(output_dir, exist_ok=True)
+    # Plates left over from a layout that needed more of them would look current
+    for name in os.listdir(output_dir):
+        if name.startswith("plate_") and name.endswith((".stl", ".3mf")):
+            os.remove(os.path.join(output_dir, name))
+    summary = {"bed_mm": [bed_width, bed_depth], "spacing_mm": spacing,
+               "plates": [], "unplaced": [p.name for p in unplaced]}
+    for number, placements in enumerate(plates, start=1):
+        objects = [(part.name, part.placed_triangles(x, y, rotated))
+                   for part, x, y, rotated in placements]
+        stl_name = f"plate_{number:02d}.stl"
+        write_stl(os.path.join(output_dir, stl_name),
+                  np.concatenate([tris for _, tris in objects]),
+                  header=f"Plate {number}".encode())
+        files = [stl_name]
+        if write_3mf_files:
+            threemf_name = f"plate_{number:02d}.3mf"
+            write_3mf(os.path.join(output_dir, threemf_name), objects)
+            files.append(threemf_name)
+
+        used = sum(part.width * part.depth for part, _, _, _ in placements)
+        summary["plates"].append({
+            "files": files,
+            "parts": [{"name": part.name, "x": x, "y": y, "rotated": rotated}
+                      for part, x, y, rotated in placements],
+            "fill": used / (bed_width * bed_depth),
+        })
+    return summary
+
+
+def parse_bed(text):
+    """Parse a bed size like '220x220' into (width, depth) in mm"""
+    try:
+        width, depth = (float(v) for v in text.lower().split("x"))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"bed size must look like 220x220, got {text!r}")
+    if not (width > 0 and depth > 0):
+        raise argparse.ArgumentTypeError(f"bed size must be positive, got {text!r}")
+    return width, depth
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pack STL parts onto printer build plates")
+    parser.add_argument("stls", nargs="+", help="STL files to pack")
+    parser.add_argument("--bed", type=parse_bed, required=True, help="Bed size in mm, e.g. 220x220")
+    parser.add_argument("--spacing", type=float, default=DEFAULT_SPACING,
+                        help="Gap between parts in mm")
+    parser.add_argument("--copies", type=int, default=1, help="Copies of each part")
+    parser.add_argument("--output-dir", default="plates", help="Where to write plate files")
+    parser.add_argument("--no-3mf", action="store_true", help="Only write STL plates")
+    args = parser.parse_args()
+
+    summary = pack_stls(args.stls, args.bed[0], args.bed[1], args.output_dir,
+                        spacing=args.spacing, copies=args.copies,
+                        write_3mf_files=not args.no_3mf)
+    for plate in summary["plates"]:
+        names = ", ".join(p["name"] for p in plate["parts"])
+        print(f"{plate['files'][0]}: {len(plate['parts'])} parts ({plate['fill']:.0%} filled): {names}")
+    for name in summary["unplaced"]:
+        print(f"❌ {name} does not fit on the bed")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,157 @@
+"""
+Post-build analysis stage over the STL artifacts.
+Analyzers register a pure function of one STL path and its settings. The stage
+runs every enabled analyzer on every artifact that has no cached result for
+(STL content hash, analyzer version, settings), spreading the work over a
+process pool. Workers are sent only paths: each memory-maps its STL through
+mesh_io.read_stl, so the triangles are shared via the page cache rather than
+pickled. Results are merged into the build report under each analyzer's section.
+"""
+
+import concurrent.futures
+import hashlib
+import importlib
+import json
+import os
+import time
+from datetime import datetime
+
+# Registered analyzers by report section, in registration order
+ANALYZERS = {}
+
+# Cache of analyzer results in STLs/, keyed by content hash, version and settings
+ANALYSIS_CACHE_FILE = ".analysis_cache.json"
+
+# Results kept in the cache; the least recently used go first
+ANALYSIS_CACHE_LIMIT = 1000
+
+
+def register_analyzer(section, target, version, settings=None, enabled=None):
+    """Register an analyzer that stores its result under `section` for each STL
+
+    target names the function as "module:function"; it is called as
+    function(stl_path, **settings(args)) in a worker process and must return
+    JSON-serialisable results that depend only on the file and the settings.
+    Bump version whenever the function's output changes. enabled(args)
+    decides per build whether the analyzer runs at all.
+    """
+    ANALYZERS[section] = {
+        "section": section,
+        "target": target,
+        "version": version,
+        "settings": settings or (lambda args: {}),
+        "enabled": enabled or (lambda args: True),
+    }
+
+
+def content_hash(path):
+    """SHA-256 of an artifact's bytes"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def result_key(analyzer, settings, digest):
+    """Cache key of one analyzer result"""
+    text = json.dumps([analyzer["section"], analyzer["version"], settings, digest], sort_keys=True)
+    return hashlib.sha256(text.encode()).hexdigest()
+
+
+def load_target(target):
+    module, function = target.split(":")
+    return getattr(importlib.import_module(module), function)
+
+
+def run_target(target, path, settings):
+    """Worker entry point: run one analyzer on one STL"""
+    return load_target(target)(path, **settings)
+
+
+def load_cache(stl_dir):
+    try:
+        with open(os.path.join(stl_dir, ANALYSIS_CACHE_FILE), "r") as f:
+            return json.load(f)
+    except (IOError, ValueError):
+        return {}
+
+
+def save_cache(stl_dir, cache):
+    """Write the cache, dropping the least recently used results over the limit"""
+    if len(cache) > ANALYSIS_CACHE_LIMIT:
+        keep = sorted(cache, key=lambda key: cache[key]["used"])[-ANALYSIS_CACHE_LIMIT:]
+        cache = {key: cache[key] for key in keep}
+    path = os.path.join(stl_dir, ANALYSIS_CACHE_FILE)
+    try:
+        with open(path, "w") as f:
+            json.dump(cache, f)
+    except IOError:
+        print(f"Warning: Could not save analysis cache to {path}")
+
+
+def run_analyzers(stl_dir, stl_files, args, report, jobs=None):
+    """Fill report with every enabled analyzer's result for each existing STL
+
+    Cached results are reused; the rest run in up to `jobs` worker processes.
+    Returns the number of results computed.
+    """
+    analyzers = []
+    for analyzer in ANALYZERS.values():
+        if not analyzer["enabled"](args):
+            continue
+        try:
+            load_target(analyzer["target"])
+        except (ImportError, AttributeError) as e:
+            print(f"Warning: Skipping {analyzer['section']} analysis ({e})")
+            continue
+        analyzers.append(analyzer)
+
+    stl_paths = {f: os.path.join(stl_dir, f) for f in stl_files
+                 if os.path.exists(os.path.join(stl_dir, f))}
+    digests = {f: content_hash(path) for f, path in stl_paths.items()}
+    cache = load_cache(stl_dir)
+    now = datetime.now().isoformat()
+    tasks = []
+    for analyzer in analyzers:
+        settings = analyzer["settings"](args)
+        for stl_file in stl_paths:
+            key = result_key(analyzer, settings, digests[stl_file])
+            if key in cache:
+                cache[key]["used"] = now
+                report.setdefault("artifacts", {}).setdefault(stl_file, {})[
+                    analyzer["section"]] = cache[key]["result"]
+            else:
+                tasks.append((analyzer, stl_file, settings, key))
+
+    start = time.perf_counter()
+    jobs = max(1, min(jobs or os.cpu_count() or 1, len(tasks)))
+    if jobs == 1:
+        outcomes = []
+        for analyzer, stl_file, settings, key in tasks:
+            try:
+                outcomes.append(run_target(analyzer["target"], stl_paths[stl_file], settings))
+            except Exception as e:
+                outcomes.append(e)
+    else:
+        with concurrent.futures.ProcessPoolExecutor(max_workers=jobs) as pool:
+            futures = [pool.submit(run_target, analyzer["target"], stl_paths[stl_file], settings)
+                       for analyzer, stl_file, settings, key in tasks]
+            outcomes = [future.exception() or future.result() for future in futures]
+
+    computed = 0
+    for (analyzer, stl_file, settings, key), outcome in zip(tasks, outcomes):
+        if isinstance(outcome, Exception):
+            print(f"Warning: {analyzer['section']} analysis of {stl_file} failed ({outcome})")
+            continue
+        cache[key] = {"result": outcome, "used": now}
+        report.setdefault("artifacts", {}).setdefault(stl_file, {})[
+            analyzer["section"]] = outcome
+        computed += 1
+    save_cache(stl_dir, cache)
+
+    if analyzers and stl_paths:
+        reused = len(analyzers) * len(stl_paths) - len(tasks)
+        print(f"\nAnalysis: {computed} results computed in {time.perf_counter() - start:.1f} s "
+              f"with {jobs if tasks else 0} workers, {reused} reused from cache")
+    return computed
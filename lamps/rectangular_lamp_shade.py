@@ -1,6 +1,15 @@
 import bpy
 import os
 import math
+import sys
+
+# Shared helpers live next to this script
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+from stl_export import export_stl
+from ops_profiler import profile_ops
+
+# Count and time every operator when the build asks for a profile
+profile_ops()
 
 # Set up the scene for mm
 bpy.context.scene.unit_settings.system = 'METRIC'
@@ -142,67 +151,8 @@ bpy.ops.object.modifier_apply(modifier=bevel.name)
 # STL export path - UPDATED to match what build_all_lamps.py expects
 stl_path = "/Users/stoklosa/Documents/StokApps/3D-print-designs/lamps/STLs/rectangular_shade.stl"
 
-# Make sure the directory exists
-os.makedirs(os.path.dirname(stl_path), exist_ok=True)
-
-# Try exporting
-bpy.ops.object.select_all(action='DESELECT')
-cube.select_set(True)
-bpy.context.view_layer.objects.active = cube
-
-try:
-    # This is the newer method (Blender 4.x)
-    bpy.ops.wm.stl_export(filepath=stl_path)
-    print(f"STL exported with wm.stl_export to {stl_path}")
-except Exception as e:
-    print(f"Export with wm.stl_export failed: {e}")
-    
-    try:
-        # This is the older method (pre-4.x)
-        bpy.ops.export_mesh.stl(filepath=stl_path)
-        print(f"STL exported with export_mesh.stl to {stl_path}")
-    except Exception as e:
-        print(f"Export with export_mesh.stl failed: {e}")
-        
-        try:
-            # Use the io_mesh_stl add-on directly
-            if "io_mesh_stl" not in bpy.context.preferences.addons:
-                bpy.ops.preferences.addon_enable(module="io_mesh_stl")
-            
-            # Now try again with the add-on loaded
-            bpy.ops.export_mesh.stl(filepath=stl_path)
-            print(f"STL exported with add-on enabled to {stl_path}")
-        except Exception as e:
-            print(f"All automatic export methods failed: {e}")
-            
-            # Last resort - manual ASCII STL export
-            try:
-                with open(stl_path, 'w') as f:
-                    f.write("solid RectangularLampShade\n")
-                    
-                    # Get mesh data
-                    mesh = cube.data
-                    
-                    # Write triangles
-                    for poly in mesh.polygons:
-                        # Write normal
-                        normal = poly.normal
-                        f.write(f"  facet normal {normal.x} {normal.y} {normal.z}\n")
-                        f.write("    outer loop\n")
-                        
-                        # Write vertices
-                        for vert_idx in poly.vertices:
-                            vert = mesh.vertices[vert_idx].co
-                            f.write(f"      vertex {vert.x} {vert.y} {vert.z}\n")
-                        
-                        f.write("    endloop\n")
-                        f.write("  endfacet\n")
-                    
-                    f.write("endsolid RectangularLampShade\n")
-                
-                print(f"STL exported manually in ASCII format to {stl_path}")
-            except Exception as e:
-                print(f"All export methods failed: {e}")
+# Export with the exporter this Blender provides
+stl_path = export_stl(cube, stl_path)
 
 print("Rectangular lamp shade created with dimensions 100x100x180mm and exported to STL")
 print("Features: Vertical decorative lines on all 4 sides, 1mm wall thickness, open bottom")
\ No newline at end of file
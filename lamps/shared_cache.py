@@ -0,0 +1,235 @@
+"""
+Build cache shared by many machines through one directory, e.g. an NFS mount.
+Entries are staged in a temp directory and published with a single rename, so
+readers never see half an entry. Builders of the same key take an O_EXCL lock
+file, so only one of them runs Blender while the others wait for its result.
+Every fetched file is checked against the SHA-256 recorded when it was published.
+"""
+
+import hashlib
+import json
+import os
+import re
+import shutil
+import socket
+import tempfile
+import time
+from datetime import datetime
+
+# Bump when the entry layout or key recipe changes
+CACHE_VERSION = 1
+
+# Subdirectories of the shared cache
+ENTRIES_DIR = "entries"  # published entries, fanned out by key prefix
+LOCKS_DIR = "locks"      # one lock file per key being built
+TMP_DIR = "tmp"          # staging area; same filesystem so rename is atomic
+
+# Description of the files in a published entry
+ENTRY_META = "entry.json"
+
+# Seconds between checks while another builder holds a lock
+LOCK_POLL_SECONDS = 1.0
+
+# Locks older than this belong to builders that died without releasing them
+LOCK_STALE_SECONDS = 3600.0
+
+# Import lines naming modules that may live next to a script
+IMPORT_PATTERN = re.compile(r"^\s*(?:from\s+(\w+)\s+import|import\s+(\w+))", re.MULTILINE)
+
+
+def file_sha256(path):
+    """SHA-256 hex digest of a file"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def source_digest(script_path):
+    """Hash of a script and every module next to it that it imports, transitively"""
+    directory = os.path.dirname(os.path.abspath(script_path))
+    digest = hashlib.sha256()
+    pending = [os.path.abspath(script_path)]
+    seen = set()
+    while pending:
+        path = pending.pop()
+        if path in seen:
+            continue
+        seen.add(path)
+        with open(path, "rb") as f:
+            source = f.read()
+        digest.update(os.path.basename(path).encode() + b"\0" + source + b"\0")
+        for match in IMPORT_PATTERN.finditer(source.decode("utf-8", "replace")):
+            module = os.path.join(directory, (match.group(1) or match.group(2)) + ".py")
+            if os.path.exists(module):
+                pending.append(module)
+        pending.sort(reverse=True)
+    return digest.hexdigest()
+
+
+def entry_key(**parts):
+    """Cache key for an artifact from everything that decides its bytes"""
+    text = json.dumps(dict(parts, cache_version=CACHE_VERSION), sort_keys=True)
+    return hashlib.sha256(text.encode()).hexdigest()
+
+
+def entry_dir(cache_dir, key):
+    return os.path.join(cache_dir, ENTRIES_DIR, key[:2], key)
+
+
+def has_entry(cache_dir, key):
+    """True once an entry has been published under key"""
+    return os.path.exists(os.path.join(entry_dir(cache_dir, key), ENTRY_META))
+
+
+def fetch_entry(cache_dir, key, dest_path):
+    """Copy a published entry's file to dest_path; True only if it verified
+
+    The copy lands next to dest_path first and is renamed into place once its
+    hash matches, so a failed pull never leaves a damaged STL behind.
+    """
+    entry = entry_dir(cache_dir, key)
+    try:
+        with open(os.path.join(entry, ENTRY_META), "r") as f:
+            meta = json.load(f)
+    except (IOError, ValueError):
+        return False
+
+    partial = f"{dest_path}.{os.getpid()}.part"
+    try:
+        shutil.copyfile(os.path.join(entry, meta["file"]), partial)
+        if file_sha256(partial) != meta["sha256"]:
+            os.remove(partial)
+            if file_sha256(os.path.join(entry, meta["file"])) != meta["sha256"]:
+                print(f"Warning: Shared cache entry {key[:12]} is corrupt; discarding it")
+                discard_entry(cache_dir, key)
+            return False
+        os.replace(partial, dest_path)
+    except (IOError, KeyError) as e:
+        print(f"Warning: Could not pull {os.path.basename(dest_path)} from the shared cache ({e})")
+        if os.path.exists(partial):
+            os.remove(partial)
+        return False
+    return True
+
+
+def discard_entry(cache_dir, key):
+    """Remove a published entry so the next builder of key publishes it afresh"""
+    os.makedirs(os.path.join(cache_dir, TMP_DIR), exist_ok=True)
+    doomed = os.path.join(cache_dir, TMP_DIR, f"{key[:12]}.discarded.{os.getpid()}")
+    try:
+        # Move it aside in one step so no reader sees a half-deleted entry
+        os.rename(entry_dir(cache_dir, key), doomed)
+    except OSError:
+        return
+    shutil.rmtree(doomed, ignore_errors=True)
+
+
+def publish_entry(cache_dir, key, src_path, info=None):
+    """Add src_path to the shared cache under key; True if the entry exists afterwards
+
+    The file and its description are written to a staging directory and
+    renamed into place. If another builder publishes first, its entry wins.
+    """
+    final = entry_dir(cache_dir, key)
+    if has_entry(cache_dir, key):
+        return True
+
+    staging = None
+    try:
+        source_hash = file_sha256(src_path)
+        os.makedirs(os.path.join(cache_dir, TMP_DIR), exist_ok=True)
+        staging = tempfile.mkdtemp(prefix=key[:12] + ".", dir=os.path.join(cache_dir, TMP_DIR))
+        name = os.path.basename(src_path)
+        shutil.copyfile(src_path, os.path.join(staging, name))
+        if file_sha256(os.path.join(staging, name)) != source_hash:
+            raise IOError("copy does not match the built file")
+        meta = dict(info or {}, file=name, sha256=source_hash,
+                    size=os.path.getsize(src_path), host=socket.gethostname(),
+                    published=datetime.now().isoformat())
+        with open(os.path.join(staging, ENTRY_META), "w") as f:
+            json.dump(meta, f, indent=2)
+            f.flush()
+            os.fsync(f.fileno())
+        os.makedirs(os.path.dirname(final), exist_ok=True)
+        os.rename(staging, final)
+    except OSError as e:
+        if staging:
+            shutil.rmtree(staging, ignore_errors=True)
+        if has_entry(cache_dir, key):
+            return True
+        print(f"Warning: Could not publish {os.path.basename(src_path)} to the shared cache ({e})")
+        return False
+    return True
+
+
+def lock_path(cache_dir, key):
+    return os.path.join(cache_dir, LOCKS_DIR, key + ".lock")
+
+
+def _holder_name(holder):
+    if not holder:
+        return "an unknown builder"
+    return f"{holder.get('host')} (pid {holder.get('pid')})"
+
+
+def acquire_lock(cache_dir, key, timeout):
+    """Wait until key is published or its build lock is ours
+
+    Returns the lock path when the caller should build, or None once another
+    builder has published the entry. Raises TimeoutError after `timeout`
+    seconds of waiting on a live lock.
+    """
+    path = lock_path(cache_dir, key)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    deadline = time.monotonic() + timeout
+    announced = False
+    while True:
+        if has_entry(cache_dir, key):
+            return None
+        try:
+            fd = os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY, 0o644)
+        except FileExistsError:
+            try:
+                age = time.time() - os.stat(path).st_mtime
+            except FileNotFoundError:
+                continue
+            try:
+                with open(path, "r") as f:
+                    holder = json.load(f)
+            except (IOError, ValueError):
+                # Released, or its holder has not written it yet
+                holder = {}
+            if age > LOCK_STALE_SECONDS:
+                print(f"Warning: Breaking stale shared cache lock held by {_holder_name(holder)}")
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+                continue
+            if time.monotonic() > deadline:
+                raise TimeoutError(f"{_holder_name(holder)} held the shared cache lock "
+                                   f"for over {timeout:g} s")
+            if not announced:
+                print(f"⏳ Waiting for {_holder_name(holder)} to finish the same build")
+                announced = True
+            time.sleep(LOCK_POLL_SECONDS)
+            continue
+
+        with os.fdopen(fd, "w") as f:
+            json.dump({"host": socket.gethostname(), "pid": os.getpid(),
+                       "since": datetime.now().isoformat()}, f)
+        # The builder we waited on may have published just before releasing
+        if has_entry(cache_dir, key):
+            release_lock(path)
+            return None
+        return path
+
+
+def release_lock(path):
+    """Give up a lock taken with acquire_lock"""
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
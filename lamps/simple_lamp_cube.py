@@ -2,6 +2,15 @@ import bpy
 import bmesh
 import os
 import math
+import sys
+
+# Shared helpers live next to this script
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+from stl_export import export_stl
+from ops_profiler import profile_ops
+
+# Count and time every operator when the build asks for a profile
+profile_ops()
 
 # Set up the scene for mm
 bpy.context.scene.unit_settings.system = 'METRIC'
@@ -249,16 +258,10 @@ bpy.ops.object.shade_smooth()
 
 # Export the lamp shade to STL for 3D printing
 def export_to_stl(obj, filepath):
-    # Deselect all objects
-    bpy.ops.object.select_all(action='DESELECT')
-    
-    # Select only our lamp shade
-    obj.select_set(True)
-    bpy.context.view_layer.objects.active = obj
-    
-    # Export to STL
-    bpy.ops.export_mesh.stl(
-        filepath=filepath,
+    # Export to STL with the exporter this Blender provides
+    filepath = export_stl(
+        obj,
+        filepath,
         check_existing=True,
         filter_glob='*.stl',
         use_selection=True,
@@ -269,6 +272,7 @@ def export_to_stl(obj, filepath):
     )
     
     print(f"Model exported to: {filepath}")
+    return filepath
 
 # Use explicit path to the STLs directory
 export_filepath = "/Users/stoklosa/Documents/StokApps/3D-print-designs/lamps/STLs/lamp_shade.stl"
@@ -279,7 +283,7 @@ bpy.ops.object.modifier_apply(modifier=bevel_modifier.name)
 bpy.ops.object.modifier_apply(modifier=solidify_modifier.name)
 
 # Export the model
-export_to_stl(lamp_shade, export_filepath)
+export_filepath = export_to_stl(lamp_shade, export_filepath)
 
 print("Open-bottomed lamp shade with rounded bevels created in millimeters and exported to STL!")
 print(f"Exported to: {export_filepath}")
\ No newline at end of file
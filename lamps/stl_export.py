@@ -0,0 +1,104 @@
+"""
+STL export helper shared by the lamp scripts (runs inside Blender).
+Calls the exporter picked by the toolchain probe ($LAMP_STL_EXPORTER) directly;
+when a script is run by hand without the probe, each known exporter is tried in turn.
+With $LAMP_STL_PRECISION set, the file is then rewritten in canonical form so
+the same geometry always gives the same bytes.
+"""
+
+import os
+
+import bpy
+
+# export_mesh.stl keyword -> wm.stl_export keyword
+WM_OPTION_NAMES = {
+    "use_selection": "export_selected_objects",
+    "use_mesh_modifiers": "apply_modifiers",
+    "ascii": "ascii_format",
+}
+
+
+def resolve_export_path(filepath):
+    """Redirect the export into $LAMP_STL_DIR when the build provides one"""
+    stl_dir = os.environ.get("LAMP_STL_DIR")
+    if stl_dir:
+        filepath = os.path.join(stl_dir, os.path.basename(filepath))
+    os.makedirs(os.path.dirname(filepath), exist_ok=True)
+    return filepath
+
+
+def call_exporter(operator, filepath, options):
+    """Call one STL exporter, translating export_mesh.stl-style options"""
+    if operator == "wm.stl_export":
+        wm_options = {WM_OPTION_NAMES.get(k, k): v for k, v in options.items()}
+        bpy.ops.wm.stl_export(filepath=filepath, **wm_options)
+    elif operator == "export_mesh.stl":
+        bpy.ops.export_mesh.stl(filepath=filepath, **options)
+    else:
+        raise ValueError(f"Unknown STL exporter: {operator}")
+
+
+def write_ascii_stl(obj, filepath):
+    """Last-resort exporter: write the object's triangles as ASCII STL"""
+    mesh = obj.data
+    mesh.calc_loop_triangles()
+    with open(filepath, 'w') as f:
+        f.write(f"solid {obj.name}\n")
+        for tri in mesh.loop_triangles:
+            a, b, c = (mesh.vertices[i].co for i in tri.vertices)
+            normal = (b - a).cross(c - a).normalized()
+            f.write(f"  facet normal {normal.x} {normal.y} {normal.z}\n")
+            f.write("    outer loop\n")
+            for vert in (a, b, c):
+                f.write(f"      vertex {vert.x} {vert.y} {vert.z}\n")
+            f.write("    endloop\n")
+            f.write("  endfacet\n")
+        f.write(f"endsolid {obj.name}\n")
+
+
+def write_with_exporter(obj, filepath, options):
+    """Write obj with the probed exporter, falling back through the known ones"""
+    operator = os.environ.get("LAMP_STL_EXPORTER")
+    if operator:
+        addon = os.environ.get("LAMP_STL_ADDON")
+        if addon and addon not in bpy.context.preferences.addons:
+            bpy.ops.preferences.addon_enable(module=addon)
+        call_exporter(operator, filepath, options)
+        print(f"STL exported with {operator} to {filepath}")
+        return
+
+    # No probe result: try the exporters newest first
+    for operator, addon in [("wm.stl_export", None),
+                            ("export_mesh.stl", None),
+                            ("export_mesh.stl", "io_mesh_stl")]:
+        try:
+            if addon and addon not in bpy.context.preferences.addons:
+                bpy.ops.preferences.addon_enable(module=addon)
+            call_exporter(operator, filepath, options)
+            print(f"STL exported with {operator} to {filepath}")
+            return
+        except Exception as e:
+            print(f"Export with {operator} failed: {e}")
+
+    write_ascii_stl(obj, filepath)
+    print(f"STL exported manually in ASCII format to {filepath}")
+
+
+def export_stl(obj, filepath, **options):
+    """Export obj to STL and return the path actually written"""
+    filepath = resolve_export_path(filepath)
+
+    # Select only the object being exported
+    bpy.ops.object.select_all(action='DESELECT')
+    obj.select_set(True)
+    bpy.context.view_layer.objects.active = obj
+
+    write_with_exporter(obj, filepath, options)
+
+    # Reproducible mode: fixed header, canonical order, rounded coordinates
+    precision = os.environ.get("LAMP_STL_PRECISION")
+    if precision:
+        from mesh_io import canonicalize_stl
+        count = canonicalize_stl(filepath, int(precision))
+        print(f"STL canonicalised to {precision} decimals ({count} triangles)")
+    return filepath
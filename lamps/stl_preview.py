@@ -0,0 +1,240 @@
+"""
+CPU-only thumbnail renderer for exported STLs.
+Rasterises the triangle array with a NumPy z-buffer from a few fixed
+orthographic views and writes flat-shaded PNGs next to each STL. Thumbnails are
+cached by the STL's content hash so unchanged parts are not re-rendered.
+"""
+
+import hashlib
+import json
+import os
+import struct
+import zlib
+
+import numpy as np
+
+from mesh_io import read_stl, triangle_normals
+
+PREVIEW_CACHE_FILE = ".preview_cache.json"
+DEFAULT_SIZE = 256
+
+# View name -> (direction the camera looks along, screen up vector)
+VIEWS = {
+    "iso": ((-1.0, 1.0, -1.0), (0.0, 0.0, 1.0)),
+    "front": ((0.0, 1.0, 0.0), (0.0, 0.0, 1.0)),
+    "top": ((0.0, 0.0, -1.0), (0.0, 1.0, 0.0)),
+}
+
+# Light direction (towards the light) in view space: upper left, in front
+LIGHT = np.array([-0.4, 0.5, -0.77])
+BASE_COLOUR = np.array([0.78, 0.82, 0.88])
+AMBIENT = 0.25
+
+# Fragments (covered pixels, counted by bounding box) rasterised per vectorised batch
+BATCH_PIXELS = 1 << 22
+
+
+def view_basis(direction, up):
+    """Orthonormal (right, up, forward) axes for a camera looking along direction"""
+    forward = np.asarray(direction, dtype=np.float64)
+    forward /= np.linalg.norm(forward)
+    right = np.cross(forward, up)
+    right /= np.linalg.norm(right)
+    true_up = np.cross(right, forward)
+    return right, true_up, forward
+
+
+def _min3(a):
+    """Row-wise minimum of an (n, 3) array (much faster than a.min(axis=1))"""
+    return np.minimum(np.minimum(a[:, 0], a[:, 1]), a[:, 2])
+
+
+def _max3(a):
+    """Row-wise maximum of an (n, 3) array"""
+    return np.maximum(np.maximum(a[:, 0], a[:, 1]), a[:, 2])
+
+
+def _expand(counts):
+    """Owner and position within owner of each item when owner i has counts[i] items"""
+    owner = np.repeat(np.arange(len(counts)), counts)
+    first = np.cumsum(counts) - counts
+    return owner, np.arange(len(owner)) - first[owner]
+
+
+def _raster_batch(sx, sy, sz, ids, size, zbuf, idbuf):
+    """Scan-convert triangles row by row and keep the nearest fragment per pixel"""
+    tx, ty, tz = sx[ids], sy[ids], sz[ids]
+
+    # Depth plane per triangle: z = z0 + gx * (x - x0) + gy * (y - y0)
+    ex, ey, ez = tx[:, 1:] - tx[:, :1], ty[:, 1:] - ty[:, :1], tz[:, 1:] - tz[:, :1]
+    area = ex[:, 0] * ey[:, 1] - ey[:, 0] * ex[:, 1]
+    gx = (ez[:, 0] * ey[:, 1] - ey[:, 0] * ez[:, 1]) / area
+    gy = (ex[:, 0] * ez[:, 1] - ez[:, 0] * ex[:, 1]) / area
+
+    # Corners from top to bottom of the screen, and each edge's x step per row
+    order = np.argsort(ty, axis=1)
+    xt, xm, xb = np.take_along_axis(tx, order, 1).T
+    yt, ym, yb = np.take_along_axis(ty, order, 1).T
+    long_step = (xb - xt) / (yb - yt)
+    upper_step = np.divide(xm - xt, ym - yt, out=np.zeros_like(xt), where=ym > yt)
+    lower_step = np.divide(xb - xm, yb - ym, out=np.zeros_like(xt), where=yb > ym)
+
+    # Pixel rows whose centres the triangle spans
+    row0 = np.ceil(np.maximum(yt - 0.5, 0)).astype(np.int64)
+    row1 = np.floor(np.minimum(yb - 0.5, size - 1)).astype(np.int64)
+    tri, step = _expand(np.maximum(row1 - row0 + 1, 0))
+    row = row0[tri] + step
+    cy = row.astype(np.float32) + np.float32(0.5)
+
+    # Where each row's centre line crosses the long edge and the short one
+    # beside it; a horizontal edge contributes its far corner
+    across = xt[tri] + (cy - yt[tri]) * long_step[tri]
+    upper = cy < ym[tri]
+    beside = np.where(upper, xt[tri] + (cy - yt[tri]) * upper_step[tri],
+                      xm[tri] + (cy - ym[tri]) * lower_step[tri])
+    col0 = np.ceil(np.maximum(np.minimum(across, beside) - 0.5, 0)).astype(np.int64)
+    col1 = np.floor(np.minimum(np.maximum(across, beside) - 0.5, size - 1)).astype(np.int64)
+
+    # Depth at each row's first pixel centre, then one step of gx per pixel
+    base = (tz[tri, 0] + gx[tri] * (col0 + 0.5 - tx[tri, 0])
+            + gy[tri] * (cy - ty[tri, 0])).astype(np.float32)
+    slope = gx[tri].astype(np.float32)
+    owner, step = _expand(np.maximum(col1 - col0 + 1, 0))
+    pixel = row[owner] * size + col0[owner] + step
+    depth = base[owner] + slope[owner] * step
+    tri_index = ids[tri[owner]]
+
+    # Keep fragments nearer than what is drawn, then the nearest per pixel:
+    # sorted by pixel and depth, the first of each pixel's run wins
+    nearer = depth < zbuf[pixel]
+    pixel, depth, tri_index = pixel[nearer], depth[nearer], tri_index[nearer]
+    order = np.lexsort((depth, pixel))
+    pixel, depth, tri_index = pixel[order], depth[order], tri_index[order]
+    first = np.flatnonzero(np.diff(pixel, prepend=-1))
+    zbuf[pixel[first]] = depth[first]
+    idbuf[pixel[first]] = tri_index[first]
+
+
+def render(triangles, view="iso", size=DEFAULT_SIZE):
+    """Render an RGBA image (size, size, 4) of the triangles from a named view"""
+    tris = np.asarray(triangles, dtype=np.float32)
+    image = np.zeros((size, size, 4), dtype=np.uint8)
+    if len(tris) == 0:
+        return image
+
+    right, up, forward = view_basis(*VIEWS[view])
+    basis = np.stack([right, up, forward], axis=1).astype(np.float32)
+    projected = tris.reshape(-1, 3) @ basis  # columns: x, y, depth
+    sx = np.ascontiguousarray(projected[:, 0]).reshape(-1, 3)
+    sy = np.ascontiguousarray(projected[:, 1]).reshape(-1, 3)
+    sz = np.ascontiguousarray(projected[:, 2]).reshape(-1, 3)
+
+    # Fit the projected bounds into 90% of the image
+    low_x, high_x = float(sx.min()), float(sx.max())
+    low_y, high_y = float(sy.min()), float(sy.max())
+    scale = np.float32(0.9 * size / max(high_x - low_x, high_y - low_y, 1e-9))
+    sx = (sx - np.float32((low_x + high_x) / 2)) * scale + np.float32(size / 2)
+    sy = np.float32(size / 2) - (sy - np.float32((low_y + high_y) / 2)) * scale
+
+    zbuf = np.full(size * size, np.inf, dtype=np.float32)
+    idbuf = np.full(size * size, -1, dtype=np.int64)
+
+    # Edge-on triangles and slivers whose box contains no pixel centre cannot
+    # cover anything
+    area = ((sx[:, 1] - sx[:, 0]) * (sy[:, 2] - sy[:, 0])
+            - (sy[:, 1] - sy[:, 0]) * (sx[:, 2] - sx[:, 0]))
+    min_x, max_x, min_y, max_y = _min3(sx), _max3(sx), _min3(sy), _max3(sy)
+    has_centre = ((np.floor(max_x - 0.5) >= np.ceil(min_x - 0.5))
+                  & (np.floor(max_y - 0.5) >= np.ceil(min_y - 0.5)))
+    ids = np.nonzero(has_centre & (area != 0))[0]
+
+    # Batch triangles so their bounding boxes hold about BATCH_PIXELS pixels
+    width = np.minimum(max_x[ids] - min_x[ids], size) + 2
+    height = np.minimum(max_y[ids] - min_y[ids], size) + 2
+    boxes = np.cumsum(width * height, dtype=np.float64)
+    total = boxes[-1] if len(boxes) else 0
+    cuts = np.searchsorted(boxes, np.arange(BATCH_PIXELS, total, BATCH_PIXELS))
+    for batch in np.split(ids, cuts):
+        if len(batch):
+            _raster_batch(sx, sy, sz, batch, size, zbuf, idbuf)
+
+    # Flat two-sided Lambert shading of the visible triangles
+    covered = np.nonzero(idbuf >= 0)[0]
+    visible, inverse = np.unique(idbuf[covered], return_inverse=True)
+    normals = triangle_normals(tris[visible]) @ basis
+    lengths = np.linalg.norm(normals, axis=1, keepdims=True)
+    normals = np.divide(normals, lengths, out=np.zeros_like(normals), where=lengths > 0)
+    light = LIGHT / np.linalg.norm(LIGHT)
+    intensity = AMBIENT + (1 - AMBIENT) * np.abs(normals @ light)
+
+    colours = intensity[inverse, None] * BASE_COLOUR
+    flat = image.reshape(-1, 4)
+    flat[covered, :3] = np.clip(colours * 255, 0, 255).astype(np.uint8)
+    flat[covered, 3] = 255
+    return image
+
+
+def write_png(path, image):
+    """Write an RGBA uint8 image as PNG using only zlib"""
+    height, width, _ = image.shape
+    raw = np.zeros((height, width * 4 + 1), dtype=np.uint8)
+    raw[:, 1:] = image.reshape(height, -1)  # filter type 0 per row
+
+    def chunk(kind, data):
+        body = kind + data
+        return struct.pack(">I", len(data)) + body + struct.pack(">I", zlib.crc32(body))
+
+    with open(path, "wb") as f:
+        f.write(b"\x89PNG\r\n\x1a\n")
+        f.write(chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 6, 0, 0, 0)))
+        f.write(chunk(b"IDAT", zlib.compress(raw.tobytes(), 6)))
+        f.write(chunk(b"IEND", b""))
+
+
+def file_sha256(path):
+    """SHA-256 of a file's contents"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def preview_paths(stl_path, views=tuple(VIEWS)):
+    """PNG paths written for an STL, one per view"""
+    stem = os.path.splitext(stl_path)[0]
+    return [f"{stem}_{view}.png" for view in views]
+
+
+def render_previews(stl_paths, size=DEFAULT_SIZE, views=tuple(VIEWS)):
+    """Render thumbnails for STLs whose content changed; return {stl: [pngs]}"""
+    results = {}
+    caches = {}
+    for stl_path in stl_paths:
+        stl_dir = os.path.dirname(os.path.abspath(stl_path))
+        cache_path = os.path.join(stl_dir, PREVIEW_CACHE_FILE)
+        if cache_path not in caches:
+            try:
+                with open(cache_path, "r") as f:
+                    caches[cache_path] = json.load(f)
+            except (IOError, json.JSONDecodeError):
+                caches[cache_path] = {}
+        cache = caches[cache_path]
+
+        stl_file = os.path.basename(stl_path)
+        pngs = preview_paths(stl_path, views)
+        key = {"hash": file_sha256(stl_path), "size": size, "views": list(views)}
+        if cache.get(stl_file) != key or not all(os.path.exists(p) for p in pngs):
+            triangles = read_stl(stl_path)
+            for view, png in zip(views, pngs):
+                write_png(png, render(triangles, view, size))
+            cache[stl_file] = key
+        results[stl_file] = [os.path.basename(p) for p in pngs]
+
+    for cache_path, cache in caches.items():
+        try:
+            with open(cache_path, "w") as f:
+                json.dump(cache, f, indent=2)
+        except IOError:
+            print(f"Warning: Could not save preview cache to {cache_path}")
+    return results
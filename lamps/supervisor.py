@@ -0,0 +1,245 @@
+"""
+Supervisor for the Blender child processes.
+Each run gets its own process group and a deadline; when the deadline passes
+the whole group is terminated, then killed. Failures the retry policy names
+are run again after a backoff. Groups still alive when the builder exits, is
+interrupted or is terminated are killed, and on Linux each child is also told
+to die with its parent, so no Blender outlives the build.
+"""
+
+import atexit
+import os
+import re
+import signal
+import subprocess
+import sys
+import tempfile
+import time
+
+try:
+    import ctypes
+except ImportError:
+    ctypes = None
+
+# Outcomes of a supervised run
+OK = "ok"
+FAILED = "failed"            # non-zero exit
+TIMEOUT = "timeout"          # stopped by the supervisor at its deadline
+KILLED = "killed"            # died from a signal the supervisor did not send
+TRANSIENT = "transient"      # non-zero exit whose output blames the environment
+
+# Kinds of failure a retry policy may name
+RETRYABLE = (TIMEOUT, KILLED, TRANSIENT)
+
+# Retry killed and transient failures once; never retry a design's own error
+DEFAULT_POLICY = {"retries": 1, "retry_on": (KILLED, TRANSIENT), "backoff_seconds": 5.0}
+
+# Output marking a failure as the machine's fault rather than the script's
+TRANSIENT_PATTERN = re.compile(
+    r"Resource temporarily unavailable|Too many open files|Stale file handle|"
+    r"Device or resource busy|Interrupted system call|Connection reset by peer")
+
+# Seconds a stopped group gets between SIGTERM and SIGKILL
+KILL_GRACE_SECONDS = 5.0
+
+# Longest sleep between checks on a running child
+MAX_POLL_SECONDS = 0.25
+
+# prctl option asking the kernel to signal a child when its parent dies
+PR_SET_PDEATHSIG = 1
+
+# Process groups started and not yet cleaned up
+_live_groups = set()
+
+
+def _kill_live_groups():
+    for pgid in list(_live_groups):
+        try:
+            os.killpg(pgid, signal.SIGKILL)
+        except (ProcessLookupError, PermissionError):
+            pass
+        _live_groups.discard(pgid)
+
+
+atexit.register(_kill_live_groups)
+
+
+def _exit_on_signal(signum, frame):
+    # Unwinds through run_once, which stops its child on the way out
+    raise SystemExit(128 + signum)
+
+
+def install_signal_handlers():
+    """Turn SIGTERM and SIGHUP into a clean exit that takes the children with it"""
+    for name in ("SIGTERM", "SIGHUP"):
+        if hasattr(signal, name):
+            signal.signal(getattr(signal, name), _exit_on_signal)
+
+
+def _child_setup(preexec_fn, parent_pid):
+    """preexec_fn for the child: die with the builder, then run preexec_fn"""
+    libc = None
+    if ctypes is not None and sys.platform.startswith("linux"):
+        try:
+            libc = ctypes.CDLL(None, use_errno=True)
+        except OSError:
+            libc = None
+
+    def setup():
+        if libc is not None:
+            libc.prctl(PR_SET_PDEATHSIG, signal.SIGKILL)
+            # The builder may have died before the request was made
+            if os.getppid() != parent_pid:
+                os._exit(1)
+        if preexec_fn is not None:
+            preexec_fn()
+    return setup
+
+
+def _group_alive(pgid):
+    try:
+        os.killpg(pgid, 0)
+        return True
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+
+
+def _stop_group(pid):
+    """Terminate, then kill, the process group led by pid; returns the leader's (status, rusage)"""
+    result = None
+    for sig in (signal.SIGTERM, signal.SIGKILL):
+        try:
+            os.killpg(pid, sig)
+        except ProcessLookupError:
+            pass
+        end = time.monotonic() + KILL_GRACE_SECONDS
+        while result is None or _group_alive(pid):
+            if result is None:
+                reaped, status, rusage = os.wait4(pid, os.WNOHANG)
+                if reaped:
+                    result = (status, rusage)
+                    continue
+            if time.monotonic() >= end:
+                break
+            time.sleep(0.05)
+        if result is not None and not _group_alive(pid):
+            break
+    if result is None:
+        _, status, rusage = os.wait4(pid, 0)
+        result = (status, rusage)
+    _live_groups.discard(pid)
+    return result
+
+
+def run_once(command, env, stdout, stderr, deadline=None, preexec_fn=None):
+    """Run command in its own process group until it exits or deadline passes
+
+    deadline is a time.monotonic() value. Returns (outcome, exit code, rusage);
+    rusage is None where the platform has no wait4.
+    """
+    process = subprocess.Popen(command, stdout=stdout, stderr=stderr, env=env,
+                               start_new_session=hasattr(os, "killpg"),
+                               preexec_fn=(_child_setup(preexec_fn, os.getpid())
+                                           if os.name == "posix" else None))
+    if not hasattr(os, "wait4"):
+        timeout = None if deadline is None else max(deadline - time.monotonic(), 0.0)
+        try:
+            code = process.wait(timeout)
+        except subprocess.TimeoutExpired:
+            process.kill()
+            return TIMEOUT, process.wait(), None
+        return (OK if code == 0 else FAILED), code, None
+
+    _live_groups.add(process.pid)
+    try:
+        delay = 0.01
+        while True:
+            pid, status, rusage = os.wait4(process.pid, os.WNOHANG)
+            if pid:
+                break
+            if deadline is not None and time.monotonic() >= deadline:
+                status, rusage = _stop_group(process.pid)
+                process.returncode = os.waitstatus_to_exitcode(status)
+                return TIMEOUT, process.returncode, rusage
+            pause = min(delay, MAX_POLL_SECONDS)
+            if deadline is not None:
+                pause = min(pause, max(deadline - time.monotonic(), 0.0))
+            time.sleep(pause)
+            delay *= 2
+    except BaseException:
+        # Ctrl-C or SIGTERM: take the whole group down before unwinding
+        if process.returncode is None:
+            _stop_group(process.pid)
+            process.returncode = -signal.SIGKILL
+        raise
+
+    process.returncode = os.waitstatus_to_exitcode(status)
+    # Anything the leader left running in its group goes too
+    if _group_alive(process.pid):
+        try:
+            os.killpg(process.pid, signal.SIGKILL)
+        except ProcessLookupError:
+            pass
+    _live_groups.discard(process.pid)
+    if process.returncode == 0:
+        return OK, 0, rusage
+    return (KILLED if process.returncode < 0 else FAILED), process.returncode, rusage
+
+
+def supervise(command, env, timeout=None, deadline=None, policy=None, preexec_fn=None):
+    """Run command under a deadline, retrying the failures policy allows
+
+    timeout bounds each attempt in seconds and deadline (time.monotonic())
+    bounds all of them. Returns a dict with the last attempt's outcome, exit
+    code, output, wall time and rusage, plus the number of attempts.
+    """
+    policy = dict(DEFAULT_POLICY, **(policy or {}))
+    attempt = 0
+    while True:
+        attempt += 1
+        attempt_deadline = deadline
+        if timeout:
+            attempt_deadline = min(d for d in (deadline, time.monotonic() + timeout) if d is not None)
+
+        start = time.perf_counter()
+        # Output goes to temp files so a chatty child can never block on a full pipe
+        with tempfile.TemporaryFile() as out, tempfile.TemporaryFile() as err:
+            outcome, code, rusage = run_once(command, env, out, err, attempt_deadline, preexec_fn)
+            wall_seconds = time.perf_counter() - start
+            out.seek(0)
+            stdout = out.read().decode(errors="replace")
+            err.seek(0)
+            stderr = err.read().decode(errors="replace")
+        if outcome == FAILED and TRANSIENT_PATTERN.search(stderr or stdout):
+            outcome = TRANSIENT
+
+        result = {"outcome": outcome, "exit_code": code, "stdout": stdout, "stderr": stderr,
+                  "wall_seconds": wall_seconds, "rusage": rusage, "attempts": attempt}
+        backoff = policy["backoff_seconds"] * 2 ** (attempt - 1)
+        if (outcome == OK or outcome not in policy["retry_on"]
+                or attempt > policy["retries"]
+                or (deadline is not None and time.monotonic() + backoff >= deadline)):
+            return result
+        print(f"🔁 {describe(result)}; retrying in {backoff:g} s "
+              f"(attempt {attempt + 1} of {policy['retries'] + 1})")
+        time.sleep(backoff)
+
+
+def describe(result):
+    """One line saying how a supervised run ended"""
+    outcome, code = result["outcome"], result["exit_code"]
+    if outcome == OK:
+        return "finished"
+    if outcome == TIMEOUT:
+        return f"timed out after {result['wall_seconds']:.0f} s; process group killed"
+    if code is not None and code < 0:
+        try:
+            name = signal.Signals(-code).name
+        except ValueError:
+            name = f"signal {-code}"
+        return f"killed by {name}"
+    if outcome == TRANSIENT:
+        return f"exit status {code} (transient)"
+    return f"exit status {code}"
@@ -0,0 +1,353 @@
+"""
+Deterministic surface patterns for cylindrical lamp shades.
+Computes displacement fields (hex, voronoi, ribbed, seeded noise) in NumPy over
+cylindrical coordinates: u is arc length around the wall and v is height, both
+in mm. Every pattern tiles seamlessly around the circumference and depends only
+on its parameters and seed, never on Blender's texture code, so the same
+settings give the same geometry in every Blender version.
+Runs inside Blender (which bundles NumPy) as well as standalone.
+"""
+
+import math
+
+import numpy as np
+
+# Width of the slope from a raised cell down to the groove floor, as a
+# fraction of the cell size; each groove spans two of them
+GROOVE_FRACTION = 0.15
+
+# Wall samples across one groove; fewer alias the grooves and facet them unevenly
+GROOVE_SAMPLES = 3
+
+# Samples per cell that put GROOVE_SAMPLES across every groove
+_GROOVED = int(math.ceil(round(GROOVE_SAMPLES / (2.0 * GROOVE_FRACTION), 6)))
+
+# Base grid samples per cell for grooved patterns; still close enough that
+# every groove crosses a sample the refinement test looks at
+_GROOVED_BASE = 3
+
+# Halvings of the base grid that bring grooves up to _GROOVED samples per cell
+_GROOVED_LEVELS = int(math.ceil(math.log2(_GROOVED / _GROOVED_BASE)))
+
+# Wall samples per pattern cell along u and v on the base grid; None means the
+# pattern is constant along that axis and needs no rows there
+SAMPLES_PER_CELL = {
+    "hex": (_GROOVED_BASE, _GROOVED_BASE),
+    "voronoi": (_GROOVED_BASE, _GROOVED_BASE),
+    "ribbed": (8, None),
+    "noise": (4, 4),
+}
+
+# Times a base grid cell may be split in four where the pattern bends
+REFINE_LEVELS = {
+    "hex": _GROOVED_LEVELS,
+    "voronoi": _GROOVED_LEVELS,
+    "ribbed": 0,
+    "noise": 0,
+}
+
+# mm the displaced surface may stray from a cell's bilinear fit before the
+# cell is split; flat cell tops and groove floors never are
+REFINE_TOLERANCE = 0.05
+
+
+def _smoothstep(x):
+    x = np.clip(x, 0.0, 1.0)
+    return x * x * (3.0 - 2.0 * x)
+
+
+def cells_around(circumference, cell):
+    """Whole number of cells closest to `cell` mm that tile the circumference"""
+    return max(3, int(round(circumference / cell)))
+
+
+def hex_field(u, v, circumference, height, cell, seed=0):
+    """Raised hexagonal cells separated by grooves"""
+    columns = cells_around(circumference, cell)
+    width = circumference / columns  # distance between neighbouring centres
+    size = width / math.sqrt(3.0)  # centre to corner
+    # Pointy-top axial coordinates; rounding in cube space picks the cell
+    q = (u * math.sqrt(3.0) / 3.0 - v / 3.0) / size
+    r = (v * 2.0 / 3.0) / size
+    x, z = q, r
+    y = -x - z
+    rx, ry, rz = np.round(x), np.round(y), np.round(z)
+    dx, dy, dz = np.abs(rx - x), np.abs(ry - y), np.abs(rz - z)
+    fix_x = (dx > dy) & (dx > dz)
+    fix_y = ~fix_x & (dy > dz)
+    rx = np.where(fix_x, -ry - rz, rx)
+    ry = np.where(fix_y, -rx - rz, ry)
+    rz = -rx - ry
+
+    # Distance from the point to the nearest hexagon edge
+    cu = size * math.sqrt(3.0) * (rx + rz / 2.0)
+    cv = size * 1.5 * rz
+    du = np.abs(((u - cu) + circumference / 2.0) % circumference - circumference / 2.0)
+    dv = np.abs(v - cv)
+    inner = width / 2.0
+    edge = inner - np.maximum(du, du * 0.5 + dv * math.sqrt(3.0) / 2.0)
+    return _smoothstep(edge / (GROOVE_FRACTION * cell))
+
+
+def voronoi_field(u, v, circumference, height, cell, seed=0):
+    """Raised Voronoi cells from one jittered site per grid square"""
+    columns = cells_around(circumference, cell)
+    width = circumference / columns
+    rows = int(np.ceil(height / width)) + 2
+    rng = np.random.default_rng(seed)
+    jitter = rng.random((columns, rows + 2, 2))
+
+    gu = np.floor(u / width).astype(np.int64)
+    gv = np.floor(v / width).astype(np.int64)
+    nearest = np.full(u.shape, np.inf)
+    second = np.full(u.shape, np.inf)
+    for ou in (-1, 0, 1):
+        for ov in (-1, 0, 1):
+            cu = gu + ou
+            cv = gv + ov
+            site = jitter[cu % columns, np.clip(cv + 1, 0, rows + 1)]
+            su = (cu + site[..., 0]) * width
+            sv = (cv + site[..., 1]) * width
+            du = (u - su + circumference / 2.0) % circumference - circumference / 2.0
+            dist = np.hypot(du, v - sv)
+            second = np.where(dist < nearest, nearest, np.minimum(second, dist))
+            nearest = np.minimum(nearest, dist)
+    # Half the gap between the two closest sites approximates the edge distance
+    return _smoothstep((second - nearest) / 2.0 / (GROOVE_FRACTION * cell))
+
+
+def ribbed_field(u, v, circumference, height, cell, seed=0):
+    """Vertical ribs with a cosine profile"""
+    columns = cells_around(circumference, cell)
+    return 0.5 + 0.5 * np.cos(2.0 * math.pi * columns * u / circumference)
+
+
+def noise_field(u, v, circumference, height, cell, seed=0, octaves=3):
+    """Seeded value noise, summed over octaves and normalised to [0, 1]"""
+    rng = np.random.default_rng(seed)
+    total = np.zeros(np.shape(u))
+    weight = 0.0
+    for octave in range(octaves):
+        columns = cells_around(circumference, cell) << octave
+        width = circumference / columns
+        rows = int(np.ceil(height / width)) + 2
+        lattice = rng.random((columns, rows))
+        fu, fv = u / width, v / width
+        iu, iv = np.floor(fu).astype(np.int64), np.floor(fv).astype(np.int64)
+        tu, tv = _smoothstep(fu - iu), _smoothstep(fv - iv)
+        i0, i1 = iu % columns, (iu + 1) % columns
+        j0, j1 = np.clip(iv, 0, rows - 1), np.clip(iv + 1, 0, rows - 1)
+        bottom = lattice[i0, j0] * (1 - tu) + lattice[i1, j0] * tu
+        top = lattice[i0, j1] * (1 - tu) + lattice[i1, j1] * tu
+        amplitude = 0.5 ** octave
+        total += amplitude * (bottom * (1 - tv) + top * tv)
+        weight += amplitude
+    return total / weight
+
+
+PATTERNS = {
+    "hex": hex_field,
+    "voronoi": voronoi_field,
+    "ribbed": ribbed_field,
+    "noise": noise_field,
+}
+
+
+def pattern_field(name, u, v, circumference, height, cell, seed=0):
+    """Evaluate a named pattern on a wall `height` mm tall; values lie in [0, 1]"""
+    if name not in PATTERNS:
+        raise ValueError(f"Unknown pattern {name!r}; choose from {', '.join(PATTERNS)}")
+    return PATTERNS[name](np.asarray(u, dtype=np.float64), np.asarray(v, dtype=np.float64),
+                          circumference, height, cell, seed)
+
+
+def radial_offset(name, u, v, circumference, height, cell, seed=0, strength=2.0,
+                  mid_level=0.5, rim=0.0):
+    """mm the wall moves along its radius at (u, v)
+
+    Follows Blender's Displace modifier: offset = (field - mid_level) *
+    strength. Within `rim` mm of either end the offset fades to zero so the
+    wall still meets the parts joined to it.
+    """
+    offset = (pattern_field(name, u, v, circumference, height, cell, seed) - mid_level) * strength
+    if rim > 0:
+        offset *= _smoothstep(v / rim) * _smoothstep((height - v) / rim)
+    return offset
+
+
+def wall_grid(name, radius, height, cell, rim=0.0):
+    """Angles and heights of the base cylinder wall grid for the pattern
+
+    Rows are only as dense as the pattern varies along v; a pattern constant
+    in v gets rows just at the ends and where the rim taper starts and stops.
+    """
+    per_u, per_v = SAMPLES_PER_CELL[name]
+    circumference = 2.0 * math.pi * radius
+    segments = cells_around(circumference, cell) * per_u
+    angles = np.arange(segments) * (2.0 * math.pi / segments)
+    if per_v is None:
+        rows = np.array([0.0, height])
+    else:
+        rows = np.linspace(0.0, height, int(np.ceil(height / (cell / per_v))) + 1)
+    if rim > 0:
+        taper = np.linspace(0.0, rim, 4)
+        rows = np.union1d(rows, np.concatenate([taper, height - taper]))
+    return angles, rows
+
+
+def _blocks(grid, size):
+    """View of a 2D grid as (rows, columns) of size x size blocks"""
+    rows, cols = grid.shape
+    return grid.reshape(rows // size, size, cols // size, size).swapaxes(1, 2)
+
+
+def _leaf_depths(offset, base_rows, levels):
+    """Depth of the quadtree leaf covering each finest cell of the wall lattice
+
+    A base cell is split while the offset at its edge midpoints and centre
+    strays more than REFINE_TOLERANCE from the bilinear fit of its corners.
+    Depths then grow until neighbouring leaves differ by at most one level,
+    and base rows near either end are held back so the end rings stay on the
+    base grid.
+    """
+    fine = 1 << levels
+    n_rows, n_cols = offset.shape[0] - 1, offset.shape[1]
+    row = np.arange(base_rows)
+    cap = np.repeat(np.minimum(np.minimum(row, base_rows - 1 - row), levels), fine)[:, None]
+    depth = np.zeros((n_rows, n_cols), dtype=np.int64)
+
+    for level in range(levels):
+        size = fine >> level
+        half = size // 2
+        j0 = np.arange(n_rows // size)[:, None] * size
+        i0 = np.arange(n_cols // size)[None, :] * size
+        i1 = (i0 + size) % n_cols
+        a, b = offset[j0, i0], offset[j0, i1]
+        c, d = offset[j0 + size, i0], offset[j0 + size, i1]
+        error = np.abs(offset[j0 + half, i0 + half] - (a + b + c + d) / 4.0)
+        for value, fit in ((offset[j0, i0 + half], (a + b) / 2.0),
+                           (offset[j0 + size, i0 + half], (c + d) / 2.0),
+                           (offset[j0 + half, i0], (a + c) / 2.0),
+                           (offset[j0 + half, i1], (b + d) / 2.0)):
+            error = np.maximum(error, np.abs(value - fit))
+        split = (depth[::size, ::size] == level) & (cap[::size] > level) & (error > REFINE_TOLERANCE)
+        _blocks(depth, size)[split] = level + 1
+
+    # Balance: a leaf next to one two or more levels deeper is split too
+    changed = True
+    while changed:
+        changed = False
+        padded = np.pad(depth, ((1, 1), (0, 0)))
+        around = np.maximum(np.maximum(padded[:-2], padded[2:]),
+                            np.maximum(np.roll(depth, 1, axis=1), np.roll(depth, -1, axis=1)))
+        for level in range(levels - 1):
+            size = fine >> level
+            split = ((depth[::size, ::size] == level)
+                     & (_blocks(around, size).max(axis=(2, 3)) > level + 1))
+            if split.any():
+                _blocks(depth, size)[split] = level + 1
+                changed = True
+    return depth
+
+
+def cylinder_wall(angles, rows, radius, z0=0.0):
+    """Vertices (n, 3) and quad faces (m, 4) of an open tube on the given grid"""
+    segments = len(angles)
+    ring = np.stack([radius * np.cos(angles), radius * np.sin(angles)], axis=1)
+    verts = np.empty((len(rows), segments, 3))
+    verts[:, :, :2] = ring
+    verts[:, :, 2] = (z0 + np.asarray(rows))[:, None]
+
+    i = np.arange(len(rows) - 1)[:, None] * segments
+    j = np.arange(segments)[None, :]
+    j_next = (j + 1) % segments
+    faces = np.stack([i + j, i + j_next, i + segments + j_next, i + segments + j], axis=-1)
+    return verts.reshape(-1, 3), faces.reshape(-1, 4)
+
+
+def refine_wall(angles, rows, radius, name, cell, seed=0, strength=2.0, mid_level=0.5,
+                rim=0.0, z0=0.0):
+    """Vertices (n, 3), quads (m, 4) and triangles (k, 3) of an open tube for the pattern
+
+    Starts from the wall_grid grid and splits cells, up to REFINE_LEVELS
+    times, only where the displacement bends, such as across groove edges;
+    flat cell tops and groove floors stay on the base grid. Split cells meet
+    coarser neighbours through triangle fans, so the surface has no cracks.
+    The vertices are not displaced; the first and last len(angles) of them
+    are the bottom and top rings, exactly as cylinder_wall places them.
+    """
+    height = rows[-1]
+    levels = REFINE_LEVELS[name]
+    fine = 1 << levels
+    n_cols = len(angles) * fine
+    steps = np.arange(fine) / fine
+    heights = np.append((rows[:-1, None] + np.diff(rows)[:, None] * steps).ravel(), rows[-1])
+    n_rows = len(heights) - 1
+
+    circumference = 2.0 * math.pi * radius
+    u, v = np.meshgrid(np.arange(n_cols) * (circumference / n_cols), heights)
+    offset = radial_offset(name, u, v, circumference, height, cell, seed, strength, mid_level, rim)
+    depth = _leaf_depths(offset, len(rows) - 1, levels)
+
+    def node(j, i):
+        return j * n_cols + i % n_cols
+
+    quads, triangles = [], []
+    for level in range(levels + 1):
+        size = fine >> level
+        jj, ii = np.nonzero(depth[::size, ::size] == level)
+        j0, i0 = jj * size, ii * size
+        corners = [node(j0, i0), node(j0, i0 + size), node(j0 + size, i0 + size),
+                   node(j0 + size, i0)]
+        if level == levels:
+            quads.append(np.stack(corners, axis=1))
+            continue
+        # A neighbour one level deeper leaves a vertex at the middle of that edge
+        half = size // 2
+        below = np.where(j0 > 0, depth[np.maximum(j0 - 1, 0), i0], 0)
+        above = np.where(j0 + size < n_rows, depth[np.minimum(j0 + size, n_rows - 1), i0], 0)
+        hanging = np.stack([below, depth[j0, (i0 + size) % n_cols], above,
+                            depth[j0, (i0 - 1) % n_cols]], axis=1) > level
+        middles = [node(j0, i0 + half), node(j0 + half, i0 + size), node(j0 + size, i0 + half),
+                   node(j0 + half, i0)]
+        plain = ~hanging.any(axis=1)
+        quads.append(np.stack(corners, axis=1)[plain])
+        fan = ~plain
+        centre = node(j0 + half, i0 + half)[fan]
+        for edge in range(4):
+            start, end = corners[edge][fan], corners[(edge + 1) % 4][fan]
+            middle, split = middles[edge][fan], hanging[fan, edge]
+            triangles.append(np.stack([centre, start, np.where(split, middle, end)], axis=1))
+            triangles.append(np.stack([centre, middle, end], axis=1)[split])
+
+    quads = np.concatenate(quads)
+    triangles = np.concatenate(triangles) if triangles else np.empty((0, 3), dtype=np.int64)
+    used, index = np.unique(np.concatenate([quads.ravel(), triangles.ravel()]),
+                            return_inverse=True)
+    quads = index[:quads.size].reshape(-1, 4)
+    triangles = index[quads.size:].reshape(-1, 3)
+
+    # Lattice columns on the base grid reuse its angles exactly
+    column = used % n_cols
+    angle = np.where(column % fine == 0, np.asarray(angles)[column // fine],
+                     column * (2.0 * math.pi / n_cols))
+    verts = np.stack([radius * np.cos(angle), radius * np.sin(angle),
+                      z0 + heights[used // n_cols]], axis=1)
+    return verts, quads, triangles
+
+
+def displace_cylinder(coords, name, cell, height, seed=0, strength=2.0, mid_level=0.5,
+                      z0=0.0, rim=0.0):
+    """Push (n, 3) wall vertices along the radius by the pattern's radial_offset"""
+    coords = np.asarray(coords, dtype=np.float64)
+    radial = np.hypot(coords[:, 0], coords[:, 1])
+    radius = float(radial.max())
+    circumference = 2.0 * math.pi * radius
+    angle = np.arctan2(coords[:, 1], coords[:, 0]) % (2.0 * math.pi)
+    offset = radial_offset(name, angle * radius, coords[:, 2] - z0, circumference, height,
+                           cell, seed, strength, mid_level, rim)
+
+    scale = (radial + offset) / np.maximum(radial, 1e-12)
+    displaced = coords.copy()
+    displaced[:, :2] *= scale[:, None]
+    return displaced
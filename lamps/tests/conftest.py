@@ -0,0 +1,95 @@
+"""
+Shared fixtures for the builder tests.
+Puts the lamps modules on sys.path and builds small STLs by running bpy
+scripts through blender_stub, so the tests need no Blender install.
+"""
+
+import json
+import os
+import stat
+import sys
+
+import pytest
+
+LAMPS_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if LAMPS_DIR not in sys.path:
+    sys.path.insert(0, LAMPS_DIR)
+
+import blender_stub  # noqa: E402
+
+# bpy script building axis-aligned boxes as one object and exporting it the
+# way the lamp scripts do
+BOX_SCRIPT = """
+import json
+import os
+import sys
+
+import bpy
+
+sys.path.append({lamps!r})
+from stl_export import export_stl
+
+# Outward-wound quads over corners numbered x + 2y + 4z
+FACES = [(0, 2, 3, 1), (4, 5, 7, 6), (0, 1, 5, 4), (2, 6, 7, 3), (0, 4, 6, 2), (1, 3, 7, 5)]
+
+vertices, faces = [], []
+for low, high in json.loads({boxes!r}):
+    first = len(vertices)
+    vertices += [(high[0] if i & 1 else low[0], high[1] if i & 2 else low[1],
+                  high[2] if i & 4 else low[2]) for i in range(8)]
+    faces += [tuple(first + i for i in face) for face in FACES]
+faces = faces[:len(faces) - {open_faces}]
+
+mesh = bpy.data.meshes.new("{name}_Mesh")
+mesh.from_pydata(vertices, [], faces)
+mesh.update()
+obj = bpy.data.objects.new("{name}", mesh)
+bpy.context.collection.objects.link(obj)
+export_stl(obj, os.path.join(os.path.dirname(os.path.abspath(__file__)), "STLs", "{name}.stl"))
+"""
+
+# Stand-in for the blender executable: runs the --python script on the stub
+FAKE_BLENDER = """#!{python}
+import sys
+
+sys.path.insert(0, {lamps!r})
+import blender_stub
+
+args = sys.argv[1:]
+if "--version" in args:
+    print("Blender 4.0.2 (stub)")
+    sys.exit(0)
+blender_stub.run_script(args[args.index("--python") + 1])
+"""
+
+
+@pytest.fixture
+def box_script(tmp_path):
+    """Write tmp_path/<name>.py, a lamp script exporting boxes [(low, high), ...] as <name>.stl
+
+    open_faces drops that many faces off the end, leaving the mesh open.
+    """
+    def write(name, boxes, open_faces=0):
+        script = tmp_path / f"{name}.py"
+        script.write_text(BOX_SCRIPT.format(lamps=LAMPS_DIR, name=name, open_faces=open_faces,
+                                            boxes=json.dumps(boxes)))
+        return str(script)
+    return write
+
+
+@pytest.fixture
+def build_boxes(tmp_path, box_script):
+    """Build boxes into tmp_path/<name>.stl through the stub; return its path"""
+    def build(name, boxes, open_faces=0):
+        blender_stub.run_script(box_script(name, boxes, open_faces), export_dir=str(tmp_path))
+        return str(tmp_path / f"{name}.stl")
+    return build
+
+
+@pytest.fixture
+def fake_blender(tmp_path):
+    """Path of an executable that behaves like `blender --background --python` on the stub"""
+    path = tmp_path / "blender"
+    path.write_text(FAKE_BLENDER.format(python=sys.executable, lamps=LAMPS_DIR))
+    path.chmod(path.stat().st_mode | stat.S_IXUSR)
+    return str(path)
@@ -0,0 +1,40 @@
+"""Object transforms in the bpy stub"""
+
+import math
+
+import pytest
+
+import blender_stub
+
+blender_stub.install()
+import bpy  # noqa: E402
+
+
+def rotated_object():
+    bpy.reset()
+    mesh = bpy.data.meshes.new("Tri")
+    mesh.from_pydata([(1, 0, 0), (0, 1, 0), (0, 0, 1)], [], [(0, 1, 2)])
+    obj = bpy.data.objects.new("Tri", mesh)
+    obj.scale = (2, 1, 1)
+    obj.rotation_euler = (math.pi / 2, 0, math.pi / 2)
+    obj.location = (0, 0, 10)
+    return obj
+
+
+def test_world_triangles_scale_rotate_then_translate():
+    # X turns y onto z and z onto -y, then Z turns x onto y and -y onto x
+    (triangle,) = rotated_object().world_triangles()
+    expected = [(0, 2, 10), (0, 0, 11), (1, 0, 10)]
+    for corner, want in zip(triangle, expected):
+        assert corner == pytest.approx(want, abs=1e-12)
+
+
+def test_transform_apply_bakes_the_rotation():
+    obj = rotated_object()
+    before = obj.world_triangles()
+    bpy.context.collection.objects.link(obj)
+    obj.select_set(True)
+    bpy.ops.object.transform_apply(location=True, rotation=True, scale=True)
+    assert tuple(obj.rotation_euler) == (0, 0, 0)
+    for corner, want in zip(obj.world_triangles()[0], before[0]):
+        assert corner == pytest.approx(want, abs=1e-12)
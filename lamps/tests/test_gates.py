@@ -0,0 +1,70 @@
+"""Printability gates on STLs built through the bpy stub"""
+
+import os
+from types import SimpleNamespace
+
+import build_all_lamps
+import layer_slicer
+import mesh_check
+import wall_thickness
+from build_report import load_report
+from mesh_io import geometry_hash, read_stl
+
+CUBE = [[0, 0, 0], [20, 20, 20]]
+
+
+def test_closed_cube_passes_every_gate(build_boxes):
+    path = build_boxes("cube", [CUBE])
+    assert mesh_check.check_stl(path)["ok"]
+    walls = wall_thickness.analyze_stl(path, min_wall=0.8)
+    assert walls["ok"] and walls["thinnest_mm"] is None
+    layers = layer_slicer.slice_stl(path)
+    assert layers["layers"] == 100
+    assert layers["thin_layers"] == 0 and layers["empty_layers"] == 0
+    assert layers["max_contours"] == 1 and layers["open_contour_layers"] == 0
+
+
+def test_open_mesh_is_not_watertight(build_boxes):
+    result = mesh_check.check_stl(build_boxes("open", [CUBE], open_faces=1))
+    assert not result["watertight"] and not result["ok"]
+    assert result["open_edges"] == 4
+
+
+def test_crossing_boxes_self_intersect(build_boxes):
+    result = mesh_check.check_stl(build_boxes("crossing", [CUBE, [[10.5, 11.5, 6.5], [30, 30, 30]]]))
+    assert result["watertight"]
+    assert result["self_intersections"] > 0 and not result["ok"]
+
+
+def test_thin_slab_fails_walls_and_layers(build_boxes):
+    path = build_boxes("slab", [[[0, 0, 0], [0.3, 20, 10]]])
+    walls = wall_thickness.analyze_stl(path, min_wall=0.8)
+    assert not walls["ok"]
+    assert abs(walls["thinnest_mm"] - 0.3) < 1e-3
+    layers = layer_slicer.slice_stl(path, nozzle=0.4)
+    assert layers["thin_layers"] == layers["layers"]
+    assert abs(layers["min_feature_width_mm"] - 0.3) < 1e-3
+
+
+def test_gap_between_islands_is_not_a_thin_feature(build_boxes):
+    path = build_boxes("islands", [[[0, 0, 0], [5, 5, 4]], [[5.2, 0, 0], [10, 5, 4]]])
+    layers = layer_slicer.slice_stl(path, nozzle=0.4)
+    assert layers["max_contours"] == 2
+    assert layers["thin_layers"] == 0
+    assert layers["min_feature_width_mm"] is None
+
+
+def test_wall_results_follow_the_geometry(build_boxes, tmp_path):
+    stl_dir = str(tmp_path)
+    args = SimpleNamespace(min_wall=0.8)
+    path = build_boxes("part", [CUBE])
+    stl_geometry = {"part.stl": geometry_hash(read_stl(path))}
+    assert build_all_lamps.check_walls(stl_dir, ["part.stl"], args, stl_geometry)
+
+    # Rebuilt thin by a run that did not check walls: the old verdict must not stand
+    build_boxes("part", [[[0, 0, 0], [0.3, 20, 10]]])
+    stl_geometry = {"part.stl": geometry_hash(read_stl(path))}
+    assert not build_all_lamps.check_walls(stl_dir, ["part.stl"], args, stl_geometry)
+    walls = load_report(stl_dir)["artifacts"]["part.stl"]["walls"]
+    assert walls["geometry_hash"] == stl_geometry["part.stl"]
+    assert os.path.exists(os.path.join(stl_dir, walls["map"]))
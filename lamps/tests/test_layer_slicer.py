@@ -0,0 +1,54 @@
+"""Contours and feature widths from the layer slicer"""
+
+import time
+
+import numpy as np
+
+import layer_slicer
+from perforation import perforated_shade
+
+
+def prism(levels, sides=8, radius=10.0):
+    """Closed prism with a ring of vertices at every level"""
+    angle = np.arange(sides) * 2 * np.pi / sides
+    ring = np.column_stack([radius * np.cos(angle), radius * np.sin(angle)])
+    verts = np.array([[x, y, z] for z in levels for x, y in ring])
+    faces = []
+    for k in range(len(levels) - 1):
+        for i in range(sides):
+            a, b = k * sides + i, k * sides + (i + 1) % sides
+            faces += [[a, b, b + sides], [a, b + sides, a + sides]]
+    top = (len(levels) - 1) * sides
+    faces += [[0, i + 1, i] for i in range(1, sides - 1)]
+    faces += [[top, top + i, top + i + 1] for i in range(1, sides - 1)]
+    return verts[np.array(faces)].astype(np.float32)
+
+
+def test_plane_through_a_vertex_ring_gives_one_contour():
+    # The layer at z = 1.1 cuts exactly through the middle ring
+    summary = layer_slicer.summarize_slices(layer_slicer.slice_mesh(prism([0.0, 1.1, 2.0])))
+    assert summary["layers"] == 10
+    assert summary["open_contour_layers"] == 0
+    assert summary["max_contours"] == 1
+
+
+def test_duplicated_faces_still_close_their_contours():
+    triangles = prism([0.0, 1.1, 2.0])
+    summary = layer_slicer.summarize_slices(
+        layer_slicer.slice_mesh(np.concatenate([triangles, triangles])))
+    assert summary["open_contour_layers"] == 0
+    assert summary["max_contours"] == 2
+
+
+def test_realistic_shade_slices_in_well_under_a_second():
+    verts, quads, _ = perforated_shade("cylinder", 90, 90, 100, pitch=4.0, hole_size=2.4,
+                                       thickness=1.5, margin_rows=1, subdivisions=2)
+    triangles = verts[np.concatenate([quads[:, [0, 1, 2]], quads[:, [0, 2, 3]]])]
+    triangles = triangles.astype(np.float32)
+    start = time.perf_counter()
+    summary = layer_slicer.summarize_slices(layer_slicer.slice_mesh(triangles))
+    elapsed = time.perf_counter() - start
+    assert summary["layers"] == 500
+    assert summary["open_contour_layers"] == 0
+    # About 0.75 s on one core; leave headroom for slow CI machines
+    assert elapsed < 2.0
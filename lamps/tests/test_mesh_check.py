@@ -0,0 +1,19 @@
+"""Self-intersection search"""
+
+import numpy as np
+
+import mesh_check
+
+# Two triangles meeting at the origin; the second stands across the first
+VERTICES = np.array([[0, 0, 0], [2, -1, 0], [2, 1, 0], [3, 0, -1], [3, 0, 1], [0, 2, 0]],
+                    dtype=float)
+
+
+def test_triangles_sharing_a_vertex_can_cross():
+    pairs = mesh_check.find_self_intersections(VERTICES, np.array([[0, 1, 2], [0, 3, 4]]))
+    assert sorted(pairs[0].tolist()) == [0, 1]
+
+
+def test_fan_around_a_vertex_does_not_cross():
+    pairs = mesh_check.find_self_intersections(VERTICES, np.array([[0, 1, 2], [0, 2, 5]]))
+    assert len(pairs) == 0
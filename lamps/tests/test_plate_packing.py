@@ -0,0 +1,40 @@
+"""Plate packing and 3MF output"""
+
+import argparse
+import zipfile
+from xml.etree import ElementTree
+
+import numpy as np
+import pytest
+
+import plate_packing
+from mesh_io import write_stl
+
+CORE = "{http://schemas.microsoft.com/3dmanufacturing/core/2015/02}"
+
+
+@pytest.mark.parametrize("text", ["0x220", "220x-5", "nanx220"])
+def test_bed_must_have_a_positive_size(text):
+    with pytest.raises(argparse.ArgumentTypeError):
+        plate_packing.parse_bed(text)
+
+
+def test_3mf_escapes_names_and_drops_collapsed_faces(tmp_path):
+    triangles = np.array([[[0, 0, 0], [10, 0, 0], [0, 10, 0]],
+                          [[0, 0, 0], [1e-6, 0, 0], [0, 10, 0]]])
+    path = tmp_path / "plate.3mf"
+    plate_packing.write_3mf(path, [('shade "A" & <B>', triangles)])
+    with zipfile.ZipFile(path) as archive:
+        model = ElementTree.fromstring(archive.read("3D/3dmodel.model"))
+    part = model.find(f"{CORE}resources/{CORE}object")
+    assert part.get("name") == 'shade "A" & <B>'
+    assert len(part.findall(f"{CORE}mesh/{CORE}triangles/{CORE}triangle")) == 1
+
+
+def test_empty_stl_is_skipped(tmp_path):
+    empty, box = tmp_path / "empty.stl", tmp_path / "part.stl"
+    write_stl(empty, np.zeros((0, 3, 3)))
+    write_stl(box, [[[0, 0, 0], [10, 0, 0], [0, 10, 5]]])
+    summary = plate_packing.pack_stls([empty, box], 220, 220, tmp_path / "plates")
+    assert [p["name"] for p in summary["plates"][0]["parts"]] == ["part"]
+    assert summary["unplaced"] == []
@@ -0,0 +1,82 @@
+"""Post-build analyzer cache: reuse by content hash, version and settings"""
+
+import os
+from types import SimpleNamespace
+
+import pytest
+
+import post_build
+
+ARGS = SimpleNamespace(filament_density=1.24, filament_diameter=1.75, filament_cost=20.0)
+
+
+@pytest.fixture
+def material_analyzer(monkeypatch):
+    """Only the material analyzer registered, at version 1"""
+    monkeypatch.setattr(post_build, "ANALYZERS", {})
+
+    def register(version=1):
+        post_build.register_analyzer(
+            "material", "mesh_stats:analyze_stl", version=version,
+            settings=lambda args: {"density": args.filament_density,
+                                   "diameter": args.filament_diameter,
+                                   "cost_per_kg": args.filament_cost})
+    register()
+    return register
+
+
+def test_results_are_cached_by_content(build_boxes, tmp_path, material_analyzer):
+    build_boxes("part", [[[0, 0, 0], [20, 20, 20]]])
+    stl_dir = str(tmp_path)
+    report = {}
+    assert post_build.run_analyzers(stl_dir, ["part.stl"], ARGS, report, jobs=1) == 1
+    first = report["artifacts"]["part.stl"]["material"]
+    assert os.path.exists(os.path.join(stl_dir, post_build.ANALYSIS_CACHE_FILE))
+
+    # Same bytes: served from the cache, even into a fresh report
+    report = {}
+    assert post_build.run_analyzers(stl_dir, ["part.stl"], ARGS, report, jobs=1) == 0
+    assert report["artifacts"]["part.stl"]["material"] == first
+
+    # New bytes: computed again
+    build_boxes("part", [[[0, 0, 0], [20, 20, 40]]])
+    assert post_build.run_analyzers(stl_dir, ["part.stl"], ARGS, report, jobs=1) == 1
+    assert report["artifacts"]["part.stl"]["material"] != first
+
+
+def test_settings_and_version_invalidate(build_boxes, tmp_path, material_analyzer):
+    build_boxes("part", [[[0, 0, 0], [20, 20, 20]]])
+    stl_dir = str(tmp_path)
+    report = {}
+    assert post_build.run_analyzers(stl_dir, ["part.stl"], ARGS, report, jobs=1) == 1
+
+    denser = SimpleNamespace(**dict(vars(ARGS), filament_density=2.0))
+    assert post_build.run_analyzers(stl_dir, ["part.stl"], denser, report, jobs=1) == 1
+    assert post_build.run_analyzers(stl_dir, ["part.stl"], ARGS, report, jobs=1) == 0
+
+    material_analyzer(version=2)
+    assert post_build.run_analyzers(stl_dir, ["part.stl"], ARGS, report, jobs=1) == 1
+
+
+def test_workers_match_inline_results(build_boxes, tmp_path, material_analyzer):
+    for name, height in (("short", 10), ("tall", 30)):
+        build_boxes(name, [[[0, 0, 0], [20, 20, height]]])
+    stl_files = ["short.stl", "tall.stl", "missing.stl"]
+    inline, pooled = {}, {}
+    assert post_build.run_analyzers(str(tmp_path), stl_files, ARGS, inline, jobs=1) == 2
+    os.remove(os.path.join(str(tmp_path), post_build.ANALYSIS_CACHE_FILE))
+    assert post_build.run_analyzers(str(tmp_path), stl_files, ARGS, pooled, jobs=2) == 2
+    assert pooled == inline
+    assert "missing.stl" not in pooled["artifacts"]
+
+
+def test_failing_analyzer_is_not_cached(build_boxes, tmp_path, monkeypatch):
+    monkeypatch.setattr(post_build, "ANALYZERS", {})
+    post_build.register_analyzer("broken", "mesh_stats:analyze_stl", version=1,
+                                 settings=lambda args: {"no_such_option": 1})
+    build_boxes("part", [[[0, 0, 0], [20, 20, 20]]])
+    report = {}
+    for _ in range(2):
+        assert post_build.run_analyzers(str(tmp_path), ["part.stl"], ARGS, report, jobs=1) == 0
+    assert "broken" not in report.get("artifacts", {}).get("part.stl", {})
+    assert post_build.load_cache(str(tmp_path)) == {}
@@ -0,0 +1,101 @@
+"""Shared STL cache: publish, pull, corruption and build locks"""
+
+import json
+import os
+
+import pytest
+
+import shared_cache
+from build_all_lamps import build_with_shared_cache, run_blender_script, shared_cache_key
+
+
+def read_bytes(path):
+    with open(path, "rb") as f:
+        return f.read()
+
+
+def test_publish_then_pull(build_boxes, tmp_path):
+    stl_path = build_boxes("part", [[[0, 0, 0], [20, 20, 20]]])
+    cache_dir = str(tmp_path / "cache")
+    key = shared_cache.entry_key(stl="part.stl", sources="abc")
+    assert not shared_cache.has_entry(cache_dir, key)
+    assert shared_cache.publish_entry(cache_dir, key, stl_path, {"stl": "part.stl"})
+    assert shared_cache.has_entry(cache_dir, key)
+
+    pulled = str(tmp_path / "pulled.stl")
+    assert shared_cache.fetch_entry(cache_dir, key, pulled)
+    assert read_bytes(pulled) == read_bytes(stl_path)
+    # Nothing but the published entry is left in the staging area
+    assert os.listdir(os.path.join(cache_dir, shared_cache.TMP_DIR)) == []
+
+
+def test_corrupt_entry_is_discarded(build_boxes, tmp_path):
+    stl_path = build_boxes("part", [[[0, 0, 0], [20, 20, 20]]])
+    cache_dir = str(tmp_path / "cache")
+    key = shared_cache.entry_key(stl="part.stl")
+    shared_cache.publish_entry(cache_dir, key, stl_path)
+    with open(os.path.join(shared_cache.entry_dir(cache_dir, key), "part.stl"), "r+b") as f:
+        f.seek(100)
+        f.write(b"\xff\xff\xff\xff")
+
+    pulled = str(tmp_path / "pulled.stl")
+    assert not shared_cache.fetch_entry(cache_dir, key, pulled)
+    assert not os.path.exists(pulled)
+    assert not shared_cache.has_entry(cache_dir, key)
+    assert not [name for name in os.listdir(tmp_path) if name.endswith(".part")]
+
+
+def test_live_lock_times_out_and_stale_lock_breaks(tmp_path, monkeypatch):
+    monkeypatch.setattr(shared_cache, "LOCK_POLL_SECONDS", 0.01)
+    cache_dir = str(tmp_path / "cache")
+    key = shared_cache.entry_key(stl="part.stl")
+    held = shared_cache.acquire_lock(cache_dir, key, timeout=1.0)
+    assert held == shared_cache.lock_path(cache_dir, key)
+    with open(held, "r") as f:
+        assert json.load(f)["pid"] == os.getpid()
+
+    with pytest.raises(TimeoutError):
+        shared_cache.acquire_lock(cache_dir, key, timeout=0.05)
+
+    monkeypatch.setattr(shared_cache, "LOCK_STALE_SECONDS", -1.0)
+    assert shared_cache.acquire_lock(cache_dir, key, timeout=0.05) == held
+    shared_cache.release_lock(held)
+    assert not os.path.exists(held)
+
+
+def test_build_publishes_and_the_next_builder_pulls(tmp_path, box_script, fake_blender):
+    script = box_script("part", [[[0, 0, 0], [20, 20, 20]]])
+    cache_dir = str(tmp_path / "cache")
+    key = shared_cache_key(script, "part.stl", {"LAMP_STL_DIR": "here"})
+    # The STL directory is per machine, so it must not change the key
+    assert key == shared_cache_key(script, "part.stl", {"LAMP_STL_DIR": "elsewhere"})
+
+    stl_dir = str(tmp_path / "first")
+    first = os.path.join(stl_dir, "part.stl")
+    builds = []
+
+    def build():
+        builds.append(script)
+        return run_blender_script(fake_blender, script, {"LAMP_STL_DIR": stl_dir})
+
+    assert build_with_shared_cache(cache_dir, key, first, build, lock_timeout=1.0)
+    assert builds == [script] and os.path.exists(first)
+    assert shared_cache.has_entry(cache_dir, key)
+    assert not os.path.exists(shared_cache.lock_path(cache_dir, key))
+
+    second = str(tmp_path / "second.stl")
+
+    def must_not_build():
+        raise AssertionError("the published STL should have been pulled")
+
+    assert build_with_shared_cache(cache_dir, key, second, must_not_build, lock_timeout=1.0)
+    assert read_bytes(second) == read_bytes(first)
+
+
+def test_failed_build_publishes_nothing(tmp_path):
+    cache_dir = str(tmp_path / "cache")
+    key = shared_cache.entry_key(stl="part.stl")
+    stl_path = str(tmp_path / "part.stl")
+    assert not build_with_shared_cache(cache_dir, key, stl_path, lambda: False, lock_timeout=1.0)
+    assert not shared_cache.has_entry(cache_dir, key)
+    assert not os.path.exists(shared_cache.lock_path(cache_dir, key))
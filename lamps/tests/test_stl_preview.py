@@ -0,0 +1,20 @@
+"""Thumbnail rasteriser"""
+
+import numpy as np
+
+import stl_preview
+
+
+def square(z0, z1):
+    """Two triangles over x, y in [-10, 10], rising from z0 to z1 along x"""
+    corners = np.array([[-10, -10, z0], [10, -10, z1], [10, 10, z1], [-10, 10, z0]], dtype=float)
+    return corners[[[0, 1, 2], [0, 2, 3]]]
+
+
+def test_nearest_face_wins_whatever_the_order():
+    floor, roof = square(0.0, 0.0), square(5.0, 8.0)
+    alone = stl_preview.render(roof, "top", 64)
+    assert alone[..., 3].any()
+    assert not np.array_equal(stl_preview.render(floor, "top", 64), alone)
+    for triangles in ([floor, roof], [roof, floor]):
+        assert np.array_equal(stl_preview.render(np.concatenate(triangles), "top", 64), alone)
@@ -0,0 +1,128 @@
+"""Supervised Blender runs: deadlines, process-group kills and retries"""
+
+import os
+import signal
+import sys
+import time
+
+import pytest
+
+import supervisor
+from build_all_lamps import run_blender_script
+
+NO_RETRIES = {"retries": 0, "retry_on": (), "backoff_seconds": 0.0}
+
+
+def python(code):
+    return [sys.executable, "-c", code]
+
+
+def alive(pid):
+    """True while pid runs; zombies waiting to be reaped count as gone"""
+    try:
+        with open(f"/proc/{pid}/stat", "r") as f:
+            return f.read().rsplit(")", 1)[1].split()[0] != "Z"
+    except FileNotFoundError:
+        return False
+    except OSError:
+        try:
+            os.kill(pid, 0)
+        except ProcessLookupError:
+            return False
+        return True
+
+
+@pytest.fixture(autouse=True)
+def short_grace(monkeypatch):
+    monkeypatch.setattr(supervisor, "KILL_GRACE_SECONDS", 0.5)
+
+
+def test_timeout_kills_the_whole_group(tmp_path):
+    pid_file = tmp_path / "grandchild.pid"
+    code = ("import subprocess, sys, time\n"
+            "child = subprocess.Popen([sys.executable, '-c', 'import time; time.sleep(60)'])\n"
+            f"open({str(pid_file)!r}, 'w').write(str(child.pid))\n"
+            "time.sleep(60)\n")
+    result = supervisor.supervise(python(code), dict(os.environ), timeout=1.0, policy=NO_RETRIES)
+    assert result["outcome"] == supervisor.TIMEOUT
+    assert result["wall_seconds"] < 10
+    grandchild = int(pid_file.read_text())
+    end = time.monotonic() + 5
+    while alive(grandchild) and time.monotonic() < end:
+        time.sleep(0.05)
+    assert not alive(grandchild)
+    assert not supervisor._live_groups
+
+
+def test_child_ignoring_sigterm_is_killed():
+    code = ("import signal, time\n"
+            "signal.signal(signal.SIGTERM, signal.SIG_IGN)\n"
+            "print('ready', flush=True)\n"
+            "time.sleep(60)\n")
+    result = supervisor.supervise(python(code), dict(os.environ), timeout=1.0, policy=NO_RETRIES)
+    assert result["outcome"] == supervisor.TIMEOUT
+    assert result["exit_code"] == -signal.SIGKILL
+    assert result["wall_seconds"] < 10
+    assert "ready" in result["stdout"]
+
+
+def test_deadline_bounds_every_attempt():
+    result = supervisor.supervise(python("import time; time.sleep(60)"), dict(os.environ),
+                                  deadline=time.monotonic() + 1.0,
+                                  policy={"retries": 3, "retry_on": (supervisor.TIMEOUT,),
+                                          "backoff_seconds": 0.0})
+    assert result["outcome"] == supervisor.TIMEOUT
+    assert result["attempts"] == 1
+
+
+def test_signal_death_is_reported_as_killed():
+    code = "import os, signal; os.kill(os.getpid(), signal.SIGKILL)"
+    result = supervisor.supervise(python(code), dict(os.environ), policy=NO_RETRIES)
+    assert result["outcome"] == supervisor.KILLED
+    assert result["exit_code"] == -signal.SIGKILL
+    assert "SIGKILL" in supervisor.describe(result)
+
+
+def test_transient_failure_is_retried(tmp_path):
+    marker = tmp_path / "tried"
+    code = ("import os, sys\n"
+            f"if not os.path.exists({str(marker)!r}):\n"
+            f"    open({str(marker)!r}, 'w').close()\n"
+            "    sys.exit('write: Resource temporarily unavailable')\n")
+    policy = {"retries": 2, "retry_on": (supervisor.TRANSIENT,), "backoff_seconds": 0.0}
+    result = supervisor.supervise(python(code), dict(os.environ), policy=policy)
+    assert result["outcome"] == supervisor.OK
+    assert result["attempts"] == 2
+
+
+def test_script_error_is_not_retried():
+    policy = {"retries": 2, "retry_on": (supervisor.TRANSIENT, supervisor.KILLED),
+              "backoff_seconds": 0.0}
+    result = supervisor.supervise(python("raise SystemExit('boom')"), dict(os.environ),
+                                  policy=policy)
+    assert result["outcome"] == supervisor.FAILED
+    assert result["exit_code"] == 1
+    assert result["attempts"] == 1
+
+
+def test_blender_run_on_the_stub_records_usage(tmp_path, box_script, fake_blender):
+    script = box_script("part", [[[0, 0, 0], [20, 20, 20]]])
+    stl_dir = str(tmp_path / "out")
+    usage = {}
+    assert run_blender_script(fake_blender, script, {"LAMP_STL_DIR": stl_dir}, usage,
+                              timeout=60, policy=NO_RETRIES)
+    assert os.path.exists(os.path.join(stl_dir, "part.stl"))
+    assert usage["outcome"] == supervisor.OK and usage["attempts"] == 1
+    assert usage["exit_code"] == 0 and usage["wall_seconds"] > 0
+    assert "peak_rss_mb" in usage
+
+
+def test_hung_blender_run_times_out(tmp_path, fake_blender):
+    script = tmp_path / "hang.py"
+    script.write_text("import time\ntime.sleep(60)\n")
+    usage = {}
+    start = time.monotonic()
+    assert not run_blender_script(fake_blender, str(script), {}, usage, timeout=1.0,
+                                  policy=NO_RETRIES)
+    assert usage["outcome"] == supervisor.TIMEOUT
+    assert time.monotonic() - start < 10
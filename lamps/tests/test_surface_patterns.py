@@ -0,0 +1,52 @@
+"""Pattern fields and the refined wall mesh"""
+
+import math
+from collections import Counter
+
+import numpy as np
+import pytest
+
+import surface_patterns
+
+CIRCUMFERENCE = 2.0 * math.pi * 45.0
+
+
+@pytest.mark.parametrize("name", ["voronoi", "noise"])
+def test_field_does_not_depend_on_which_points_are_asked(name):
+    rng = np.random.default_rng(1)
+    u = rng.random(500) * CIRCUMFERENCE
+    v = rng.random(500) * 100.0
+    full = surface_patterns.pattern_field(name, u, v, CIRCUMFERENCE, 100.0, 10.0, seed=3)
+    low = v < 40.0
+    part = surface_patterns.pattern_field(name, u[low], v[low], CIRCUMFERENCE, 100.0, 10.0,
+                                          seed=3)
+    assert np.array_equal(part, full[low])
+
+
+@pytest.mark.parametrize("name", list(surface_patterns.PATTERNS))
+def test_refined_wall_is_a_crack_free_tube(name):
+    angles, rows = surface_patterns.wall_grid(name, 45.0, 100.0, 10.0, rim=3.0)
+    verts, quads, triangles = surface_patterns.refine_wall(
+        angles, rows, 45.0, name, 10.0, strength=2.0, mid_level=0.0, rim=3.0)
+    plain, _ = surface_patterns.cylinder_wall(angles, rows[[0, -1]], 45.0)
+    rings = len(angles)
+    assert np.array_equal(verts[:rings], plain[:rings])
+    assert np.array_equal(verts[-rings:], plain[rings:])
+
+    # Every edge is shared by two faces running it opposite ways, except the end rings
+    edges = Counter()
+    for face in [*quads.tolist(), *triangles.tolist()]:
+        edges.update(zip(face, face[1:] + face[:1]))
+    assert max(edges.values()) == 1
+    boundary = [edge for edge in edges if edge[::-1] not in edges]
+    assert len(boundary) == 2 * rings
+    assert {a for a, _ in boundary} == set(range(rings)) | set(range(len(verts) - rings, len(verts)))
+
+
+def test_refinement_stays_near_the_grooves():
+    angles, rows = surface_patterns.wall_grid("hex", 45.0, 100.0, 10.0, rim=3.0)
+    verts, quads, triangles = surface_patterns.refine_wall(
+        angles, rows, 45.0, "hex", 10.0, strength=2.0, mid_level=0.0, rim=3.0)
+    fine = len(angles) << surface_patterns.REFINE_LEVELS["hex"]
+    uniform = 2 * fine * (len(rows) - 1) << surface_patterns.REFINE_LEVELS["hex"]
+    assert 2 * len(quads) + len(triangles) < 0.9 * uniform
@@ -0,0 +1,185 @@
+"""
+Blender toolchain discovery.
+Finds the Blender executable, runs it once to read its version and the STL
+exporter it provides, and caches the result keyed on the executable's mtime so
+later builds skip the probe entirely.
+"""
+
+import json
+import os
+import platform
+import re
+import shutil
+import subprocess
+import sys
+
+# Cache file for the probe result (machine specific, not committed)
+TOOLCHAIN_CACHE_FILE = ".blender_toolchain.json"
+
+# Bump when the probe output format changes to invalidate old caches
+PROBE_VERSION = 2
+
+# Printed by the probe script so its JSON can be picked out of Blender's output
+PROBE_MARKER = "LAMP_TOOLCHAIN_PROBE "
+
+# Runs inside Blender: report which exporter operators and add-ons exist
+PROBE_EXPR = """
+import json, addon_utils, bpy
+def ops(module):
+    return sorted(dir(getattr(bpy.ops, module, None) or object()))
+print(%r + json.dumps({
+    "version": list(bpy.app.version),
+    "ops": {m: ops(m) for m in ("wm", "export_mesh")},
+    "addons": sorted(m.__name__ for m in addon_utils.modules()),
+}))
+""" % PROBE_MARKER
+
+
+def find_blender_path():
+    """Find the Blender executable: $BLENDER, then PATH, then common install locations"""
+    env_path = os.environ.get("BLENDER")
+    if env_path:
+        if os.path.exists(env_path):
+            return env_path
+        raise FileNotFoundError(f"$BLENDER points to a missing file: {env_path}")
+
+    on_path = shutil.which("blender")
+    if on_path:
+        return on_path
+
+    system = platform.system()
+
+    if system == "Darwin":  # macOS
+        # Common macOS Blender paths
+        possible_paths = [
+            "/Applications/Blender.app/Contents/MacOS/Blender",
+            os.path.expanduser("~/Applications/Blender.app/Contents/MacOS/Blender"),
+            # Blender 4.0
+            "/Applications/Blender.app/Contents/MacOS/blender",
+            os.path.expanduser("~/Applications/Blender.app/Contents/MacOS/blender"),
+        ]
+    elif system == "Windows":
+        # Common Windows Blender paths
+        possible_paths = [
+            r"C:\Program Files\Blender Foundation\Blender\blender.exe",
+            r"C:\Program Files\Blender Foundation\Blender 4.0\blender.exe",
+        ]
+    else:  # Linux
+        possible_paths = [
+            "/usr/bin/blender",
+            "/usr/local/bin/blender",
+        ]
+
+    for path in possible_paths:
+        if os.path.exists(path):
+            return path
+
+    # Only prompt when someone is there to answer; CI must not block on input()
+    if not sys.stdin.isatty():
+        raise FileNotFoundError("Could not find Blender; set $BLENDER or add blender to PATH")
+
+    print("Could not automatically find Blender executable.")
+    manual_path = input("Please enter the full path to your Blender executable: ")
+
+    if os.path.exists(manual_path):
+        return manual_path
+    else:
+        raise FileNotFoundError(f"Could not find Blender executable at {manual_path}")
+
+
+def parse_version(version_output):
+    """Extract 'X.Y.Z' from `blender --version` output, or None"""
+    match = re.search(r"Blender\s+(\d+\.\d+(?:\.\d+)?)", version_output)
+    return match.group(1) if match else None
+
+
+def select_exporters(probe):
+    """Pick the STL exporter operator from raw probe data"""
+    wm_ops = set(probe["ops"].get("wm", []))
+    export_ops = set(probe["ops"].get("export_mesh", []))
+    addons = set(probe.get("addons", []))
+
+    if "stl_export" in wm_ops:
+        stl = {"operator": "wm.stl_export", "addon": None}
+    elif "stl" in export_ops:
+        stl = {"operator": "export_mesh.stl", "addon": None}
+    elif "io_mesh_stl" in addons:
+        stl = {"operator": "export_mesh.stl", "addon": "io_mesh_stl"}
+    else:
+        stl = None
+
+    return {"stl": stl}
+
+
+def probe_blender(blender_path):
+    """Run Blender once for its version and once for its exporters"""
+    version_run = subprocess.run([blender_path, "--version"],
+                                 capture_output=True, text=True, check=True)
+    version = parse_version(version_run.stdout)
+
+    probe_run = subprocess.run([
+        blender_path,
+        "--background",
+        "--factory-startup",
+        "--python-expr", PROBE_EXPR,
+    ], capture_output=True, text=True, check=True)
+
+    probe = None
+    for line in probe_run.stdout.splitlines():
+        if line.startswith(PROBE_MARKER):
+            probe = json.loads(line[len(PROBE_MARKER):])
+    if probe is None:
+        raise RuntimeError("Blender probe produced no result")
+
+    return {
+        "version": version or ".".join(str(v) for v in probe["version"]),
+        "exporters": select_exporters(probe),
+    }
+
+
+def executable_key(blender_path):
+    """Cache key for an executable: resolved path, size and mtime"""
+    real_path = os.path.realpath(blender_path)
+    stat = os.stat(real_path)
+    return {"path": real_path, "mtime_ns": stat.st_mtime_ns, "size": stat.st_size,
+            "probe_version": PROBE_VERSION}
+
+
+def load_toolchain(cache_dir, blender_path=None):
+    """Return the toolchain description, probing Blender only when the cache is stale"""
+    blender_path = blender_path or find_blender_path()
+    key = executable_key(blender_path)
+    cache_path = os.path.join(cache_dir, TOOLCHAIN_CACHE_FILE)
+
+    try:
+        with open(cache_path, "r") as f:
+            cached = json.load(f)
+        if cached.get("key") == key:
+            return cached
+    except (IOError, json.JSONDecodeError):
+        pass
+
+    print(f"Probing Blender toolchain at {blender_path}...")
+    toolchain = {"key": key, "blender_path": blender_path}
+    toolchain.update(probe_blender(blender_path))
+
+    try:
+        with open(cache_path, "w") as f:
+            json.dump(toolchain, f, indent=2)
+    except IOError:
+        print(f"Warning: Could not save toolchain cache to {cache_path}")
+
+    return toolchain
+
+
+def toolchain_env(toolchain, stl_dir=None):
+    """Environment variables telling lamp scripts which exporters to call"""
+    env = {"LAMP_BLENDER_VERSION": toolchain.get("version") or ""}
+    stl = toolchain["exporters"].get("stl")
+    if stl:
+        env["LAMP_STL_EXPORTER"] = stl["operator"]
+        if stl["addon"]:
+            env["LAMP_STL_ADDON"] = stl["addon"]
+    if stl_dir:
+        env["LAMP_STL_DIR"] = stl_dir
+    return env
@@ -0,0 +1,196 @@
+"""
+Wall thickness analysis for exported STLs.
+Casts a ray inward from the centre of every face and measures how far it
+travels before leaving the solid, giving a per-face thickness map. Rays walk
+the same BVH the printability checks use, level by level for a whole batch of
+rays at once, so there are no per-ray Python loops.
+"""
+
+import os
+
+import numpy as np
+
+from mesh_check import BVH
+from mesh_io import read_stl, triangle_normals
+
+DEFAULT_MIN_WALL = 0.8  # mm; about two extrusion widths
+
+# Rays stop after this distance (mm); thicker walls report as inf
+MAX_DISTANCE = 10.0
+
+# First search range (mm); rays that hit nothing are retraced with double
+# the range until MAX_DISTANCE, so thin walls never pay for long rays
+FIRST_DISTANCE = 2.0
+
+# Rays traced per batch, to bound the size of the traversal frontier
+RAY_BATCH = 1 << 16
+
+# Hits closer than this (mm) to the ray origin are the starting face itself
+SELF_HIT_EPS = 1e-4
+
+
+def ray_hits(origins, directions, corner, edge1, edge2, max_distance):
+    """Vectorised Möller–Trumbore; distance along each ray or inf on a miss
+
+    Triangles come as a first corner and two edge vectors, each split into
+    x, y, z columns. Only hits on faces pointing away from the ray count: a
+    ray that starts inside the solid leaves it through a back face.
+    """
+    # Cross products written out per axis; np.cross is slow on short rows
+    dx, dy, dz = directions
+    e1x, e1y, e1z = edge1
+    e2x, e2y, e2z = edge2
+    hx, hy, hz = dy * e2z - dz * e2y, dz * e2x - dx * e2z, dx * e2y - dy * e2x
+    det = e1x * hx + e1y * hy + e1z * hz
+    valid = det < 0
+    inv = np.divide(1.0, det, out=np.zeros_like(det), where=valid)
+
+    sx, sy, sz = (o - c for o, c in zip(origins, corner))
+    u = (sx * hx + sy * hy + sz * hz) * inv
+    qx, qy, qz = sy * e1z - sz * e1y, sz * e1x - sx * e1z, sx * e1y - sy * e1x
+    v = (dx * qx + dy * qy + dz * qz) * inv
+    t = (e2x * qx + e2y * qy + e2z * qz) * inv
+
+    hit = (valid & (u >= 0) & (v >= 0) & (u + v <= 1)
+           & (t > SELF_HIT_EPS) & (t <= max_distance))
+    return np.where(hit, t, np.inf)
+
+
+def trace_rays(bvh, tris, origins, directions, max_distance=MAX_DISTANCE):
+    """Nearest back-face hit distance for each ray, walking the BVH by levels"""
+    distance = np.full(len(origins), np.inf)
+    # Axis-parallel rays would divide by zero in the slab test
+    safe = np.where(np.abs(directions) < 1e-12, 1e-12, directions)
+
+    # Node tests run per axis on float32 columns: they are the hot loop
+    def columns(values):
+        return [np.ascontiguousarray(c, dtype=np.float32) for c in values.T]
+
+    origin_cols = columns(origins)
+    dir_cols = columns(directions)
+    inv_cols = columns(1.0 / safe)
+    box_levels = [(columns(lo), columns(hi)) for lo, hi in bvh.levels]
+    normals = triangle_normals(tris)
+    normals /= np.maximum(np.linalg.norm(normals, axis=1, keepdims=True), 1e-30)
+    corner = columns(tris[:, 0])
+    edge1 = columns(tris[:, 1] - tris[:, 0])
+    edge2 = columns(tris[:, 2] - tris[:, 0])
+    normal_levels = [(columns(lo), columns(hi)) for lo, hi in bvh.node_bounds(normals, normals)]
+
+    size = bvh.leaf_size
+    padded_order = np.full(-(-bvh.count // size) * size, -1, dtype=np.int64)
+    padded_order[:bvh.count] = bvh.order
+    leaf_tris = padded_order.reshape(-1, size)
+    # Nodes past these indices only cover padding leaves, whose inverted boxes
+    # would pass the slab test
+    real_nodes = [-(-len(leaf_tris) // (1 << (bvh.depth - d))) for d in range(bvh.depth + 1)]
+
+    for start in range(0, len(origins), RAY_BATCH):
+        rays = np.arange(start, min(start + RAY_BATCH, len(origins)))
+        nodes = np.zeros(len(rays), dtype=np.int64)
+        for d in range(bvh.depth + 1):
+            if d:
+                rays = np.repeat(rays, 2)
+                nodes = np.repeat(nodes * 2, 2)
+                nodes[1::2] += 1
+                inside = nodes < real_nodes[d]
+                rays, nodes = rays[inside], nodes[inside]
+            # Slab test of the ray segment [0, max_distance] against node boxes
+            near = np.zeros(len(rays), dtype=np.float32)
+            far = np.full(len(rays), max_distance, dtype=np.float32)
+            # Upper bound of normal . direction over the node's faces; a node
+            # whose faces all point back at the ray holds no exit
+            facing = np.zeros(len(rays), dtype=np.float32)
+            for axis in range(3):
+                o = origin_cols[axis][rays]
+                inv = inv_cols[axis][rays]
+                t1 = (box_levels[d][0][axis][nodes] - o) * inv
+                t2 = (box_levels[d][1][axis][nodes] - o) * inv
+                near = np.maximum(near, np.minimum(t1, t2))
+                far = np.minimum(far, np.maximum(t1, t2))
+                direction = dir_cols[axis][rays]
+                facing += np.maximum(normal_levels[d][0][axis][nodes] * direction,
+                                     normal_levels[d][1][axis][nodes] * direction)
+            keep = (near <= far) & (facing > 0)
+            rays, nodes = rays[keep], nodes[keep]
+
+        # Test every triangle in the reached leaves
+        ray_idx = np.repeat(rays, size)
+        tri_idx = leaf_tris[nodes].ravel()
+        real = tri_idx >= 0
+        ray_idx, tri_idx = ray_idx[real], tri_idx[real]
+        t = ray_hits([c[ray_idx] for c in origin_cols], [c[ray_idx] for c in dir_cols],
+                     [c[tri_idx] for c in corner], [c[tri_idx] for c in edge1],
+                     [c[tri_idx] for c in edge2], max_distance)
+        hit = np.isfinite(t)
+        np.minimum.at(distance, ray_idx[hit], t[hit].astype(np.float64))
+    return distance
+
+
+def thickness_map(triangles, max_distance=MAX_DISTANCE):
+    """Wall thickness (mm) behind the centre of every face; inf past max_distance"""
+    tris = np.asarray(triangles, dtype=np.float64)
+    normals = triangle_normals(tris)
+    lengths = np.linalg.norm(normals, axis=1)
+    usable = lengths > 1e-12
+    thickness = np.full(len(tris), np.inf)
+    if not usable.any():
+        return thickness
+
+    # Inverted shells (negative volume) have their normals pointing inwards
+    volume = np.einsum("ij,ij->", tris[:, 0], np.cross(tris[:, 1], tris[:, 2])) / 6.0
+    inward = -np.sign(volume or 1.0) * normals[usable] / lengths[usable, None]
+    origins = tris[usable].mean(axis=1)
+
+    bvh = BVH(tris.min(axis=1), tris.max(axis=1))
+    # Flip the winding of inverted shells so their exits are back faces too
+    hit_tris = tris if volume >= 0 else tris[:, ::-1]
+    distance = np.full(len(origins), np.inf)
+    pending = np.arange(len(origins))
+    reach = min(FIRST_DISTANCE, max_distance)
+    while len(pending):
+        distance[pending] = trace_rays(bvh, hit_tris, origins[pending], inward[pending], reach)
+        if reach >= max_distance:
+            break
+        pending = pending[np.isinf(distance[pending])]
+        reach = min(reach * 2, max_distance)
+    thickness[usable] = distance
+    return thickness
+
+
+def summarize_thickness(triangles, thickness, min_wall=DEFAULT_MIN_WALL):
+    """JSON-friendly pass/fail summary of a thickness map"""
+    tris = np.asarray(triangles, dtype=np.float64)
+    areas = 0.5 * np.linalg.norm(triangle_normals(tris), axis=1)
+    thin = thickness < min_wall
+    finite = np.isfinite(thickness)
+    order = np.argsort(thickness)[:5]
+    thinnest = order[thin[order]]
+    return {
+        "min_wall_mm": min_wall,
+        "max_distance_mm": MAX_DISTANCE,
+        "thinnest_mm": float(thickness.min()) if finite.any() else None,
+        "median_mm": float(np.median(thickness[finite])) if finite.any() else None,
+        "thin_faces": int(np.count_nonzero(thin)),
+        "thin_area_mm2": float(areas[thin].sum()),
+        "thin_area_fraction": float(areas[thin].sum() / areas.sum()) if areas.sum() else 0.0,
+        # A few places to look at in a viewer
+        "thin_examples": np.round(tris[thinnest].mean(axis=1), 3).tolist(),
+        "ok": not thin.any(),
+    }
+
+
+def thickness_map_path(stl_path):
+    """Where the per-face thickness map of an STL is stored"""
+    stem, _ = os.path.splitext(stl_path)
+    return f"{stem}_thickness.npy"
+
+
+def analyze_stl(path, min_wall=DEFAULT_MIN_WALL):
+    """Compute, save and summarise the thickness map of one STL file"""
+    triangles = read_stl(path)
+    thickness = thickness_map(triangles)
+    np.save(thickness_map_path(path), thickness.astype(np.float32))
+    result = summarize_thickness(triangles, thickness, min_wall)
+    result["map"] = os.path.basename(thickness_map_path(path))
+    return result